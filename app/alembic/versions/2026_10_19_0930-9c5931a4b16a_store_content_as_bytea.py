@@ -0,0 +1,51 @@
+"""store content as bytea
+
+Revision ID: 9c5931a4b16a
+Revises: e80071a53c12
+Create Date: 2026-10-19 09:30:12.418265
+
+Existing rows are converted to plain UTF-8 bytes, which `CompressedText` reads as-is. Compress them afterwards
+with `python -m app.services.compression compress`. Downgrading requires decompressing them first with
+`python -m app.services.compression decompress`.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c5931a4b16a"
+down_revision: Union[str, None] = "e80071a53c12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONTENT_TABLES = ("crawled_data", "ai_translation_output_data")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in CONTENT_TABLES:
+        op.alter_column(
+            table_name,
+            "content",
+            existing_type=sa.String(),
+            type_=sa.LargeBinary(),
+            existing_nullable=False,
+            postgresql_using="convert_to(content, 'UTF8')",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in CONTENT_TABLES:
+        op.alter_column(
+            table_name,
+            "content",
+            existing_type=sa.LargeBinary(),
+            type_=sa.String(),
+            existing_nullable=False,
+            postgresql_using="convert_from(content, 'UTF8')",
+        )
@@ -0,0 +1,68 @@
+"""add crawled data canonical url
+
+Revision ID: b86809f4f51d
+Revises: f95986303afc
+Create Date: 2026-10-19 15:20:42.117305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.urls import canonicalize_url
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b86809f4f51d"
+down_revision: Union[str, None] = "f95986303afc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+crawled_data = sa.table(
+    "crawled_data",
+    sa.column("id", sa.Integer),
+    sa.column("url", sa.String),
+    sa.column("canonical_url", sa.String),
+    sa.column("metadata", postgresql.JSONB),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("crawled_data", sa.Column("canonical_url", sa.String(length=255), nullable=True))
+
+    if not context.is_offline_mode():
+        backfill_canonical_urls()
+
+    op.create_index(op.f("ix_crawled_data_canonical_url"), "crawled_data", ["canonical_url"], unique=True)
+
+
+def backfill_canonical_urls() -> None:
+    """Canonicalizes existing rows in id order, when several rows canonicalize the same only the oldest one gets the
+    canonical url, the others stay reachable through their exact url. Rows are only found by their exact url when
+    the migration is generated as SQL, canonicalization needs Python."""
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(crawled_data.c.id, crawled_data.c.url, crawled_data.c.metadata).order_by(crawled_data.c.id)
+    )
+    seen_canonical_urls = set()
+    for row_id, url, metadata in rows.all():
+        canonical_url = canonicalize_url(url, metadata)
+        if canonical_url in seen_canonical_urls:
+            continue
+
+        seen_canonical_urls.add(canonical_url)
+        connection.execute(
+            sa.update(crawled_data).where(crawled_data.c.id == row_id).values(canonical_url=canonical_url)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_crawled_data_canonical_url"), table_name="crawled_data")
+    op.drop_column("crawled_data", "canonical_url")
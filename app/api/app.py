@@ -1,64 +1,299 @@
-from fastapi import APIRouter, Depends, HTTPException
+import datetime as dt
+import secrets
+from pathlib import Path as FilePath
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from loguru import logger
 
-from app.config.db import AsyncSession, get_async_session_dependency
-from app.schemas.app import TranslateRequestInput, TranslateResponse
-from app.services.app import save_translated_content, get_or_crawl_url, get_crawled_data, get_or_translate_content
+from app.config.admission import get_client_key, get_key_quota
+from app.config.app_settings import settings
+from app.config.cache import get_translation_cache
+from app.config.db import (
+    AsyncSession,
+    get_async_session,
+    get_async_session_dependency,
+    get_read_session_dependency,
+    uses_replica,
+)
+from app.schemas.app import (
+    ExportFilters,
+    ExportFormat,
+    JobResponse,
+    ResponseFormat,
+    TranslateRequestInput,
+    TranslateResponse,
+)
+from app.services.app import (
+    save_translated_content,
+    get_or_crawl_url,
+    get_crawled_data,
+    get_or_translate_content,
+    get_encoded_translation,
+    get_translation_snapshot,
+    record_access,
+)
+from app.services.export import EXPORT_MEDIA_TYPES, export_data, parquet_available
+from app.services.jobs import enqueue_translation_job, get_translation_job
+from app.services.usage import get_usage_report
+from app.services.webhooks import webhooks_configured
+from app.utils.compression import negotiate_encoding
+from app.utils.profiling import SPEEDSCOPE_SUFFIX, SUMMARY_SUFFIX, RequestProfile, profiling_available
 
 router = APIRouter(prefix="/app")
 
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+def job_response(job, status_code: int = 200) -> ORJSONResponse:
+    response = JobResponse(
+        success=True,
+        error=None,
+        data={
+            "job_id": job.id,
+            "status": job.status,
+            "crawled_data_id": job.crawled_data_id,
+            "translation_output_id": job.translation_output_id,
+            "error": job.error,
+        },
+    )
+    return ORJSONResponse(response.model_dump(), status_code=status_code)
+
+
+def markdown_response(content: str | bytes, crawled_data_id: int, encoding: str | None = None) -> Response:
+    """Returns content as a raw Markdown document, skipping the JSON envelope."""
+
+    headers = {"X-Crawled-Data-Id": str(crawled_data_id), "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=content, media_type="text/markdown; charset=utf-8", headers=headers)
+
 
 @router.get("/translate")
 async def get_translation(
-    id: int, async_session: AsyncSession = Depends(get_async_session_dependency)
+    id: int,
+    request: Request,
+    language: str | None = Query(
+        None, description="Translation language, the page's first translation language when not given"
+    ),
+    response_format: ResponseFormat = Query("json", alias="format"),
+    async_session: AsyncSession = Depends(get_read_session_dependency),
 ) -> TranslateResponse:
-    crawled_data = await get_crawled_data(id, async_session)
-    if not crawled_data:
-        raise HTTPException(
-            status_code=404,
-            detail="Crawled data not found",
-        )
+    snapshot = await get_translation_snapshot(id, async_session, language)
+    if not snapshot and uses_replica(async_session):
+        # a replica may not have replayed a translation saved moments ago yet
+        async with get_async_session() as primary_session:
+            snapshot = await get_translation_snapshot(id, primary_session, language)
+    if not snapshot:
+        detail = "Translation output not found"
+        if not await get_crawled_data(id, async_session):
+            detail = "Crawled data not found"
+        raise HTTPException(status_code=404, detail=detail)
 
-    translation_output = await crawled_data.awaitable_attrs.translation_output
-    if not translation_output:
-        raise HTTPException(
-            status_code=404,
-            detail="Translation output not found",
+    record_access(id)
+    if response_format == "markdown":
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding is None:
+            return markdown_response(snapshot["content"], id)
+
+        content = await get_encoded_translation(
+            snapshot["translation_output_id"], snapshot["content"], encoding, async_session
         )
+        return markdown_response(content, id, encoding)
 
-    return TranslateResponse(
-        success=True,
-        error=None,
-        data={
-            "crawled_data_id": crawled_data.id,
-            "content": translation_output.content,
-            "metadata": {
-                "translation_metadata": translation_output.ai_metadata,
-                "crawled_metadata": crawled_data.crawled_metadata,
+    # the snapshot is already plain data, serialize it directly instead of validating a `TranslateResponse`
+    return ORJSONResponse(
+        {
+            "success": True,
+            "error": None,
+            "data": {
+                "crawled_data_id": id,
+                "content": snapshot["content"],
+                "metadata": {
+                    "translation_metadata": snapshot["translation_metadata"],
+                    "crawled_metadata": snapshot["crawled_metadata"],
+                },
             },
-        },
+        }
     )
 
 
+@router.get("/cache/stats")
+async def get_cache_stats() -> dict:
+    """Hit, miss and eviction stats of this worker's translation read cache."""
+
+    cache = get_translation_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/usage")
+async def get_usage(
+    since: dt.date | None = Query(None, description="First day of the report (UTC). Default: 30 days ago"),
+    until: dt.date | None = Query(None, description="Last day of the report (UTC). Default: today"),
+    group_by: list[Literal["day", "model", "language", "domain"]] = Query(["day"]),
+    async_session: AsyncSession = Depends(get_read_session_dependency),
+) -> dict:
+    """LLM calls, tokens and latency summed per day, model, language and/or domain, read from the daily rollup."""
+
+    until = until or dt.datetime.now(dt.UTC).date()
+    since = since or until - dt.timedelta(days=29)
+    if since > until:
+        raise HTTPException(status_code=400, detail="`since` must not be after `until`")
+
+    group_by = list(dict.fromkeys(group_by))
+    rows = await get_usage_report(since, until, group_by, async_session)
+    metrics = [key for key in rows[0] if key not in group_by] if rows else []
+    totals = {metric: sum(row[metric] for row in rows) for metric in metrics}
+    return {"since": since, "until": until, "group_by": group_by, "rows": rows, "totals": totals}
+
+
+@router.get("/export")
+async def export(
+    format: ExportFormat = Query("ndjson"),
+    since: dt.datetime | None = Query(None, description="Only pages crawled at or after this time"),
+    until: dt.datetime | None = Query(None, description="Only pages crawled before this time"),
+    language: str | None = Query(None, description="Only pages translated into this language, with that translation"),
+    domain: str | None = Query(None, description="Only pages of this domain or its subdomains"),
+) -> StreamingResponse:
+    """Streams crawled pages joined with their translations, a row per pair, for analytics or backups. Rows are
+    read through a server-side cursor and sent as they're fetched, so exports of any size use constant memory."""
+
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="`since` must be before `until`")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet exports need the `export` extra (pyarrow) installed")
+
+    filters = ExportFilters(since=since, until=until, language=language, domain=domain)
+    return StreamingResponse(
+        export_data(filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="export.{format}"'},
+    )
+
+
+def check_profiling_token(request: Request) -> None:
+    token = settings.profiling.token
+    provided = request.headers.get(PROFILE_TOKEN_HEADER, "")
+    if token is None or not secrets.compare_digest(provided.encode(), token.get_secret_value().encode()):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+def get_request_profile(request: Request, req_input: TranslateRequestInput) -> RequestProfile | None:
+    """A profile of the request when it carries the profiling token header, otherwise `None` and the request runs as
+    usual. Only requests translated inline can be profiled, queued ones are handled by the stage workers."""
+
+    if PROFILE_TOKEN_HEADER.lower() not in request.headers:
+        return None
+
+    check_profiling_token(request)
+    if not profiling_available():
+        raise HTTPException(status_code=501, detail="Profiling needs the `profiling` extra (pyinstrument) installed")
+    if settings.workers.mode == "queue":
+        raise HTTPException(status_code=400, detail="Only requests translated inline can be profiled")
+    if RequestProfile.is_running():
+        raise HTTPException(status_code=409, detail="Another request is being profiled, retry later")
+
+    return RequestProfile(
+        FilePath(settings.profiling.folder),
+        settings.profiling.interval,
+        settings.profiling.lag_interval,
+        settings.profiling.max_files,
+        settings.profiling.max_bytes,
+        details={"url": str(req_input.url), "language": req_input.language},
+    )
+
+
+@router.get("/profiles/{id}", dependencies=[Depends(check_profiling_token)])
+async def get_profile(id: str = Path(pattern=r"^[0-9a-f]{32}$"), speedscope: bool = Query(False)) -> Response:
+    """Summary of a profiled request: duration, CPU time and event loop lag. With `speedscope`, the sampled stacks
+    as a speedscope file, open it in https://www.speedscope.app."""
+
+    suffix = SPEEDSCOPE_SUFFIX if speedscope else SUMMARY_SUFFIX
+    path = FilePath(settings.profiling.folder) / f"{id}{suffix}"
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    headers = {"Content-Disposition": f'attachment; filename="{path.name}"'} if speedscope else None
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+
 @router.post("/translate")
 async def translate(
-    req_input: TranslateRequestInput, session: AsyncSession = Depends(get_async_session_dependency)
+    req_input: TranslateRequestInput,
+    request: Request,
+    response: Response,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    session: AsyncSession = Depends(get_async_session_dependency),
+) -> TranslateResponse:
+    """Translates content from a URL to a target language. Answers 429 when the client already has too many requests
+    in flight and 503 when this instance has no crawl or translate capacity left, both with `Retry-After`.
+
+    With the `X-Profile-Token` header, the request runs under the sampling profiler and the response has the
+    `X-Profile-Id` of the profile to fetch from `GET /app/profiles/{id}`."""
+
+    profile = get_request_profile(request, req_input)
+    if profile is None:
+        return await admit_translate(req_input, request, response_format, session)
+
+    async with profile:
+        result = await admit_translate(req_input, request, response_format, session)
+
+    # headers of the injected response are only applied to returned models, not to returned responses
+    (result if isinstance(result, Response) else response).headers[PROFILE_ID_HEADER] = profile.id
+    return result
+
+
+async def admit_translate(
+    req_input: TranslateRequestInput, request: Request, response_format: ResponseFormat, session: AsyncSession
 ) -> TranslateResponse:
-    """Translates content from a URL to a target language."""
+    key_quota = get_key_quota()
+    if key_quota is None:
+        return await handle_translate(req_input, response_format, session)
+
+    with key_quota.slot(get_client_key(request)):
+        return await handle_translate(req_input, response_format, session)
+
 
+async def handle_translate(
+    req_input: TranslateRequestInput, response_format: ResponseFormat, session: AsyncSession
+) -> TranslateResponse:
     logger.debug("received translate request", input=req_input)
     url = req_input.url
     language = req_input.language
+    if req_input.callback_url and not webhooks_configured():
+        raise HTTPException(status_code=400, detail="Callback URLs are not enabled on this server")
+
+    if settings.workers.mode == "queue":
+        # the stage workers take it from here, poll the job or fetch the translation once it's completed
+        job = await enqueue_translation_job(req_input, session)
+        return job_response(job, status_code=202)
 
     try:
         crawled_data, _ = await get_or_crawl_url(url, session, req_input.cache)
-        translated_content = await get_or_translate_content(crawled_data, session, language)
+        record_access(crawled_data.id)
+        translation = await get_or_translate_content(crawled_data, session, language)
 
         title = req_input.title if req_input.title else crawled_data.title
         translation_output, output_file_path = await save_translated_content(
-            crawled_data.id, title, translated_content, language, save_to_disk=req_input.save_to_disk
+            crawled_data.id,
+            title,
+            translation["content"],
+            language,
+            save_to_disk=req_input.save_to_disk,
+            source_content=crawled_data.content,
+            metadata=translation["metadata"],
+            callback_url=req_input.callback_url,
+            callback_data={"url": url},
         )
 
+        if response_format == "markdown":
+            return markdown_response(translation_output.content, crawled_data.id)
+
         return TranslateResponse(
             success=True,
             error=None,
@@ -68,9 +303,20 @@ async def translate(
                     "translation_metadata": translation_output.ai_metadata,
                     "crawled_metadata": crawled_data.crawled_metadata,
                 },
-                "content": translated_content,
+                "content": translation_output.content,
             },
         )
     except ValueError as exc:
         logger.error("Translation failed", url=url, error=str(exc))
         return TranslateResponse(success=False, error={"message": str(exc)}, data=None)
+
+
+@router.get("/jobs/{id}")
+async def get_job(id: int, async_session: AsyncSession = Depends(get_async_session_dependency)) -> JobResponse:
+    """Status of a queued translate request, fetch the translation with `GET /app/translate` once completed."""
+
+    job = await get_translation_job(id, async_session)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job_response(job)
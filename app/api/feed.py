@@ -1,20 +1,63 @@
-from fastapi import APIRouter, Depends, Response
+from datetime import UTC
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import APIRouter, Depends, Request, Response
 from loguru import logger
 
-from app.config.db import AsyncSession, get_async_session_dependency
-from app.services.feed import prepare_feed
+from app.config.db import AsyncSession, get_read_session_dependency
+from app.schemas.feed import FeedVersion
+from app.services.feed import get_language_feed_version, prepare_feed, render_language_feed
 
 router = APIRouter(prefix="/feed")
 
 
 @router.get("/", response_class=Response)
-async def get_feed(async_session: AsyncSession = Depends(get_async_session_dependency)):
+async def get_feed(async_session: AsyncSession = Depends(get_read_session_dependency)):
     feed = await prepare_feed(async_session)
     xml_feed = feed.to_xml()
 
-    logger.debug("created XML feed", xml_feed=xml_feed)
+    logger.debug("created XML feed", entries=len(feed.entries), size=len(xml_feed))
     return Response(
         content=xml_feed,
         media_type="application/rss+xml; charset=utf-8",
         headers={"Cache-Control": "no-cache", "Content-Type": "application/rss+xml; charset=utf-8"},
     )
+
+
+def is_not_modified(request: Request, version: FeedVersion) -> bool:
+    """Whether the client's cached copy is current, by `If-None-Match` or else `If-Modified-Since`."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # weak comparison, the `W/` prefix doesn't matter
+        etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+        return "*" in etags or version["etag"].removeprefix("W/") in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or version["last_modified"] is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return version["last_modified"].replace(microsecond=0) <= since
+
+
+@router.get("/{language}", response_class=Response)
+async def get_language_feed(
+    language: str, request: Request, async_session: AsyncSession = Depends(get_read_session_dependency)
+):
+    """Atom feed of the newest translations into a language, assembled from the entries stored with them."""
+
+    version = await get_language_feed_version(language, async_session)
+    headers = {"Cache-Control": "no-cache", "ETag": version["etag"]}
+    if version["last_modified"] is not None:
+        headers["Last-Modified"] = format_datetime(version["last_modified"].astimezone(UTC), usegmt=True)
+
+    if is_not_modified(request, version):
+        return Response(status_code=304, headers=headers)
+
+    xml_feed = await render_language_feed(language, version, async_session)
+    logger.debug("created XML feed", language=language, entries=len(version["entry_ids"]), size=len(xml_feed))
+    return Response(content=xml_feed, media_type="application/atom+xml; charset=utf-8", headers=headers)
@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from app.config.db import AsyncSession, get_read_session_dependency
+from app.services.app import get_saved_file
+from app.utils.compression import negotiate_encoding
+from app.utils.files import PRECOMPRESSED_SUFFIXES
+
+router = APIRouter(prefix="/files")
+
+
+def is_not_modified(request: Request, response: FileResponse) -> bool:
+    """Whether the client's cached copy is current, by `If-None-Match` or else `If-Modified-Since`."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+        return "*" in etags or response.headers["etag"] in etags
+
+    return request.headers.get("if-modified-since") == response.headers["last-modified"]
+
+
+@router.get("/markdown/{name}")
+async def get_markdown_file(
+    name: str, request: Request, async_session: AsyncSession = Depends(get_read_session_dependency)
+) -> Response:
+    """A Markdown file saved with a translation. Sent from disk in chunks by the server with `ETag`,
+    `Last-Modified` and byte range support, using the brotli or gzip copy saved next to it when the client accepts
+    one."""
+
+    if not name.endswith(".md"):
+        name = f"{name}.md"
+
+    path = await get_saved_file(name, async_session)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), tuple(PRECOMPRESSED_SUFFIXES))
+    if encoding is not None:
+        compressed_path = path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding])
+        if compressed_path.is_file():
+            path = compressed_path
+            headers["Content-Encoding"] = encoding
+
+    # stat the file upfront to get its validators, `FileResponse` otherwise only does it while sending
+    try:
+        stat_result = await asyncio.to_thread(path.stat)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    response = FileResponse(path, media_type="text/markdown; charset=utf-8", headers=headers, stat_result=stat_result)
+    if is_not_modified(request, response):
+        not_modified_headers = {key: response.headers[key] for key in ("etag", "last-modified", "vary")}
+        return Response(status_code=304, headers=not_modified_headers)
+
+    return response
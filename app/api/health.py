@@ -0,0 +1,30 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+
+from app.config.app_settings import settings
+from app.services.health import check_readiness
+
+router = APIRouter(prefix="/health")
+
+STARTED_AT = time.time()
+
+
+@router.get("/live")
+async def live() -> dict:
+    """The process is up and its event loop responds, never checks dependencies so a database outage doesn't get
+    every instance restarted."""
+
+    return {"status": "ok", "uptime_seconds": round(time.time() - STARTED_AT, 1)}
+
+
+@router.get("/ready")
+async def ready() -> ORJSONResponse:
+    """503 until the database answers and, when requests are handled inline, the shared browser is warm. Check
+    results are reused for `HEALTH_TTL_SECONDS`."""
+
+    is_ready, checks = await check_readiness(crawls=settings.workers.mode == "inline")
+    return ORJSONResponse(
+        {"status": "ready" if is_ready else "not_ready", "checks": checks}, status_code=200 if is_ready else 503
+    )
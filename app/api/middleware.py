@@ -0,0 +1,152 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.admission import get_client_key
+from app.config.db import db_client_context
+from app.config.logger import request_log_context
+from app.utils.compression import StreamEncoder, encode_content, negotiate_encoding
+
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/rss+xml",
+    "application/atom+xml",
+    "application/javascript",
+)
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts among zstd, brotli and gzip.
+
+    Responses smaller than `minimum_size`, with a non-text content type, that are already encoded (such as
+    precompressed stored variants) or that serve byte ranges of a file are passed through untouched. Streamed
+    responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+
+        self.start_message: Message | None = None
+        self.encoder: StreamEncoder | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # hold the start message until the first body chunk tells us whether compressing is worth it
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            # ranges and validators of a file response refer to the file as stored, compressing it would break them
+            self.passthrough = (
+                "content-encoding" in headers
+                or "accept-ranges" in headers
+                or not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.passthrough:
+            await self._flush_start_message()
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self.encoder is None and not more_body:
+            # the whole body is available, compress it in one go unless it's too small
+            if len(body) < self.minimum_size:
+                await self._flush_start_message()
+                await self._send(message)
+                return
+
+            compressed = encode_content(body, self.encoding)
+            self._set_encoding_headers(content_length=len(compressed))
+            await self._flush_start_message()
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.encoder is None:
+            # streamed response, the final length isn't known upfront
+            self.encoder = StreamEncoder(self.encoding)
+            self._set_encoding_headers(content_length=None)
+            await self._flush_start_message()
+
+        chunk = self.encoder.compress(body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _set_encoding_headers(self, content_length: int | None) -> None:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+
+    async def _flush_start_message(self) -> None:
+        if self.start_message is not None:
+            await self._send(self.start_message)
+            self.start_message = None
+
+
+class LogContextMiddleware:
+    """Tags every record logged while handling a request with its route and applies the route's log sample rate."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_log_context(scope["path"]):
+            await self.app(scope, receive, send)
+
+
+class DbClientMiddleware:
+    """Attributes the database sessions of a request to its client, so a client reads its own writes from the
+    primary instead of a lagging replica. Only installed when read replicas are configured."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with db_client_context(get_client_key(HTTPConnection(scope))):
+            await self.app(scope, receive, send)
@@ -0,0 +1,22 @@
+import functools
+
+from app.config.app_settings import settings
+from app.config.db import get_async_session
+from app.repositories.app import CrawledDataRepository
+from app.utils.access import AccessCounter
+
+
+async def flush_access_counts(counts: dict[int, int]) -> None:
+    repository = CrawledDataRepository()
+    async with get_async_session() as session:
+        await repository.add_access_counts(counts, session)
+
+
+@functools.cache
+def get_access_counter() -> AccessCounter | None:
+    """Returns the process-wide counter of translation reads, or `None` when reads aren't recorded."""
+
+    if not settings.scheduler.record_access:
+        return None
+
+    return AccessCounter(flush_access_counts, settings.scheduler.access_flush_seconds)
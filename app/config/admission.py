@@ -0,0 +1,73 @@
+import functools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal
+
+from starlette.requests import HTTPConnection
+
+from app.config.app_settings import settings
+from app.utils.admission import AdmissionController, KeyQuota
+
+
+AdmissionStage = Literal["crawl", "translate"]
+
+
+@functools.cache
+def get_admission_controller(stage: AdmissionStage) -> AdmissionController | None:
+    """Returns the process-wide admission controller of a stage, or `None` when admission control is disabled."""
+
+    admission_settings = settings.admission
+    if not admission_settings.enable:
+        return None
+
+    if stage == "crawl":
+        limit, max_queue = admission_settings.crawl_limit, admission_settings.crawl_queue
+    else:
+        limit, max_queue = admission_settings.translate_limit, admission_settings.translate_queue
+    return AdmissionController(stage, limit, max_queue, admission_settings.max_wait_seconds)
+
+
+@functools.cache
+def get_key_quota() -> KeyQuota | None:
+    admission_settings = settings.admission
+    if not admission_settings.enable:
+        return None
+
+    return KeyQuota(admission_settings.key_concurrency, admission_settings.key_limits)
+
+
+@asynccontextmanager
+async def admit(stage: AdmissionStage) -> AsyncIterator[None]:
+    """Holds a slot of the stage for the duration of the block, raises `AdmissionRejected` when there's none left."""
+
+    controller = get_admission_controller(stage)
+    if controller is None:
+        yield
+        return
+
+    async with controller.slot():
+        yield
+
+
+def get_admission_stats() -> dict:
+    stats = {}
+    for stage in ("crawl", "translate"):
+        controller = get_admission_controller(stage)
+        if controller is not None:
+            stats[stage] = controller.stats()
+
+    key_quota = get_key_quota()
+    if key_quota is not None:
+        stats["keys"] = key_quota.stats()
+    return stats
+
+
+def get_client_key(connection: HTTPConnection) -> str:
+    """Identifies the client for per-key quotas by its API key header when the key is a configured one, or else its
+    address. The header isn't authenticated otherwise, a client sending a new key on every request would get a new
+    quota each time."""
+
+    admission_settings = settings.admission
+    api_key = connection.headers.get(admission_settings.key_header)
+    if api_key and (api_key in admission_settings.api_keys or api_key in admission_settings.key_limits):
+        return api_key
+    return connection.client.host if connection.client else "unknown"
@@ -0,0 +1,44 @@
+import functools
+
+from app.config.app_settings import settings
+from app.utils.artifacts import ArtifactStore
+from app.utils.cache import InMemorySharedCache, LRUCache, RedisSharedCache, SharedCache, TieredCache
+
+
+def create_shared_cache(redis_url: str | None) -> SharedCache | None:
+    """A client of the shared tier at `redis_url`, `memory://` for the in-process stand-in."""
+
+    if redis_url == "memory://":
+        return InMemorySharedCache()
+    if redis_url:
+        return RedisSharedCache(redis_url)
+    return None
+
+
+@functools.cache
+def get_translation_cache() -> TieredCache | None:
+    """Returns the process-wide cache of translation lookups, or `None` when caching is disabled."""
+
+    cache_settings = settings.cache
+    if not cache_settings.enable:
+        return None
+
+    shared = create_shared_cache(cache_settings.redis_url)
+    local = LRUCache(max_bytes=cache_settings.max_bytes, ttl=cache_settings.ttl_seconds)
+    return TieredCache(
+        local,
+        shared,
+        shared_ttl=cache_settings.shared_ttl_seconds,
+        channel=cache_settings.invalidation_channel,
+    )
+
+
+@functools.cache
+def get_artifact_store() -> ArtifactStore | None:
+    """Returns the crawl artifact store, or `None` when it's disabled."""
+
+    crawler_settings = settings.crawler
+    if not crawler_settings.artifact_enable:
+        return None
+
+    return ArtifactStore(crawler_settings.artifact_folder, crawler_settings.artifact_max_bytes)
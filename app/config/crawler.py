@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import time
+
+from app.config.app_settings import settings
+from app.config.logger import logger
+
+
+class CrawlerPool:
+    """A browser kept running for the lifetime of a crawling process, every crawl opens its own page in it.
+
+    Launching Chromium takes seconds and a lot of memory, so it's started once at startup in the background and
+    readiness reports it as warm once it's up. Until then, or when it fails to start, crawls launch their own browser.
+    A failed launch is retried with backoff and a browser that crashed is launched again, so readiness recovers.
+    """
+
+    def __init__(self):
+        self.crawler = None
+        self.started_at: float | None = None
+        self.error: str | None = None
+        # failed launches since the browser was last up
+        self.failures = 0
+        self._lock = asyncio.Lock()
+        self._warm_task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        if self.crawler is None or not self.crawler.ready:
+            return False
+
+        # the browser may have crashed or been killed since it started
+        browser_manager = getattr(self.crawler.crawler_strategy, "browser_manager", None)
+        browser = getattr(browser_manager, "browser", None)
+        return browser is None or browser.is_connected()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.crawler is not None:
+                return
+
+            # crawl4ai pulls in Playwright, only import it in processes that crawl
+            from crawl4ai import AsyncWebCrawler
+
+            start = time.perf_counter()
+            crawler = AsyncWebCrawler()
+            try:
+                await crawler.start()
+            except Exception as ex:
+                self.error = str(ex)
+                self.failures += 1
+                logger.error("Failed to start the shared browser", error=self.error, failures=self.failures)
+                await self._close(crawler)
+                return
+
+            self.crawler = crawler
+            self.started_at = time.time()
+            self.error = None
+            self.failures = 0
+            logger.info("Shared browser started", seconds=round(time.perf_counter() - start, 2))
+
+    async def _close(self, crawler) -> None:
+        try:
+            await crawler.close()
+        except Exception as ex:
+            logger.warning("Failed to close the shared browser", error=str(ex))
+
+    async def _restart_if_disconnected(self) -> None:
+        async with self._lock:
+            if self.crawler is None or self.ready:
+                return
+
+            logger.warning("Shared browser disconnected, launching it again")
+            crawler = self.crawler
+            self.crawler = None
+            self.started_at = None
+            await self._close(crawler)
+
+    async def _keep_warm(self) -> None:
+        crawler_settings = settings.crawler
+        while True:
+            await self._restart_if_disconnected()
+            await self.start()
+            if self.crawler is not None:
+                delay = crawler_settings.browser_check_seconds
+            else:
+                delay = min(
+                    crawler_settings.browser_retry_base_seconds * 2 ** (self.failures - 1),
+                    crawler_settings.browser_retry_max_seconds,
+                )
+            await asyncio.sleep(delay)
+
+    def warm(self) -> None:
+        """Starts the browser in the background, so the process can answer liveness probes in the meantime, and keeps
+        it running: failed launches are retried and a crashed browser is launched again."""
+
+        if self._warm_task is None:
+            self._warm_task = asyncio.create_task(self._keep_warm())
+
+    async def stop(self) -> None:
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            self._warm_task = None
+
+        async with self._lock:
+            if self.crawler is not None:
+                await self.crawler.close()
+                self.crawler = None
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "started_at": self.started_at, "error": self.error, "failures": self.failures}
+
+
+@functools.cache
+def get_crawler_pool() -> CrawlerPool | None:
+    """Returns the process-wide shared browser, or `None` when every crawl launches its own."""
+
+    if not settings.crawler.shared_browser:
+        return None
+
+    return CrawlerPool()
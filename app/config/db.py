@@ -1,40 +1,184 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
-from sqlalchemy import text, CursorResult
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import functools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Iterator
+
+import asyncpg
+from sqlalchemy import event, make_url, text, CursorResult, URL
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.config.app_settings import settings
+from app.config.cache import create_shared_cache
 from app.config.logger import logger
+from app.utils.db_routing import ReplicaSet, RoutingSession
+
+
+# client of the request being handled, the key read-your-writes stickiness is tracked by
+_client_key: ContextVar[str | None] = ContextVar("db_client_key", default=None)
+
+
+def _engine_url(url: str) -> URL:
+    return (
+        make_url(url)
+        .set(drivername="postgresql+asyncpg")
+        .update_query_dict({"prepared_statement_cache_size": str(settings.db.prepared_statement_cache_size)})
+    )
+
+
+def _connect_args() -> dict:
+    return {"server_settings": {"timezone": "UTC"}, "statement_cache_size": settings.db.statement_cache_size}
+
+
+def _create_engine(url: str, **kwargs) -> AsyncEngine:
+    return create_async_engine(
+        _engine_url(url),
+        pool_size=settings.db.pool_size,
+        max_overflow=settings.db.max_overflow,
+        pool_timeout=30,
+        pool_recycle=1800,
+        echo=False,
+        pool_pre_ping=True,
+        **kwargs,
+    )
+
+
+# the engine is created on first use (or explicitly by `init_db` at startup) instead of at import time
+@functools.cache
+def get_async_engine() -> AsyncEngine:
+    return _create_engine(settings.db.async_url, connect_args=_connect_args())
+
+
+def _create_replica_engine(url: str, index: int, replica_set: ReplicaSet) -> AsyncEngine:
+    replica_dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    primary_dsn = make_url(settings.db.async_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def connect() -> asyncpg.Connection:
+        if not replica_set.is_down(index):
+            try:
+                return await asyncpg.connect(
+                    replica_dsn, timeout=settings.db.replica_connect_timeout_seconds, **_connect_args()
+                )
+            except (OSError, TimeoutError, asyncpg.PostgresError) as ex:
+                logger.warning("Failed to connect to replica, reading from the primary", replica=index, error=str(ex))
+                replica_set.mark_down(index)
+
+        # the read that asked for the connection still succeeds, later sessions skip the replica while it's down
+        connection = await asyncpg.connect(primary_dsn, **_connect_args())
+        replica_set.fallback_connections.add(connection)
+        return connection
+
+    engine = _create_engine(url, async_creator=connect)
+    event.listen(engine.sync_engine, "checkout", functools.partial(replica_set.check_out, index))
+    return engine
+
+
+@functools.cache
+def get_replica_set() -> ReplicaSet | None:
+    """The process-wide replica engines, or `None` when no replicas are configured."""
+
+    db_settings = settings.db
+    if not db_settings.replica_urls:
+        return None
+
+    # stickiness is shared through the cache's Redis-compatible tier, so it holds across worker processes
+    shared = create_shared_cache(settings.cache.redis_url)
+    replica_set = ReplicaSet(db_settings.replica_retry_seconds, db_settings.sticky_seconds, shared)
+    for index, url in enumerate(db_settings.replica_urls):
+        replica_set.add(_create_replica_engine(url.get_secret_value(), index, replica_set))
+    return replica_set
+
 
+@functools.cache
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(
+        bind=get_async_engine(),
+        class_=AsyncSession,
+        # routes the reads of read sessions to a replica, see `get_async_session`
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,  # Keeps objects alive across commits
+    )
 
-async_engine = create_async_engine(
-    settings.db.async_url,
-    pool_size=3,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
-    echo=False,
-    pool_pre_ping=True,
-    connect_args={"server_settings": {"timezone": "UTC"}},
-)
-AsyncSessionLocal = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,  # Keeps objects alive across commits
-)
+
+def init_db() -> None:
+    get_session_factory()
+    get_replica_set()
+    logger.debug("Database engine initialized")
+
+
+async def dispose_db() -> None:
+    if get_replica_set.cache_info().currsize:
+        replica_set = get_replica_set()
+        if replica_set is not None:
+            for engine in replica_set.engines:
+                await engine.dispose()
+            if replica_set.shared is not None:
+                await replica_set.shared.close()
+        get_replica_set.cache_clear()
+
+    if get_async_engine.cache_info().currsize == 0:
+        return
+
+    await get_async_engine().dispose()
+    get_session_factory.cache_clear()
+    get_async_engine.cache_clear()
+
+
+@contextmanager
+def db_client_context(client_key: str) -> Iterator[None]:
+    """Attributes the sessions of the block to a client: a client whose writes were committed reads from the primary
+    for `DB_STICKY_SECONDS`."""
+
+    token = _client_key.set(client_key)
+    try:
+        yield
+    finally:
+        _client_key.reset(token)
+
+
+async def _route_reads(session: AsyncSession) -> None:
+    replica_set = get_replica_set()
+    if replica_set is None:
+        return
+
+    client_key = _client_key.get()
+    if client_key is not None and await replica_set.is_sticky(client_key):
+        return
+
+    replica = replica_set.choose()
+    if replica is not None:
+        session.info["replica"] = replica
+
+
+async def _mark_writer() -> None:
+    replica_set = get_replica_set()
+    client_key = _client_key.get()
+    if replica_set is not None and client_key is not None:
+        await replica_set.mark_writer(client_key)
+
+
+def uses_replica(session: AsyncSession) -> bool:
+    """Whether the session's reads so far went to a replica, e.g. to look for a missing row on the primary."""
+    return session.info.get("replica") is not None and not session.info.get("primary")
 
 
 @asynccontextmanager
-async def get_async_session(auto_commit: bool = True) -> AsyncGenerator[AsyncSession]:
-    async with AsyncSessionLocal() as session:
+async def get_async_session(auto_commit: bool = True, read_only: bool = False) -> AsyncGenerator[AsyncSession]:
+    """A session on the primary. With `read_only`, its reads go to a replica when any are configured, until it
+    writes, see `RoutingSession`. Only use it where reading slightly stale data is fine."""
+
+    async with get_session_factory()() as session:
         session: AsyncSession
+        if read_only:
+            await _route_reads(session)
         try:
             yield session
             if auto_commit:
                 await session.commit()
+                if session.info.get("primary"):
+                    await _mark_writer()
         except Exception as ex:
             logger.error("Error during database session execution", error=str(ex))
             await session.rollback()
@@ -48,6 +192,13 @@ async def get_async_session_dependency(auto_commit: bool = True) -> AsyncGenerat
         yield session  # Ensures the session is properly managed
 
 
+async def get_read_session_dependency() -> AsyncGenerator[AsyncSession]:
+    """Session of read-only routes, reading from a replica when any are configured."""
+
+    async with get_async_session(read_only=True) as session:
+        yield session
+
+
 async def test_db_connection():
     async with get_async_session() as session:
         result: CursorResult = await session.execute(text("SELECT 1"))
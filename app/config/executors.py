@@ -0,0 +1,24 @@
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config.app_settings import settings
+
+
+@functools.cache
+def get_process_pool() -> ProcessPoolExecutor:
+    """Returns the process pool running CPU bound work (Markdown post-processing) off the event loop, started on
+    first use."""
+
+    # spawn instead of fork, forking a process running an event loop and the log sink thread isn't safe
+    return ProcessPoolExecutor(
+        max_workers=settings.workers.postprocess_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def shutdown_process_pool() -> None:
+    if get_process_pool.cache_info().currsize == 0:
+        return
+
+    get_process_pool().shutdown(wait=True, cancel_futures=True)
+    get_process_pool.cache_clear()
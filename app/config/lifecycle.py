@@ -0,0 +1,72 @@
+import asyncio
+
+from app.config.access import get_access_counter
+from app.config.cache import get_artifact_store, get_translation_cache
+from app.config.crawler import get_crawler_pool
+from app.config.db import dispose_db, init_db
+from app.config.executors import shutdown_process_pool
+from app.config.logger import configure_logger
+from app.config.telemetry import configure_telemetry
+from app.config.usage import get_usage_recorder
+
+
+async def startup(warm_crawler: bool = False) -> None:
+    """Initializes logging, telemetry, the database engine and the read cache. Shared by the API and CLI. Processes
+    that crawl also start warming the shared browser."""
+
+    configure_logger()
+    configure_telemetry()
+    init_db()
+
+    translation_cache = get_translation_cache()
+    if translation_cache is not None:
+        await translation_cache.start()
+
+    access_counter = get_access_counter()
+    if access_counter is not None:
+        await access_counter.start()
+
+    usage_recorder = get_usage_recorder()
+    if usage_recorder is not None:
+        await usage_recorder.start()
+
+    crawler_pool = get_crawler_pool() if warm_crawler else None
+    if crawler_pool is not None:
+        crawler_pool.warm()
+
+
+async def shutdown() -> None:
+    if get_access_counter.cache_info().currsize:
+        access_counter = get_access_counter()
+        if access_counter is not None:
+            # write the reads counted since the last flush
+            await access_counter.stop()
+        get_access_counter.cache_clear()
+
+    if get_usage_recorder.cache_info().currsize:
+        usage_recorder = get_usage_recorder()
+        if usage_recorder is not None:
+            # write the calls made since the last flush
+            await usage_recorder.stop()
+        get_usage_recorder.cache_clear()
+
+    if get_crawler_pool.cache_info().currsize:
+        crawler_pool = get_crawler_pool()
+        if crawler_pool is not None:
+            await crawler_pool.stop()
+        get_crawler_pool.cache_clear()
+
+    translation_cache = get_translation_cache()
+    if translation_cache is not None:
+        await translation_cache.stop()
+        get_translation_cache.cache_clear()
+
+    # only close the store if this process opened it
+    if get_artifact_store.cache_info().currsize:
+        artifact_store = get_artifact_store()
+        if artifact_store is not None:
+            artifact_store.close()
+        get_artifact_store.cache_clear()
+
+    await asyncio.to_thread(shutdown_process_pool)
+    await dispose_db()
@@ -1,13 +1,189 @@
+import atexit
+import queue
+import random
 import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, TextIO
+
 from loguru import logger
 from app.config.app_settings import settings
 
 
-# remove previous log handler to keep only our custom handler
-logger.remove(0)
+# records at or above this level are always logged, regardless of sampling
+UNSAMPLED_LEVEL_NO = logger.level("WARNING").no
+
+# whether the current request was picked for logging, decided once per request so its records are kept or dropped
+# together
+_request_sampled: ContextVar[bool] = ContextVar("request_sampled", default=True)
+_sink: "BatchedSink | None" = None
+
+
+class lazy:
+    """Defers building an expensive log payload until a record using it is actually formatted by a sink.
+
+    >>> logger.debug("Crawled page", content=lazy(lambda: str(result.markdown)))
+    """
+
+    __slots__ = ("factory",)
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+
+    def __str__(self) -> str:
+        return str(self.factory())
+
+    def __repr__(self) -> str:
+        return repr(self.factory())
+
+
+class _Truncated:
+    """Wraps a record's extra value, capping its formatted size. Formatting is only done if a sink emits the record."""
+
+    __slots__ = ("_value", "_max_length")
+
+    def __init__(self, value: Any, max_length: int):
+        self._value = value
+        self._max_length = max_length
+
+    def _format(self, formatter: Callable[[Any], str]) -> str:
+        value = self._value.factory() if isinstance(self._value, lazy) else self._value
+
+        # slice long strings before formatting them, repr of a whole document is expensive
+        if isinstance(value, str) and len(value) > self._max_length:
+            truncated_chars = len(value) - self._max_length
+            return f"{formatter(value[: self._max_length])}...<{truncated_chars} chars truncated>"
+
+        text = formatter(value)
+        if len(text) <= self._max_length:
+            return text
+        return f"{text[: self._max_length]}...<{len(text) - self._max_length} chars truncated>"
+
+    def __str__(self) -> str:
+        return self._format(str)
+
+    def __repr__(self) -> str:
+        return self._format(repr)
+
+
+class BatchedSink:
+    """Writes formatted messages to a stream from a background thread, in batches, so request handlers never block
+    on the underlying write."""
+
+    def __init__(self, stream: TextIO, batch_size: int, flush_interval: float):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        self._queue.put(message)
+
+    def stop(self) -> None:
+        """Writes pending messages and stops the writer thread."""
+
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                message = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            stopping = message is None
+            if not stopping:
+                batch.append(message)
+
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    stopping = True
+                else:
+                    batch.append(message)
+
+            if batch:
+                self.stream.write("".join(batch))
+                self.stream.flush()
+            if stopping:
+                return
+
+
+def is_sampled(route: str) -> bool:
+    """Decides whether a request to the route is logged below WARNING, using the longest matching route prefix in
+    `LOGGER_SAMPLE_RATES`."""
+
+    sample_rates = settings.logger.sample_rates
+    matches = [prefix for prefix in sample_rates if route.startswith(prefix)]
+    if not matches:
+        return True
+
+    rate = sample_rates[max(matches, key=len)]
+    return rate >= 1 or random.random() < rate
+
+
+@contextmanager
+def request_log_context(route: str):
+    """Tags records logged within the block with the route and applies the route's sample rate to them."""
+
+    token = _request_sampled.set(is_sampled(route))
+    try:
+        with logger.contextualize(route=route):
+            yield
+    finally:
+        _request_sampled.reset(token)
+
+
+def _sampling_filter(record: dict) -> bool:
+    return record["level"].no >= UNSAMPLED_LEVEL_NO or _request_sampled.get()
+
+
+def _truncate_extra(record: dict) -> None:
+    max_length = settings.logger.max_field_length
+    extra = record["extra"]
+    for key, value in extra.items():
+        if not isinstance(value, (int, float, bool, type(None))):
+            extra[key] = _Truncated(value, max_length)
+
+
+def configure_logger(stream: TextIO = sys.stderr) -> None:
+    """Replaces loguru's default handler with our custom handler, safe to call more than once."""
+
+    global _sink
+
+    # remove previous log handlers to keep only our custom handler
+    logger.remove()
+    if _sink is not None:
+        _sink.stop()
+
+    logger_settings = settings.logger
+    _sink = BatchedSink(stream, logger_settings.batch_size, logger_settings.flush_interval_seconds)
+    logger.configure(patcher=_truncate_extra)
+    logger.add(
+        sink=_sink.write,
+        level=logger_settings.level,
+        # the JSON record already carries every field, keep its text short
+        format="{message}" if logger_settings.serialize else logger_settings.format,
+        colorize=logger_settings.colorize and not logger_settings.serialize,
+        serialize=logger_settings.serialize,
+        enqueue=logger_settings.enqueue,
+        filter=_sampling_filter,
+    )
+
+    logger.debug("Logger configured successfully")
 
-# Add the custom logger handler
-logger_settings = settings.logger.model_dump()
-res = logger.add(sink=sys.stderr, **logger_settings)
 
-logger.debug("Logger configured successfully")
+@atexit.register
+def flush_logger() -> None:
+    if _sink is not None:
+        _sink.stop()
@@ -1,12 +1,44 @@
 import datetime as dt
 
-from sqlalchemy import ForeignKey, Integer, String, DateTime, func
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import Mapped, relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.dialects.postgresql import JSONB
 
+from app.utils.compression import compress_text, decompress_text
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as `bytea`, zstd compressed when enabled in settings and decoded transparently on access."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect) -> bytes | None:
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value: bytes | None, dialect) -> str | None:
+        if value is None:
+            return None
+        return decompress_text(value)
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
@@ -17,9 +49,17 @@ class CrawledData(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     url: Mapped[str] = mapped_column(String(255), nullable=False, index=True, unique=True)
-    content: Mapped[str | None] = mapped_column(String, nullable=False, default="")
+    # shared by all spellings of the URL, see `canonicalize_url`. Unset for rows that duplicated another row's page
+    # before the column existed, those are only found by their exact URL
+    canonical_url: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True, unique=True)
+    content: Mapped[str | None] = mapped_column(CompressedText, nullable=False, default="")
     # attribute name 'metadata' is reserved by sqlalchemy
     crawled_metadata: Mapped[dict | None] = mapped_column(JSONB, name="metadata", nullable=True)
+    # reads of the translation, counted in memory and flushed in batches, ranks pages for pre-translation
+    access_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0", index=True)
+    last_accessed_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # MinHash signature of the content, near-duplicate pages are found through its bands in `content_lsh_band`
+    content_minhash: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
     created_date: Mapped[dt.datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -33,7 +73,7 @@ class CrawledData(Base):
 
     def __repr__(self) -> str:
         content = self.content[:50] + "..." if isinstance(self.content, str) else self.content
-        return f"CrawledData(id={self.id}, url={self.url}, markdown={content}, metadata={self.crawled_metadata}, created_date={self.created_date}, updated_date={self.updated_date})"
+        return f"CrawledData(id={self.id}, url={self.url}, canonical_url={self.canonical_url}, markdown={content}, metadata={self.crawled_metadata}, created_date={self.created_date}, updated_date={self.updated_date})"
 
     @property
     def metadata_column(self) -> str:
@@ -61,11 +101,18 @@ class CrawledData(Base):
 
 class AiTranslationOutput(Base):
     __tablename__ = "ai_translation_output_data"
+    __table_args__ = (Index("ix_ai_translation_output_data_crawled_data_id_language", "crawled_data_id", "language"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     crawled_data_id: Mapped[int] = mapped_column(ForeignKey("crawled_data.id"))
     language: Mapped[str] = mapped_column(String(255), nullable=False)
-    content: Mapped[str] = mapped_column(String, nullable=False, default="")
+    content: Mapped[str] = mapped_column(CompressedText, nullable=False, default="")
+    # content rendered to HTML once by the post-processing stage, for the feed
+    html_content: Mapped[str | None] = mapped_column(CompressedText, nullable=True)
+    # Atom `<entry>` of the translation, rendered when it's saved so language feeds only concatenate stored entries
+    feed_fragment: Mapped[str | None] = mapped_column(CompressedText, nullable=True)
+    # name of the Markdown file saved in the output folder, served by `/files/markdown/{name}`
+    file_name: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
     # attribute name 'metadata' is reserved by sqlalchemy
     ai_metadata: Mapped[dict | None] = mapped_column(JSONB, name="metadata", nullable=True)
     created_date: Mapped[dt.datetime] = mapped_column(
@@ -84,3 +131,147 @@ class AiTranslationOutput(Base):
     @property
     def metadata_column(self) -> str:
         return "ai_metadata"
+
+
+class AiTranslationOutputEncoding(Base):
+    """Precompressed HTTP content encodings of a translation, so hot documents are only compressed once."""
+
+    __tablename__ = "ai_translation_output_encoding"
+    __table_args__ = (UniqueConstraint("translation_output_id", "encoding"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    translation_output_id: Mapped[int] = mapped_column(
+        ForeignKey("ai_translation_output_data.id", ondelete="CASCADE"), nullable=False
+    )
+    encoding: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_date: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"AiTranslationOutputEncoding(id={self.id}, translation_output_id={self.translation_output_id}, encoding={self.encoding}, size={len(self.content)}, created_date={self.created_date})"
+
+
+class TranslationJob(Base):
+    """Durable queue entry moving a translate request through the crawl and translate stage workers."""
+
+    __tablename__ = "translation_job"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    url: Mapped[str] = mapped_column(String(255), nullable=False)
+    language: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    # request options such as the output title and cache flag
+    options: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    crawled_data_id: Mapped[int | None] = mapped_column(ForeignKey("crawled_data.id"), nullable=True)
+    translation_output_id: Mapped[int | None] = mapped_column(
+        ForeignKey("ai_translation_output_data.id"), nullable=True
+    )
+    # set when a worker claims the job, a job whose lease expired is picked up again by another worker
+    locked_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_date: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_date: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"TranslationJob(id={self.id}, url={self.url}, language={self.language}, status={self.status}, attempts={self.attempts}, crawled_data_id={self.crawled_data_id}, translation_output_id={self.translation_output_id}, created_date={self.created_date}, updated_date={self.updated_date})"
+
+
+class WebhookDelivery(Base):
+    """Outbox entry of a webhook to deliver, written in the same transaction as the event it reports so no event is
+    lost or sent for a rolled back change. Delivery workers send it and retry with backoff until it's delivered or runs
+    out of attempts."""
+
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (Index("ix_webhook_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event: Mapped[str] = mapped_column(String(64), nullable=False)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    response_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    locked_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    delivered_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_date: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_date: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"WebhookDelivery(id={self.id}, event={self.event}, url={self.url}, status={self.status}, attempts={self.attempts}, next_attempt_at={self.next_attempt_at}, response_status={self.response_status}, created_date={self.created_date}, updated_date={self.updated_date})"
+
+
+class ContentLshBand(Base):
+    """LSH bucket of one band of a crawled page's MinHash signature. Pages sharing a bucket in any band are candidate
+    near-duplicates, looked up through the primary key so finding them doesn't scan the table."""
+
+    __tablename__ = "content_lsh_band"
+
+    band: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    crawled_data_id: Mapped[int] = mapped_column(
+        ForeignKey("crawled_data.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"ContentLshBand(band={self.band}, bucket={self.bucket}, crawled_data_id={self.crawled_data_id})"
+
+
+class LlmUsage(Base):
+    """Ledger entry of a single LLM call, written in batches off the request path."""
+
+    __tablename__ = "llm_usage"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    crawled_data_id: Mapped[int | None] = mapped_column(
+        ForeignKey("crawled_data.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    language: Mapped[str] = mapped_column(String(255), nullable=False)
+    # host of the crawled URL, empty when the call wasn't for a crawled page
+    domain: Mapped[str] = mapped_column(String(255), nullable=False)
+    model: Mapped[str] = mapped_column(String(255), nullable=False)
+    requests: Mapped[int] = mapped_column(Integer, nullable=False)
+    request_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    response_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    cached_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    # time of the call, not of the batched write
+    created_date: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"LlmUsage(id={self.id}, crawled_data_id={self.crawled_data_id}, language={self.language}, domain={self.domain}, model={self.model}, request_tokens={self.request_tokens}, response_tokens={self.response_tokens}, latency_ms={self.latency_ms}, created_date={self.created_date})"
+
+
+class LlmUsageDaily(Base):
+    """Daily rollup of `llm_usage` per model, language and domain, incremented in the transaction writing each batch
+    of ledger entries so reports never scan the ledger."""
+
+    __tablename__ = "llm_usage_daily"
+
+    day: Mapped[dt.date] = mapped_column(Date, primary_key=True)
+    model: Mapped[str] = mapped_column(String(255), primary_key=True)
+    language: Mapped[str] = mapped_column(String(255), primary_key=True)
+    domain: Mapped[str] = mapped_column(String(255), primary_key=True)
+    calls: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    requests: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    request_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    response_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    cached_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    latency_ms: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"LlmUsageDaily(day={self.day}, model={self.model}, language={self.language}, domain={self.domain}, calls={self.calls}, request_tokens={self.request_tokens}, response_tokens={self.response_tokens})"
@@ -0,0 +1,28 @@
+import functools
+
+from app.config.app_settings import settings
+from app.config.logger import logger
+
+
+def configure_telemetry() -> None:
+    # logfire pulls in the OpenTelemetry SDK, only import it when telemetry is enabled
+    if not settings.logfire.enable:
+        return
+
+    import logfire
+
+    logfire.configure(token=settings.logfire.token.get_secret_value())
+    logger.debug("enabled Logfire telemetry")
+
+
+@functools.cache
+def instrument_openai() -> None:
+    """Instruments the OpenAI client, called when the first agent is created so the SDK is only imported when a
+    translation actually happens."""
+
+    if not settings.logfire.enable:
+        return
+
+    import logfire
+
+    logfire.instrument_openai()
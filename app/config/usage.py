@@ -0,0 +1,25 @@
+import functools
+
+from app.config.app_settings import settings
+from app.config.db import get_async_session
+from app.repositories.app import LlmUsageRepository
+from app.utils.usage import UsageRecord, UsageRecorder
+
+
+async def flush_usage_records(records: list[UsageRecord]) -> None:
+    repository = LlmUsageRepository()
+    async with get_async_session() as session:
+        await repository.add_batch(records, session)
+
+
+@functools.cache
+def get_usage_recorder() -> UsageRecorder | None:
+    """Returns the process-wide buffer of LLM usage records, or `None` when usage isn't recorded."""
+
+    usage_settings = settings.usage
+    if not usage_settings.enable:
+        return None
+
+    return UsageRecorder(
+        flush_usage_records, usage_settings.flush_seconds, usage_settings.batch_size, usage_settings.max_buffered
+    )
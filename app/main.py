@@ -1,45 +1,117 @@
 import asyncio
-import time
+import sys
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
-import logfire
 
+from app.config.admission import get_admission_stats
 from app.config.db import get_async_session
+from app.config.lifecycle import startup, shutdown
 from app.config.logger import logger
-from app.services.app import save_translated_content, get_or_crawl_url, get_or_translate_content
+from app.services.app import (
+    get_or_crawl_url,
+    get_or_translate_content,
+    index_unindexed_content,
+    save_translated_content,
+)
 from app.config.app_settings import settings
-from app.api import feed, app as app_api
-
-
-# TODO: move this and future instrumentation logic to config module
-if settings.logfire.enable:
-    logfire.configure(token=settings.logfire.token.get_secret_value())
-    logfire.instrument_openai()
-
-    # sleep to avoid interrupting user input when logfire emits startup log
-    logger.debug("enabled Logfire telemetry")
-    time.sleep(2)
+from app.schemas.app import ExportFilters, ExportFormat
+from app.services.export import export_data, parquet_available
+from app.services.webhooks import webhooks_configured
+from app.api import feed, files, health, app as app_api
+from app.api.middleware import CompressionMiddleware, DbClientMiddleware, LogContextMiddleware
+from app.utils.admission import AdmissionRejected
 
 
 async def translate(url: str, name: str = "", cache: bool = True):
     """CLI translation handler using common service logic"""
+    await startup()
     try:
         async with get_async_session() as session:
             crawled_data, _ = await get_or_crawl_url(url, session, cache)
-            translated_content = await get_or_translate_content(crawled_data, session)
+            translation = await get_or_translate_content(crawled_data, session)
 
             name = name if name else crawled_data.title
-            await save_translated_content(crawled_data.id, name, translated_content)
+            await save_translated_content(
+                crawled_data.id,
+                name,
+                translation["content"],
+                source_content=crawled_data.content,
+                metadata=translation["metadata"],
+            )
             logger.info("Translation completed", url=url)
     except ValueError as exc:
         logger.error("Translation failed", url=url, error=str(exc))
         raise
+    finally:
+        await shutdown()
+
+
+async def index_content():
+    """CLI handler indexing pages crawled before near-duplicate detection"""
+    await startup()
+    try:
+        indexed = await index_unindexed_content()
+        logger.info("Content indexing completed", indexed=indexed)
+    finally:
+        await shutdown()
+
+
+async def export(path: str, export_format: ExportFormat, filters: ExportFilters):
+    """CLI handler streaming an export to a file, or to stdout for `-`"""
+    await startup()
+    try:
+        output = sys.stdout.buffer if path == "-" else open(path, "wb")
+        try:
+            async for chunk in export_data(filters, export_format):
+                await asyncio.to_thread(output.write, chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            else:
+                output.flush()
+        logger.info("Export completed", path=path, format=export_format)
+    finally:
+        await shutdown()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # API processes only crawl when they handle requests inline
+    await startup(warm_crawler=settings.workers.mode == "inline")
+    scheduler_task = None
+    scheduler_stop_event = asyncio.Event()
+    if settings.scheduler.enable:
+        from app.services.scheduler import run_scheduler_loop
+
+        scheduler_task = asyncio.create_task(run_scheduler_loop(scheduler_stop_event))
+    webhooks_task = None
+    webhooks_stop_event = asyncio.Event()
+    if webhooks_configured() and settings.webhooks.api_concurrency:
+        from app.services.workers import deliver_webhooks
+
+        webhooks_task = asyncio.create_task(deliver_webhooks(settings.webhooks.api_concurrency, webhooks_stop_event))
+
+    yield
+
+    # both loops finish their running work before the database and the process pool are shut down under them,
+    # claimed deliveries are finished and unclaimed ones stay in the outbox for the next process
+    scheduler_stop_event.set()
+    webhooks_stop_event.set()
+    await asyncio.gather(*(task for task in (scheduler_task, webhooks_task) if task is not None))
+    await shutdown()
 
 
 # TODO: clean up the main module
-app = FastAPI(default_response_class=ORJSONResponse)
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression.response_min_size)
+app.add_middleware(LogContextMiddleware)
+if settings.db.replica_urls:
+    app.add_middleware(DbClientMiddleware)
+app.include_router(health.router)
 app.include_router(feed.router)
+app.include_router(files.router)
 app.include_router(app_api.router)
 
 
@@ -53,18 +125,91 @@ async def internal_server_error(request, exc: Exception):
     )
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request, exc: AdmissionRejected):
+    """fast rejection of requests over capacity, clients and load balancers retry after the given delay"""
+    logger.warning("Request rejected", path=request.url.path, status=exc.status_code, reason=exc.reason)
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/")
 def healthcheck():
-    return {"status": "ok"}
+    """`saturated` with a 503 once a stage's wait queue is full, so load balancers route around this instance"""
+    admission = get_admission_stats()
+    saturated = any(stats.get("saturated") for stats in admission.values())
+    return ORJSONResponse(
+        status_code=503 if saturated else 200,
+        content={"status": "saturated" if saturated else "ok", "admission": admission},
+    )
 
 
 if __name__ == "__main__":
     import argparse
+    import datetime as dt
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("url", type=str, help="URL to crawl")
+    parser.add_argument("url", type=str, nargs="?", help="URL to crawl")
     parser.add_argument("--name", type=str, help="Name for output file (leave empty for page title)", default="")
     parser.add_argument("--cache", action="store_true", help="Enable caching")
+    parser.add_argument(
+        "--run",
+        choices=["all", "api", "crawler", "translator", "webhooks", "scheduler"],
+        help="Run the pipeline as stage workers connected by the job queue instead of translating a single URL",
+    )
+    parser.add_argument("--api-workers", type=int, default=settings.workers.api_workers)
+    parser.add_argument("--crawl-workers", type=int, default=settings.workers.crawl_workers, help="Browser processes")
+    parser.add_argument(
+        "--translate-workers", type=int, default=settings.workers.translate_workers, help="Concurrent LLM calls"
+    )
+    parser.add_argument(
+        "--webhook-workers", type=int, default=settings.webhooks.concurrency, help="Concurrent webhook deliveries"
+    )
+    parser.add_argument(
+        "--index-content", action="store_true", help="Index pages crawled before near-duplicate detection and exit"
+    )
+    parser.add_argument(
+        "--export", type=str, metavar="PATH", help="Export crawls and translations to PATH (- for stdout) and exit"
+    )
+    parser.add_argument("--export-format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--since", type=dt.datetime.fromisoformat, help="Only export pages crawled at or after")
+    parser.add_argument("--until", type=dt.datetime.fromisoformat, help="Only export pages crawled before")
+    parser.add_argument("--language", type=str, help="Only export pages translated into the language")
+    parser.add_argument("--domain", type=str, help="Only export pages of the domain or its subdomains")
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
 
     args = parser.parse_args()
-    asyncio.run(translate(args.url, args.name, args.cache))
+    if args.run:
+        from app.services.workers import run_topology
+
+        # only run the workers of the selected stage, e.g. to scale stages as separate containers
+        api_workers = args.api_workers if args.run in ("all", "api") else 0
+        crawl_workers = args.crawl_workers if args.run in ("all", "crawler") else 0
+        translate_workers = args.translate_workers if args.run in ("all", "translator") else 0
+        # `all` only starts the webhook worker when webhooks are configured
+        run_webhooks = args.run == "webhooks" or (args.run == "all" and settings.webhooks.secret is not None)
+        webhook_workers = args.webhook_workers if run_webhooks else 0
+        run_topology(
+            api_workers,
+            crawl_workers,
+            translate_workers,
+            args.host,
+            args.port,
+            webhook_workers,
+            scheduler=args.run == "scheduler",
+        )
+    elif args.index_content:
+        asyncio.run(index_content())
+    elif args.export:
+        if args.export_format == "parquet" and not parquet_available():
+            parser.error("Parquet exports need the `export` extra (pyarrow) installed")
+        filters = ExportFilters(since=args.since, until=args.until, language=args.language, domain=args.domain)
+        asyncio.run(export(args.export, args.export_format, filters))
+    elif args.url:
+        asyncio.run(translate(args.url, args.name, args.cache))
+    else:
+        parser.error("either a URL or --run is required")
@@ -1,13 +1,39 @@
-from typing import ClassVar, TypeVar, Generic
+import datetime as dt
+import re
+from typing import AsyncIterator, ClassVar, TypeVar, Generic
 
-from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import func, select
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import BigInteger, and_, bindparam, cast, delete, exists, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import DeclarativeBase, selectinload
 
-from app.config.models import CrawledData, AiTranslationOutput
+from app.config.logger import lazy, logger
+from app.config.models import (
+    ContentLshBand,
+    CrawledData,
+    AiTranslationOutput,
+    AiTranslationOutputEncoding,
+    LlmUsage,
+    LlmUsageDaily,
+    TranslationJob,
+    WebhookDelivery,
+)
 from app.config.db import AsyncSession
-from app.schemas.app import CrawledDataCreate, CrawledDataUpdate, AiTranslationOutputCreate, AiTranslationOutputUpdate
+from app.schemas.app import (
+    CrawledDataCreate,
+    CrawledDataUpdate,
+    ExportFilters,
+    AiTranslationOutputCreate,
+    AiTranslationOutputUpdate,
+    AiTranslationOutputEncodingCreate,
+    AiTranslationOutputEncodingUpdate,
+    LlmUsageCreate,
+    TranslationJobCreate,
+    TranslationJobUpdate,
+    WebhookDeliveryCreate,
+    WebhookDeliveryUpdate,
+)
+from app.utils.usage import USAGE_METRICS, UsageRecord, rollup_usage
 
 
 ModelType = TypeVar("ModelType", bound=DeclarativeBase)
@@ -60,7 +86,7 @@ class AppRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if hasattr(data, "metadata"):
             metadata_column = db_record.metadata_column
             setattr(db_record, metadata_column, data.metadata)
-        logger.debug("created model object", model=db_record, class_name=self.__class__.__name__)
+        logger.debug("created model object", model=lazy(lambda: repr(db_record)), class_name=self.__class__.__name__)
 
         session.add(db_record)
         await session.flush()
@@ -116,8 +142,361 @@ class AppRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 class CrawledDataRepository(AppRepository[CrawledData, CrawledDataCreate, CrawledDataUpdate]):
     model = CrawledData
 
+    async def get_by_url(self, url: str, canonical_url: str, session: S) -> CrawledData | None:
+        """Crawled data of the exact URL, or else of any URL sharing its canonical URL."""
+
+        query = (
+            select(self.model)
+            .where(or_(self.model.url == url, self.model.canonical_url == canonical_url))
+            .order_by((self.model.url == url).desc(), self.model.id)
+            .limit(1)
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def list_with_translation(self, session: S, skip: int = 0, limit: int = 100) -> list[CrawledData]:
+        """Crawled data with their translation loaded in the same round trip, newest first."""
+
+        query = (
+            select(self.model)
+            .options(selectinload(self.model.translation_output))
+            .order_by(self.model.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def add_access_counts(self, counts: dict[int, int], session: S) -> None:
+        """Adds batched read counts to the crawled data in a single executemany round trip."""
+
+        if not counts:
+            return
+
+        table = self.model.__table__
+        query = (
+            update(table)
+            .where(table.c.id == bindparam("crawled_data_id"))
+            .values(
+                access_count=table.c.access_count + bindparam("count"),
+                last_accessed_at=func.now(),
+                # reads don't change the page, `updated_date` tells when it was last crawled
+                updated_date=table.c.updated_date,
+            )
+        )
+        await session.execute(query, [{"crawled_data_id": id, "count": count} for id, count in counts.items()])
+
+    async def list_most_accessed(self, since: dt.datetime, session: S, limit: int = 20) -> list[CrawledData]:
+        """Crawled data read since the given time, most read first."""
+
+        query = (
+            select(self.model)
+            .where(self.model.access_count > 0, self.model.last_accessed_at >= since)
+            .order_by(self.model.access_count.desc())
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def stream_export(self, filters: ExportFilters, session: S, batch_size: int = 500) -> AsyncIterator[list]:
+        """Crawled data joined with their translations, streamed in batches through a server-side cursor so memory
+        use doesn't grow with the table. Only the exported columns are loaded, without building ORM objects."""
+
+        translation = AiTranslationOutput
+        query = select(
+            self.model.id.label("crawled_data_id"),
+            self.model.url,
+            self.model.canonical_url,
+            self.model.content.label("crawled_content"),
+            self.model.crawled_metadata.label("crawled_metadata"),
+            self.model.created_date.label("crawled_date"),
+            translation.id.label("translation_output_id"),
+            translation.language,
+            translation.content.label("translation_content"),
+            translation.ai_metadata.label("translation_metadata"),
+            translation.created_date.label("translated_date"),
+        )
+        join_condition = translation.crawled_data_id == self.model.id
+        if filters.language is not None:
+            query = query.join(translation, and_(join_condition, translation.language == filters.language))
+        else:
+            query = query.outerjoin(translation, join_condition)
+
+        if filters.since is not None:
+            query = query.where(self.model.created_date >= filters.since)
+        if filters.until is not None:
+            query = query.where(self.model.created_date < filters.until)
+        if filters.domain is not None:
+            domain = re.escape(filters.domain.lower().removeprefix("www."))
+            pattern = rf"^https?://([^/@]+\.)?{domain}(:[0-9]+)?(/|\?|#|$)"
+            query = query.where(self.model.url.regexp_match(pattern, "i"))
+
+        query = query.order_by(self.model.id, translation.id).execution_options(yield_per=batch_size)
+        result = await session.stream(query)
+        async for partition in result.mappings().partitions():
+            yield partition
+
+    async def save_minhash(self, crawled_data_id: int, signature: bytes, buckets: list[int], session: S) -> None:
+        """Stores the MinHash signature of the crawled data and indexes it under the LSH bucket of each band."""
+
+        table = self.model.__table__
+        query = (
+            update(table)
+            .where(table.c.id == crawled_data_id)
+            # indexing doesn't change the page, `updated_date` tells when it was last crawled
+            .values(content_minhash=signature, updated_date=table.c.updated_date)
+        )
+        await session.execute(query)
+
+        await session.execute(delete(ContentLshBand).where(ContentLshBand.crawled_data_id == crawled_data_id))
+        rows = [
+            {"band": band, "bucket": bucket, "crawled_data_id": crawled_data_id} for band, bucket in enumerate(buckets)
+        ]
+        await session.execute(insert(ContentLshBand), rows)
+
+    async def list_unindexed(self, session: S, limit: int = 100) -> list[CrawledData]:
+        """Crawled data without a MinHash signature, oldest first."""
+
+        query = select(self.model).where(self.model.content_minhash.is_(None)).order_by(self.model.id).limit(limit)
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def list_lsh_candidates(
+        self, buckets: list[int], language: str, exclude_id: int, session: S, limit: int = 5
+    ) -> list[CrawledData]:
+        """Crawled data sharing an LSH bucket with the given ones and translated into the language, most shared
+        bands first. Each band is an index lookup on the band table's primary key."""
+
+        candidates = (
+            select(ContentLshBand.crawled_data_id, func.count().label("shared_bands"))
+            .where(
+                tuple_(ContentLshBand.band, ContentLshBand.bucket).in_(list(enumerate(buckets))),
+                ContentLshBand.crawled_data_id != exclude_id,
+            )
+            .group_by(ContentLshBand.crawled_data_id)
+            .subquery()
+        )
+        translated = exists().where(
+            AiTranslationOutput.crawled_data_id == self.model.id, AiTranslationOutput.language == language
+        )
+        query = (
+            select(self.model)
+            .join(candidates, candidates.c.crawled_data_id == self.model.id)
+            .where(self.model.content_minhash.is_not(None), translated)
+            .order_by(candidates.c.shared_bands.desc(), self.model.id)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
 
 class AiTranslationOutputRepository(
     AppRepository[AiTranslationOutput, AiTranslationOutputCreate, AiTranslationOutputUpdate]
 ):
     model = AiTranslationOutput
+
+    async def get_translation(
+        self, crawled_data_id: int, language: str | None, session: S
+    ) -> AiTranslationOutput | None:
+        """Newest translation of the crawled data into the language, re-translations are added as new rows. Without a
+        language, the newest one in the language it was first translated into, so adding other languages doesn't
+        change what's served by default."""
+
+        query = select(self.model).where(self.model.crawled_data_id == crawled_data_id)
+        if language is None:
+            first_language = (
+                select(self.model.language)
+                .where(self.model.crawled_data_id == crawled_data_id)
+                .order_by(self.model.id)
+                .limit(1)
+                .scalar_subquery()
+            )
+            query = query.where(self.model.language == first_language)
+        else:
+            query = query.where(self.model.language == language)
+        query = query.order_by(self.model.id.desc()).limit(1)
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def list_languages(self, crawled_data_ids: list[int], session: S) -> dict[int, set[str]]:
+        """Languages each of the crawled data is translated into."""
+
+        query = (
+            select(self.model.crawled_data_id, self.model.language)
+            .where(self.model.crawled_data_id.in_(crawled_data_ids))
+            .distinct()
+        )
+        result = await session.execute(query)
+
+        languages: dict[int, set[str]] = {id: set() for id in crawled_data_ids}
+        for crawled_data_id, language in result.all():
+            languages[crawled_data_id].add(language)
+        return languages
+
+    async def get_by_file_name(self, file_name: str, session: S) -> AiTranslationOutput | None:
+        """Newest translation saved to the file, a file saved again under the same name is overwritten."""
+
+        query = select(self.model).where(self.model.file_name == file_name).order_by(self.model.id.desc()).limit(1)
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def list_feed_entries(self, language: str, session: S, limit: int = 50) -> list[tuple[int, dt.datetime]]:
+        """Id and creation time of the newest translation of each crawled page into the language, newest first."""
+
+        newest = (
+            select(func.max(self.model.id).label("id"))
+            .where(self.model.language == language)
+            .group_by(self.model.crawled_data_id)
+            .subquery()
+        )
+        query = (
+            select(self.model.id, self.model.created_date)
+            .join(newest, newest.c.id == self.model.id)
+            .order_by(self.model.id.desc())
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def get_feed_fragments(self, ids: list[int], session: S) -> dict[int, str | None]:
+        """Stored feed entries of the translations, without loading their content."""
+
+        result = await session.execute(select(self.model.id, self.model.feed_fragment).where(self.model.id.in_(ids)))
+        return dict(result.all())
+
+    async def list_with_crawled_data(self, ids: list[int], session: S) -> list[AiTranslationOutput]:
+        query = select(self.model).options(selectinload(self.model.crawled_data)).where(self.model.id.in_(ids))
+        result = await session.execute(query)
+        return result.scalars().all()
+
+
+class AiTranslationOutputEncodingRepository(
+    AppRepository[AiTranslationOutputEncoding, AiTranslationOutputEncodingCreate, AiTranslationOutputEncodingUpdate]
+):
+    model = AiTranslationOutputEncoding
+
+
+class TranslationJobRepository(AppRepository[TranslationJob, TranslationJobCreate, TranslationJobUpdate]):
+    model = TranslationJob
+
+    async def claim(
+        self, pending_status: str, running_status: str, lease_seconds: int, session: S
+    ) -> TranslationJob | None:
+        """Claims the oldest job waiting in the pending status, or whose lease in the running status expired.
+        `SKIP LOCKED` lets concurrent workers claim different jobs without blocking each other."""
+
+        lease_expiry = func.now() - dt.timedelta(seconds=lease_seconds)
+        query = (
+            select(self.model)
+            .where(
+                or_(
+                    self.model.status == pending_status,
+                    and_(self.model.status == running_status, self.model.locked_at < lease_expiry),
+                )
+            )
+            .order_by(self.model.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(query)
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+
+        job.status = running_status
+        job.locked_at = func.now()
+        job.attempts += 1
+        await session.flush()
+        await session.refresh(job)
+        return job
+
+    async def renew_lease(self, id: int, running_status: str, attempts: int, session: S) -> bool:
+        """Extends the lease of a running job, as long as it's still held by the claim that made `attempts`. Returns
+        whether it was."""
+
+        query = (
+            update(self.model)
+            .where(self.model.id == id, self.model.status == running_status, self.model.attempts == attempts)
+            .values(locked_at=func.now())
+        )
+        result = await session.execute(query)
+        return result.rowcount > 0
+
+
+class WebhookDeliveryRepository(AppRepository[WebhookDelivery, WebhookDeliveryCreate, WebhookDeliveryUpdate]):
+    model = WebhookDelivery
+
+    async def claim(
+        self, pending_status: str, running_status: str, lease_seconds: int, session: S
+    ) -> WebhookDelivery | None:
+        """Claims the oldest delivery due for an attempt, or whose lease in the running status expired, the same way
+        `TranslationJobRepository.claim` does."""
+
+        lease_expiry = func.now() - dt.timedelta(seconds=lease_seconds)
+        query = (
+            select(self.model)
+            .where(
+                or_(
+                    and_(self.model.status == pending_status, self.model.next_attempt_at <= func.now()),
+                    and_(self.model.status == running_status, self.model.locked_at < lease_expiry),
+                )
+            )
+            .order_by(self.model.next_attempt_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(query)
+        delivery = result.scalar_one_or_none()
+        if delivery is None:
+            return None
+
+        delivery.status = running_status
+        delivery.locked_at = func.now()
+        delivery.attempts += 1
+        await session.flush()
+        await session.refresh(delivery)
+        return delivery
+
+
+# ledger entries are never updated
+class LlmUsageRepository(AppRepository[LlmUsage, LlmUsageCreate, BaseModel]):
+    model = LlmUsage
+
+    async def add_batch(self, records: list[UsageRecord], session: S) -> None:
+        """Appends a batch of usage records to the ledger in one executemany round trip, and adds them to the daily
+        rollup with a single upsert in the same transaction."""
+
+        if not records:
+            return
+
+        await session.execute(insert(self.model), records)
+
+        # a fixed row order keeps concurrent flushes from deadlocking on the rollup rows
+        rows = sorted(rollup_usage(records), key=lambda row: (row["day"], row["model"], row["language"], row["domain"]))
+        query = pg_insert(LlmUsageDaily).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=[LlmUsageDaily.day, LlmUsageDaily.model, LlmUsageDaily.language, LlmUsageDaily.domain],
+            set_={
+                column: getattr(LlmUsageDaily, column) + getattr(query.excluded, column)
+                for column in ("calls", *USAGE_METRICS)
+            },
+        )
+        await session.execute(query)
+
+    async def summarize(self, since: dt.date, until: dt.date, group_by: list[str], session: S) -> list[dict]:
+        """Usage summed from the daily rollup between the days (both included), per the given dimensions."""
+
+        dimensions = [getattr(LlmUsageDaily, dimension) for dimension in group_by]
+        # sums of bigints are numeric in Postgres, cast them back so they aren't loaded as `Decimal`
+        metrics = [
+            cast(func.sum(getattr(LlmUsageDaily, column)), BigInteger).label(column)
+            for column in ("calls", *USAGE_METRICS)
+        ]
+        query = (
+            select(*dimensions, *metrics)
+            .where(LlmUsageDaily.day >= since, LlmUsageDaily.day <= until)
+            .group_by(*dimensions)
+            .order_by(*dimensions)
+        )
+        result = await session.execute(query)
+        return [dict(row._mapping) for row in result.all()]
@@ -1,5 +1,6 @@
-from typing import Annotated, TypedDict
-from pydantic import AfterValidator, AnyHttpUrl, BaseModel, Field
+import datetime as dt
+from typing import Annotated, Literal, TypedDict
+from pydantic import AfterValidator, AnyHttpUrl, BaseModel, ConfigDict, Field
 
 
 # check whether string is valid URL then convert it back to string for usage in the app
@@ -9,6 +10,7 @@ UrlString = Annotated[str, AfterValidator(lambda v: str(AnyHttpUrl(v)))]
 # Service-DB Interface schemas
 class CrawledDataCreate(BaseModel):
     url: str
+    canonical_url: str | None = Field(None)
     content: str = Field("")
     metadata: dict | None = Field(None)
 
@@ -24,6 +26,9 @@ class AiTranslationOutputCreate(BaseModel):
     crawled_data_id: int
     language: str
     content: str = Field("")
+    html_content: str | None = Field(None)
+    feed_fragment: str | None = Field(None)
+    file_name: str | None = Field(None)
     metadata: dict | None = Field(None)
 
 
@@ -35,6 +40,104 @@ class AiTranslationOutputUpdate(BaseModel):
     metadata: dict | None = Field(None)
 
 
+class AiTranslationOutputEncodingCreate(BaseModel):
+    translation_output_id: int
+    encoding: str
+    content: bytes
+
+
+class AiTranslationOutputEncodingUpdate(BaseModel):
+    id: int
+    translation_output_id: int
+    encoding: str
+    content: bytes
+
+
+class TranslationJobCreate(BaseModel):
+    url: str
+    language: str
+    status: str
+    options: dict = Field(default_factory=dict)
+
+
+class TranslationJobUpdate(BaseModel):
+    status: str | None = Field(None)
+    error: str | None = Field(None)
+    crawled_data_id: int | None = Field(None)
+    translation_output_id: int | None = Field(None)
+
+
+class WebhookDeliveryCreate(BaseModel):
+    event: str
+    url: str
+    payload: dict = Field(default_factory=dict)
+    status: str
+
+
+class WebhookDeliveryUpdate(BaseModel):
+    status: str | None = Field(None)
+    error: str | None = Field(None)
+    response_status: int | None = Field(None)
+
+
+class LlmUsageCreate(BaseModel):
+    crawled_data_id: int | None = Field(None)
+    language: str
+    domain: str = Field("")
+    model: str
+    requests: int = Field(1)
+    request_tokens: int = Field(0)
+    response_tokens: int = Field(0)
+    cached_tokens: int = Field(0)
+    latency_ms: int = Field(0)
+
+
+# rows of a bulk export, crawls created in the date range, with their translations into the language
+class ExportFilters(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    since: dt.datetime | None = Field(None)
+    until: dt.datetime | None = Field(None)
+    # only crawls translated into the language, otherwise every crawl with all of its translations, if any
+    language: str | None = Field(None)
+    # host of the crawled URL, subdomains included
+    domain: str | None = Field(None)
+
+
+ExportFormat = Literal["ndjson", "parquet"]
+
+
+# how a single crawl request uses caches and extracts Markdown, immutable so it can't be changed under a running crawl
+class CrawlPolicy(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    # read previously crawled pages instead of fetching them again
+    cache: bool = Field(True)
+    # let crawl4ai keep its own copy of fetched pages, not needed when the artifact store is used
+    crawler_cache: bool = Field(True)
+    pruning_threshold: float = Field(0.6)
+
+    @property
+    def extraction_params(self) -> str:
+        """Key of the settings affecting Markdown extraction, Markdown extracted with the same key is reusable."""
+        return f"pruning_threshold={self.pruning_threshold}"
+
+
+# a model's translation along with metadata to store with it, such as its quality report
+class TranslationResult(TypedDict):
+    content: str
+    metadata: dict | None
+
+
+# cached read model of a translation, kept as plain data so it can be serialized into the cache tiers
+class TranslationSnapshot(TypedDict):
+    crawled_data_id: int
+    translation_output_id: int
+    content: str
+    translation_metadata: dict | None
+    crawled_metadata: dict | None
+
+
 # Base API schemas
 class ErrorResponseSchema(TypedDict):
     message: str
@@ -49,6 +152,9 @@ class BaseResponse(BaseModel):
 
 # API schemas
 
+# `markdown` returns the stored content as-is instead of wrapping it in a JSON envelope
+ResponseFormat = Literal["json", "markdown"]
+
 
 class TranslateRequestInput(BaseModel):
     url: UrlString = Field(...)
@@ -59,6 +165,10 @@ class TranslateRequestInput(BaseModel):
         description="Title of the content to be saved to disk. Automatically computed if not passed when saving file.",
     )
     cache: bool = Field(True, description="Allow crawler to cache the page. Default: True")
+    callback_url: UrlString | None = Field(
+        None,
+        description="URL receiving a signed webhook once the translation is saved (or its job failed). Default: None",
+    )
 
 
 # NOTE: Experimental kinda "pattern", also avoiding creating more modules than needed right now
@@ -70,3 +180,15 @@ class _TranslateResponseData(TypedDict):
 
 class TranslateResponse(BaseResponse):
     data: _TranslateResponseData
+
+
+class _JobResponseData(TypedDict):
+    job_id: int
+    status: str
+    crawled_data_id: int | None
+    translation_output_id: int | None
+    error: str | None
+
+
+class JobResponse(BaseResponse):
+    data: _JobResponseData
@@ -1,7 +1,15 @@
 from datetime import datetime
 from pydantic import BaseModel
 from xml.dom.minidom import Document
-from typing import Optional
+from xml.sax.saxutils import escape, quoteattr
+from typing import Optional, TypedDict
+
+
+# what a language feed contains, known before any entry is loaded so conditional requests are answered cheaply
+class FeedVersion(TypedDict):
+    entry_ids: list[int]
+    etag: str
+    last_modified: datetime | None
 
 
 class AtomItem(BaseModel):
@@ -13,6 +21,25 @@ class AtomItem(BaseModel):
     author: Optional[str] = None
     content: Optional[str] = None
 
+    def to_fragment(self) -> str:
+        """The `<entry>` element as an XML string, rendered once and stored so feeds are built by concatenating
+        fragments."""
+
+        parts = [
+            "<entry>",
+            f"<title>{escape(self.title)}</title>",
+            f"<summary>{escape(self.summary)}</summary>",
+            f"<link href={quoteattr(self.link)}/>",
+            f"<id>{escape(self.id)}</id>",
+            f"<updated>{self.updated.isoformat()}</updated>",
+        ]
+        if self.author:
+            parts.append(f"<author><name>{escape(self.author)}</name></author>")
+        if self.content:
+            parts.append(f'<content type="html">{escape(self.content)}</content>')
+        parts.append("</entry>")
+        return "".join(parts)
+
 
 class AtomFeed(BaseModel):
     title: str
@@ -96,3 +123,21 @@ class AtomFeed(BaseModel):
                 entry_elem.appendChild(content_elem)
 
         return doc.toprettyxml(indent="  ", encoding="utf-8")
+
+    def to_xml_with_fragments(self, fragments: list[str]) -> bytes:
+        """The feed with pre-rendered entry fragments in place of `entries`, without building a DOM."""
+
+        parts = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            '<feed xmlns="http://www.w3.org/2005/Atom">',
+            f"<title>{escape(self.title)}</title>",
+            f"<subtitle>{escape(self.subtitle)}</subtitle>",
+            f"<link href={quoteattr(self.link)}/>",
+            f"<id>{escape(self.id)}</id>",
+            f"<updated>{self.updated.isoformat()}</updated>",
+        ]
+        if self.author:
+            parts.append(f"<author><name>{escape(self.author)}</name></author>")
+        parts.extend(fragments)
+        parts.append("</feed>")
+        return "\n".join(parts).encode()
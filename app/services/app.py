@@ -1,13 +1,51 @@
+import asyncio
+import datetime as dt
+import time
 from pathlib import Path
 
+import orjson
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config.access import get_access_counter
+from app.config.admission import admit
 from app.config.app_settings import settings
-from app.config.db import AsyncSession, get_async_session
-from app.config.logger import logger
+from app.config.cache import get_artifact_store, get_translation_cache
+from app.config.crawler import get_crawler_pool
+from app.config.db import AsyncSession, get_async_session, uses_replica
+from app.config.executors import get_process_pool
+from app.config.logger import lazy, logger
 from app.config.models import AiTranslationOutput, CrawledData
-from app.repositories.app import AiTranslationOutputRepository, CrawledDataRepository
-from app.schemas.app import AiTranslationOutputCreate, CrawledDataCreate
-from app.utils.ai import create_agent, get_agent_prompt
-from app.utils.crawler import crawl_url
+from app.repositories.app import (
+    AiTranslationOutputEncodingRepository,
+    AiTranslationOutputRepository,
+    CrawledDataRepository,
+)
+from app.schemas.app import (
+    AiTranslationOutputCreate,
+    AiTranslationOutputEncodingCreate,
+    CrawledDataCreate,
+    CrawlPolicy,
+    TranslationResult,
+    TranslationSnapshot,
+)
+from app.services.feed import render_feed_fragment
+from app.services.usage import record_usage
+from app.services.webhooks import WebhookEvent, enqueue_webhook, get_translation_url
+from app.utils.artifacts import ArtifactStore, StoredPage
+from app.utils.compression import encode_content
+from app.utils.files import resolve_within, write_with_precompressed
+from app.utils.markdown import (
+    PostprocessResult,
+    QualityReport,
+    postprocess_translation,
+    reuse_sections,
+    score_section,
+    strip_wrapping_fence,
+    verify_translation,
+)
+from app.utils.urls import canonicalize_url, normalize_url
 
 
 S = AsyncSession
@@ -18,45 +56,296 @@ async def get_crawled_data(id: int, session: S) -> CrawledData | None:
     return await repository.get(id, session)
 
 
-async def get_crawled_data_by_url(url: str, session: S) -> CrawledData | None:
-    """Get crawled data for the given URL, if it exists and is not older than the specified number of days."""
+def get_translation_cache_key(crawled_data_id: int, language: str | None = None) -> str:
+    if language is None:
+        return f"translation:{crawled_data_id}"
+    return f"translation:{crawled_data_id}:{language}"
+
+
+def record_access(crawled_data_id: int) -> None:
+    """Counts a read of the crawled data's translation, ranking it for pre-translation into extra languages."""
+
+    access_counter = get_access_counter()
+    if access_counter is not None:
+        access_counter.record(crawled_data_id)
+
+
+async def get_translation_output(
+    crawled_data_id: int, session: S, language: str | None = None
+) -> AiTranslationOutput | None:
+    """Newest translation of the crawled data into the language, or when none is given, the newest translation in
+    the language it was first translated into."""
+
+    repository = AiTranslationOutputRepository()
+    return await repository.get_translation(crawled_data_id, language, session)
+
+
+async def get_translation_snapshot(
+    crawled_data_id: int, session: S, language: str | None = None
+) -> TranslationSnapshot | None:
+    """Get the translation of the crawled data along with its metadata, served from the read cache when possible.
+    Returns `None` if either the crawled data or its translation doesn't exist."""
+
+    cache = get_translation_cache()
+    cache_key = get_translation_cache_key(crawled_data_id, language)
+    if cache is not None:
+        cached_snapshot = await cache.get(cache_key)
+        if cached_snapshot is not None:
+            return orjson.loads(cached_snapshot)
+
+    crawled_data = await get_crawled_data(crawled_data_id, session)
+    if not crawled_data:
+        return None
+
+    translation_output = await get_translation_output(crawled_data_id, session, language)
+    if not translation_output:
+        return None
+
+    snapshot = TranslationSnapshot(
+        crawled_data_id=crawled_data.id,
+        translation_output_id=translation_output.id,
+        content=translation_output.content,
+        translation_metadata=translation_output.ai_metadata,
+        crawled_metadata=crawled_data.crawled_metadata,
+    )
+    # a lagging replica may still return the translation a new one replaced, caching it would serve it for the whole
+    # cache TTL instead of the replication lag
+    if cache is not None and not uses_replica(session):
+        await cache.set(cache_key, orjson.dumps(snapshot))
+
+    return snapshot
+
+
+async def get_crawled_data_by_url(url: str, session: S, canonical_url: str | None = None) -> CrawledData | None:
+    """Get crawled data for the given URL, matching any spelling of it with the same canonical URL."""
 
     repository = CrawledDataRepository()
-    filters = {"url": url}
-    return await repository.get_by_filter(session, **filters)
+    return await repository.get_by_url(url, canonical_url or canonicalize_url(url), session)
+
+
+def get_crawl_policy(cache: bool = True) -> CrawlPolicy:
+    """Crawl policy of a request, crawl4ai's own cache is skipped when the artifact store keeps the pages."""
+
+    return CrawlPolicy(
+        cache=cache,
+        crawler_cache=get_artifact_store() is None,
+        pruning_threshold=settings.crawler.pruning_threshold,
+    )
+
 
+async def extract_stored_markdown(
+    store: ArtifactStore, page: StoredPage, url: str, pruning_threshold: float
+) -> str | None:
+    """Markdown of a stored page with the given pruning threshold, extracted from its stored HTML if needed.
+    Returns `None` if the page's artifacts have been evicted."""
 
-async def crawl_single_url(url: str, session: S, cache: bool = True) -> CrawledData | None:
-    """Crawls a URL and saves its content and metadata to the database."""
+    params = CrawlPolicy(pruning_threshold=pruning_threshold).extraction_params
+    markdown = await asyncio.to_thread(store.get_markdown, page.cleaned_html_hash, params)
+    if markdown is not None:
+        return markdown
 
-    result = await crawl_url(url, cache)
+    cleaned_html = await asyncio.to_thread(store.read, page.cleaned_html_hash)
+    if cleaned_html is None:
+        return None
+
+    from app.utils.crawler import extract_markdown
+
+    markdown = await asyncio.to_thread(extract_markdown, cleaned_html.decode(), url, pruning_threshold)
+    await asyncio.to_thread(store.put_markdown, page.cleaned_html_hash, params, markdown)
+    return markdown
+
+
+async def crawl_page(url: str, policy: CrawlPolicy) -> tuple[str, dict | None] | None:
+    """Get the Markdown content and metadata of a page, from the artifact store when the policy allows it or by
+    fetching it otherwise. Fetched pages are saved to the store either way."""
+
+    store = get_artifact_store()
+    url_key = normalize_url(url)
+    if store is not None and policy.cache:
+        page = await asyncio.to_thread(store.get_page, url_key)
+        if page is not None:
+            content = await extract_stored_markdown(store, page, url, policy.pruning_threshold)
+            if content:
+                logger.info("Found stored crawl artifacts", url=url, fetched_at=page.fetched_at)
+                return content, page.metadata
+
+    # crawl4ai pulls in Playwright, only import it once a crawl actually happens
+    from app.utils.crawler import crawl_url, extract_canonical_link
+
+    crawler_pool = get_crawler_pool()
+    crawler = crawler_pool.crawler if crawler_pool is not None and crawler_pool.ready else None
+    async with admit("crawl"):
+        result = await crawl_url(url, policy, crawler)
     if not result:
         return None
-    content = result.markdown
-    if not content:
+    markdown = result.markdown
+    if not markdown:
         return None
 
-    repository = CrawledDataRepository()
-    content = content.fit_markdown if content.fit_markdown else content
+    content = str(markdown.fit_markdown if markdown.fit_markdown else markdown)
+    metadata = dict(result.metadata or {})
+    canonical_link = extract_canonical_link(result.html)
+    if canonical_link:
+        metadata["canonical"] = canonical_link
+
+    if store is not None:
+        page = await asyncio.to_thread(store.put_page, url_key, result.html, result.cleaned_html or "", metadata)
+        await asyncio.to_thread(store.put_markdown, page.cleaned_html_hash, policy.extraction_params, content)
+
+    return content, metadata
+
 
-    logger.debug("Extracted markdown content from URL\n", url=url, content=str(content))
-    logger.debug("Crawled URL metadata", url=url, metadata=result.metadata)
+async def crawl_single_url(url: str, session: S, policy: CrawlPolicy | None = None) -> CrawledData | None:
+    """Crawls a URL and saves its content and metadata to the database. If the page declares a canonical URL that
+    was already crawled under another spelling, that crawled data is returned instead."""
 
-    crawled_data = CrawledDataCreate(url=url, content=content, metadata=result.metadata)
-    crawled_data_record = await repository.add(crawled_data, session)
+    page = await crawl_page(url, policy or get_crawl_policy())
+    if not page:
+        return None
+    content, metadata = page
+
+    canonical_url = canonicalize_url(url, metadata)
+    if canonical_url != canonicalize_url(url):
+        existing_crawled_data = await get_crawled_data_by_url(url, session, canonical_url)
+        if existing_crawled_data:
+            logger.info("Found crawled data of canonical URL", id=existing_crawled_data.id, url=url)
+            return existing_crawled_data
+
+    repository = CrawledDataRepository()
+
+    logger.debug(
+        "Extracted markdown content from URL", url=url, content_length=len(content), content=lazy(lambda: content)
+    )
+    logger.debug("Crawled URL metadata", url=url, metadata=metadata)
+
+    crawled_data = CrawledDataCreate(url=url, canonical_url=canonical_url, content=content, metadata=metadata)
+    try:
+        async with session.begin_nested():
+            crawled_data_record = await repository.add(crawled_data, session)
+    except IntegrityError:
+        # another request crawled a different spelling of the same page concurrently
+        existing_crawled_data = await get_crawled_data_by_url(url, session, canonical_url)
+        if existing_crawled_data is None:
+            raise
+        return existing_crawled_data
 
     await session.flush()
     await session.refresh(crawled_data_record)
+    await index_crawled_content(crawled_data_record, session)
 
     return crawled_data_record
 
 
-async def translate_content(crawled_data: CrawledData, language: str = "Spanish") -> str:
-    prompt = get_agent_prompt(crawled_data.content, language)
-    agent = create_agent(system_prompt=prompt)
-    result = await agent.run(prompt)
-    logger.debug("Usage stats for agent", usage=result.usage())
-    return result.data
+def _add_usage(total: dict, usage: dict) -> dict:
+    added = {**total, **usage}
+    for key in total.keys() & usage.keys() - {"model"}:
+        added[key] = total[key] + usage[key]
+    return added
+
+
+async def run_translation(
+    content: str, language: str = "Spanish", crawled_data: CrawledData | None = None
+) -> tuple[str, dict]:
+    """Translates the content with a single LLM call and returns it along with the call's token usage and latency,
+    which are also recorded in the usage ledger for the crawled page.
+
+    The instructions are the same for every call in a language, so providers can cache them as a prompt prefix, and
+    the document is only sent once, in the user prompt.
+    """
+
+    # pydantic-ai and the OpenAI SDK are slow to import, only load them once a translation actually happens
+    from app.utils.ai import get_translation_agent, get_user_prompt
+
+    agent = get_translation_agent(language)
+    async with admit("translate"):
+        start = time.perf_counter()
+        result = await agent.run(get_user_prompt(content))
+        latency_ms = round((time.perf_counter() - start) * 1000)
+
+    run_usage = result.usage()
+    usage = {
+        "requests": run_usage.requests,
+        "request_tokens": run_usage.request_tokens or 0,
+        "response_tokens": run_usage.response_tokens or 0,
+        "total_tokens": run_usage.total_tokens or 0,
+        "cached_tokens": (run_usage.details or {}).get("cached_tokens", 0),
+        "latency_ms": latency_ms,
+        "model": agent.model.model_name if agent.model else None,
+    }
+    logger.debug("Usage stats for agent", usage=usage)
+    record_usage(usage, language, crawled_data)
+    return result.data, usage
+
+
+async def enforce_translation_quality(
+    source: str, translation: str, language: str, crawled_data: CrawledData | None = None
+) -> tuple[str, QualityReport, dict]:
+    """Verifies a translation section by section and translates only the failing sections again, as long as they
+    aren't most of the document. Retried sections replace the original ones if they score better. Also returns the
+    token usage of the retries."""
+
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    quality_settings = settings.quality
+    report, source_sections, translated_sections = await loop.run_in_executor(
+        pool, verify_translation, source, translation, quality_settings.min_block_ratio
+    )
+
+    usage = {}
+    for _ in range(quality_settings.max_retries):
+        # the text of merged sections is already part of the previous section, a retry would add it twice
+        failed_sections = [index for index in report["failed_sections"] if index not in report["merged_sections"]]
+        if not failed_sections or len(failed_sections) / len(source_sections) > quality_settings.max_retried_share:
+            break
+
+        logger.info("Translating failing sections again", sections=failed_sections, total=len(source_sections))
+        retried = await asyncio.gather(
+            *(run_translation(source_sections[index], language, crawled_data) for index in failed_sections),
+            return_exceptions=True,
+        )
+        for index, retried_result in zip(failed_sections, retried):
+            if isinstance(retried_result, BaseException):
+                logger.warning("Failed to translate section again", section=index, error=str(retried_result))
+                continue
+
+            retried_translation, retry_usage = retried_result
+            usage = _add_usage(usage, retry_usage)
+            retried_translation = strip_wrapping_fence(retried_translation)
+            score = await loop.run_in_executor(
+                pool,
+                score_section,
+                index,
+                source_sections[index],
+                retried_translation,
+                quality_settings.min_block_ratio,
+            )
+            if score["passed"] or not translated_sections[index]:
+                translated_sections[index] = retried_translation
+                report["sections"][index] = score
+
+        report["retried_sections"] = sorted({*report["retried_sections"], *failed_sections})
+        report["failed_sections"] = [score["index"] for score in report["sections"] if not score["passed"]]
+        report["passed"] = not report["failed_sections"]
+
+    if report["failed_sections"]:
+        logger.warning("Translation failed the quality gate", failed_sections=report["failed_sections"])
+
+    content = "\n\n".join(section for section in translated_sections if section)
+    return content, report, usage
+
+
+async def translate_content(crawled_data: CrawledData, language: str = "Spanish") -> TranslationResult:
+    """Translates the crawled content, then verifies the translation and fixes failing sections when the quality gate
+    is enabled."""
+
+    translation, usage = await run_translation(crawled_data.content, language, crawled_data)
+    if not settings.quality.enable:
+        return TranslationResult(content=translation, metadata={"usage": usage})
+
+    content, report, retry_usage = await enforce_translation_quality(
+        crawled_data.content, translation, language, crawled_data
+    )
+    return TranslationResult(content=content, metadata={"quality": report, "usage": _add_usage(usage, retry_usage)})
 
 
 async def get_or_crawl_url(
@@ -73,8 +362,11 @@ async def get_or_crawl_url(
         logger.info("Found existing crawled data", id=crawled_data.id, url=url)
         return crawled_data, False
 
+    # end the read transaction, so the connection goes back to the pool while the page is fetched
+    await session.commit()
+
     # If not found, crawl fresh
-    crawled_data = await crawl_single_url(url, session, cache)
+    crawled_data = await crawl_single_url(url, session, get_crawl_policy(cache))
     if not crawled_data:
         raise ValueError(f"Failed to crawl URL: {url}")
 
@@ -82,22 +374,241 @@ async def get_or_crawl_url(
     return crawled_data, True
 
 
-async def get_or_translate_content(crawled_data: CrawledData, session: S, language: str = "Spanish") -> str:
-    """Get existing translation or translate fresh if not found."""
+async def refresh_crawled_data(crawled_data: CrawledData, session: S) -> bool:
+    """Fetches the page of the crawled data again, bypassing every cache, and stores its new content. Returns whether
+    the content changed, the page is marked as checked either way."""
+
+    page = await crawl_page(crawled_data.url, get_crawl_policy(cache=False))
+    if not page:
+        raise ValueError(f"Failed to crawl URL: {crawled_data.url}")
+    content, metadata = page
 
+    changed = content != crawled_data.content
+    if changed:
+        crawled_data.content = content
+        crawled_data.crawled_metadata = metadata
+    crawled_data.updated_date = func.now()
+    session.add(crawled_data)
+    await session.flush()
     await session.refresh(crawled_data)
+    if changed:
+        await index_crawled_content(crawled_data, session)
+    return changed
+
+
+async def index_crawled_content(crawled_data: CrawledData, session: S) -> None:
+    """Computes the MinHash signature of the crawled content and indexes its LSH bands, so pages with nearly the same
+    content can reuse its translations."""
 
-    translation_output = await crawled_data.awaitable_attrs.translation_output
+    dedup_settings = settings.dedup
+    if not dedup_settings.enable:
+        return
+
+    # numpy is slow to import, only load it once a page is actually indexed
+    from app.utils.minhash import index_content
+
+    loop = asyncio.get_running_loop()
+    signature, buckets = await loop.run_in_executor(
+        get_process_pool(),
+        index_content,
+        crawled_data.content,
+        dedup_settings.num_perm,
+        dedup_settings.shingle_size,
+        dedup_settings.bands,
+    )
+    await CrawledDataRepository().save_minhash(crawled_data.id, signature, buckets, session)
+    # already written, the ORM mustn't flush it again and bump `updated_date`
+    set_committed_value(crawled_data, "content_minhash", signature)
+
+
+async def index_unindexed_content(batch_size: int = 100) -> int:
+    """Indexes the crawled data without a MinHash signature in batches, e.g. pages crawled before near-duplicate
+    detection existed, so their translations can be reused. Returns the number of pages indexed."""
+
+    if not settings.dedup.enable:
+        return 0
+
+    repository = CrawledDataRepository()
+    indexed = 0
+    while True:
+        async with get_async_session() as session:
+            batch = await repository.list_unindexed(session, limit=batch_size)
+            for crawled_data in batch:
+                await index_crawled_content(crawled_data, session)
+
+        indexed += len(batch)
+        logger.info("Indexed crawled content", indexed=indexed)
+        if len(batch) < batch_size:
+            return indexed
+
+
+async def find_near_duplicate(crawled_data: CrawledData, language: str, session: S) -> tuple[CrawledData, float] | None:
+    """Most similar other crawled data already translated into the language, if its estimated similarity reaches
+    `DEDUP_THRESHOLD`. Pages crawled before they were indexed are indexed on first use."""
+
+    from app.utils.minhash import band_buckets, signature_similarity
+
+    dedup_settings = settings.dedup
+    if crawled_data.content_minhash is None:
+        await index_crawled_content(crawled_data, session)
+
+    signature = crawled_data.content_minhash
+    repository = CrawledDataRepository()
+    candidates = await repository.list_lsh_candidates(
+        band_buckets(signature, dedup_settings.bands),
+        language,
+        crawled_data.id,
+        session,
+        limit=dedup_settings.max_candidates,
+    )
+    scored = [(candidate, signature_similarity(signature, candidate.content_minhash)) for candidate in candidates]
+    best = max(scored, key=lambda pair: pair[1], default=None)
+    if best is None or best[1] < dedup_settings.threshold:
+        return None
+
+    return best
+
+
+async def translate_near_duplicate(crawled_data: CrawledData, language: str, session: S) -> TranslationResult | None:
+    """Patches the translation of a near-duplicate page instead of translating from scratch: sections found
+    unchanged in it reuse its translation and only the others are sent to the model, falling back to a full
+    translation when any of them fails. Returns `None` when there's no near-duplicate or none of its sections can be
+    reused. Commits the session before calling the model."""
+
+    if not settings.dedup.enable:
+        return None
+
+    near_duplicate = await find_near_duplicate(crawled_data, language, session)
+    if near_duplicate is None:
+        return None
+
+    similar_crawled_data, similarity = near_duplicate
+    similar_translation = await get_translation_output(similar_crawled_data.id, session, language)
+    # don't hold a pooled connection for the length of the LLM calls
+    await session.commit()
+    if similar_translation is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    source_sections, reused = await loop.run_in_executor(
+        get_process_pool(),
+        reuse_sections,
+        crawled_data.content,
+        similar_crawled_data.content,
+        similar_translation.content,
+    )
+    missing = [index for index, section in enumerate(reused) if section is None]
+    if len(missing) == len(source_sections):
+        return None
+
+    logger.info(
+        "Patching translation of near-duplicate page",
+        id=crawled_data.id,
+        similar_id=similar_crawled_data.id,
+        similarity=similarity,
+        translated_sections=len(missing),
+        total=len(source_sections),
+    )
+    # bounded per page, so a heavily edited page doesn't take every translate slot and queue place at once
+    semaphore = asyncio.Semaphore(settings.dedup.section_concurrency)
+
+    async def translate_section(index: int) -> tuple[str, dict]:
+        async with semaphore:
+            return await run_translation(source_sections[index], language, crawled_data)
+
+    translated = await asyncio.gather(*(translate_section(index) for index in missing), return_exceptions=True)
+    usage = {}
+    failed_sections = []
+    for index, translated_result in zip(missing, translated):
+        if isinstance(translated_result, BaseException):
+            logger.warning("Failed to translate changed section", section=index, error=str(translated_result))
+            failed_sections.append(index)
+            continue
+
+        section, section_usage = translated_result
+        reused[index] = strip_wrapping_fence(section)
+        usage = _add_usage(usage, section_usage)
+
+    if failed_sections:
+        # a page missing sections can't be saved, translate it whole. The tokens already spent count towards it
+        logger.warning("Patching near-duplicate translation failed, translating the page", id=crawled_data.id)
+        translation = await translate_content(crawled_data, language)
+        translation["metadata"]["usage"] = _add_usage(usage, translation["metadata"]["usage"])
+        return translation
+
+    content = "\n\n".join(section for section in reused if section)
+    metadata = {
+        "near_duplicate": {
+            "crawled_data_id": similar_crawled_data.id,
+            "translation_output_id": similar_translation.id,
+            "similarity": similarity,
+            "translated_sections": missing,
+        },
+        "usage": usage,
+    }
+    if settings.quality.enable:
+        content, report, retry_usage = await enforce_translation_quality(
+            crawled_data.content, content, language, crawled_data
+        )
+        metadata["quality"] = report
+        metadata["usage"] = _add_usage(usage, retry_usage)
+
+    return TranslationResult(content=content, metadata=metadata)
+
+
+async def get_or_translate_content(
+    crawled_data: CrawledData, session: S, language: str = "Spanish"
+) -> TranslationResult:
+    """Get existing translation, patch the translation of a near-duplicate page, or translate fresh."""
+
+    translation_output = await get_translation_output(crawled_data.id, session, language)
     if not translation_output:
+        translation = await translate_near_duplicate(crawled_data, language, session)
+        if translation is not None:
+            return translation
+
+        # don't hold a pooled connection for the length of the LLM call
+        await session.commit()
         return await translate_content(crawled_data, language)
 
     logger.info("Found existing translation", id=translation_output.id)
-    return translation_output.content
+    return TranslationResult(content=translation_output.content, metadata=translation_output.ai_metadata)
+
+
+async def postprocess_translated_content(source_content: str, content: str) -> PostprocessResult:
+    """Cleans up, validates and renders a translation in the process pool, keeping the CPU bound work off the event
+    loop."""
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), postprocess_translation, source_content, content)
 
 
 async def save_translated_content(
-    crawled_data_id: int, file_name: str, content: str, language: str = "Spanish", save_to_disk: bool = True
+    crawled_data_id: int,
+    file_name: str,
+    content: str,
+    language: str = "Spanish",
+    save_to_disk: bool = True,
+    source_content: str = "",
+    metadata: dict | None = None,
+    callback_url: str | None = None,
+    callback_data: dict | None = None,
 ) -> tuple[AiTranslationOutput, Path | None]:
+    """Post-processes a translation against its source Markdown, then saves it with its rendered HTML and the
+    validation report in its metadata. With a callback URL, a `translation.completed` webhook carrying
+    `callback_data` is queued in the same transaction."""
+
+    result = await postprocess_translated_content(source_content, content)
+    content = result["content"]
+    report = result["report"]
+    if report["missing_links"] or report["missing_images"]:
+        logger.warning(
+            "Translation is missing links or images of the source",
+            crawled_data_id=crawled_data_id,
+            missing_links=len(report["missing_links"]),
+            missing_images=len(report["missing_images"]),
+        )
+
     output_file_path = None
     if save_to_disk:
         output_folder = Path(settings.general.output_folder)
@@ -106,21 +617,97 @@ async def save_translated_content(
 
         logger.debug("Saving translated content to file", output_file_path=output_file_path)
 
-        with open(output_file_path, "w") as f:
-            # remove markdown codeblock marker
-            content = content.replace("```markdown", "").replace("```md", "").replace("```", "")
-            f.write(content)
-            f.write("\n--------------------------------------\n")
+        # brotli at its best level is slow for large documents, keep it off the event loop
+        file_content = f"{content}\n--------------------------------------\n".encode()
+        await asyncio.to_thread(write_with_precompressed, output_file_path, file_content)
 
     repository = AiTranslationOutputRepository()
     async with get_async_session() as session:
+        # the feed entry is rendered once here, feeds only concatenate the stored entries
+        crawled_data = await get_crawled_data(crawled_data_id, session)
+        feed_fragment = None
+        if crawled_data is not None:
+            now = dt.datetime.now(dt.UTC)
+            feed_fragment = render_feed_fragment(crawled_data, language, content, result["html"], now)
+
         translated_data = AiTranslationOutputCreate(
             crawled_data_id=crawled_data_id,
             language=language,
             content=content,
-            metadata={"output_file_path": str(output_file_path)},
+            html_content=result["html"],
+            feed_fragment=feed_fragment,
+            file_name=output_file_path.name if output_file_path else None,
+            metadata={**(metadata or {}), "output_file_path": str(output_file_path), "postprocess": report},
         )
         translation_output = await repository.add(translated_data, session)
+        if callback_url:
+            webhook_data = {
+                **(callback_data or {}),
+                "crawled_data_id": crawled_data_id,
+                "translation_output_id": translation_output.id,
+                "language": language,
+                "translation_url": get_translation_url(crawled_data_id),
+            }
+            await enqueue_webhook(WebhookEvent.TRANSLATION_COMPLETED, callback_url, webhook_data, session)
+
+    # the session is committed at this point, drop any cached copy of the previous translation
+    cache = get_translation_cache()
+    if cache is not None:
+        await cache.invalidate(get_translation_cache_key(crawled_data_id))
+        await cache.invalidate(get_translation_cache_key(crawled_data_id, language))
 
     logger.debug("Translated content saved successfully", output_file_path=output_file_path)
     return translation_output, output_file_path
+
+
+async def get_saved_file(name: str, session: S) -> Path | None:
+    """Path of a Markdown file saved with a translation, looked up by name in the database instead of the file
+    system. Returns `None` if it isn't known or no longer inside the output folder."""
+
+    repository = AiTranslationOutputRepository()
+    translation_output = await repository.get_by_file_name(name, session)
+    if translation_output is None:
+        return None
+
+    output_file_path = (translation_output.ai_metadata or {}).get("output_file_path")
+    if not output_file_path:
+        return None
+    return resolve_within(Path(settings.general.output_folder), output_file_path)
+
+
+async def get_encoded_translation(translation_output_id: int, content: str, encoding: str, session: S) -> bytes:
+    """Get the translation content compressed with the given HTTP content encoding, compressing it at the best level
+    and storing the variant on first use so hot documents are only compressed once."""
+
+    # translation rows are never updated in place so their encoded variants can be cached without invalidation
+    cache = get_translation_cache()
+    cache_key = f"translation_output:{translation_output_id}:{encoding}"
+    if cache is not None:
+        cached_content = await cache.get(cache_key)
+        if cached_content is not None:
+            return cached_content
+
+    repository = AiTranslationOutputEncodingRepository()
+    filters = {"translation_output_id": translation_output_id, "encoding": encoding}
+    stored_encoding = await repository.get_by_filter(session, **filters)
+    if stored_encoding:
+        # only primary reads fill the cache, like `get_translation_snapshot`
+        if cache is not None and not uses_replica(session):
+            await cache.set(cache_key, stored_encoding.content)
+        return stored_encoding.content
+
+    # high compression levels are slow for large documents, keep them off the event loop
+    encoded_content = await asyncio.to_thread(encode_content, content.encode(), encoding, True)
+    encoded_data = AiTranslationOutputEncodingCreate(
+        translation_output_id=translation_output_id, encoding=encoding, content=encoded_content
+    )
+    try:
+        async with session.begin_nested():
+            await repository.add(encoded_data, session)
+    except IntegrityError:
+        # another worker stored the same variant in the meantime, the content is identical
+        logger.debug("Encoded translation already stored", id=translation_output_id, encoding=encoding)
+
+    if cache is not None and not uses_replica(session):
+        await cache.set(cache_key, encoded_content)
+    return encoded_content
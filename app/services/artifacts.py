@@ -0,0 +1,68 @@
+import asyncio
+
+from app.config.cache import get_artifact_store
+from app.config.db import AsyncSession, get_async_session
+from app.config.logger import configure_logger, logger
+from app.config.models import CrawledData
+from app.services.app import extract_stored_markdown, get_crawled_data
+from app.utils.urls import normalize_url
+
+
+S = AsyncSession
+
+
+async def reextract_crawled_data(crawled_data_id: int, pruning_threshold: float, session: S) -> CrawledData:
+    """Regenerates the Markdown content of crawled data from its stored HTML with another pruning threshold, without
+    fetching the page again. Existing translations of it are kept as they are."""
+
+    store = get_artifact_store()
+    if store is None:
+        raise ValueError("The crawl artifact store is disabled")
+
+    crawled_data = await get_crawled_data(crawled_data_id, session)
+    if crawled_data is None:
+        raise ValueError(f"Crawled data {crawled_data_id} not found")
+
+    page = await asyncio.to_thread(store.get_page, normalize_url(crawled_data.url))
+    content = await extract_stored_markdown(store, page, crawled_data.url, pruning_threshold) if page else None
+    if content is None:
+        raise ValueError(f"No stored artifacts for {crawled_data.url}, crawl it again with caching disabled")
+
+    crawled_data.content = content
+    await session.flush()
+    logger.info(
+        "Re-extracted crawled content",
+        id=crawled_data_id,
+        pruning_threshold=pruning_threshold,
+        content_length=len(content),
+    )
+    return crawled_data
+
+
+async def reextract(crawled_data_ids: list[int], pruning_threshold: float) -> None:
+    async with get_async_session() as session:
+        for crawled_data_id in crawled_data_ids:
+            await reextract_crawled_data(crawled_data_id, pruning_threshold, session)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the crawl artifact store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show the size and contents of the store")
+
+    reextract_parser = subparsers.add_parser(
+        "reextract", help="Regenerate the Markdown of crawled data from stored HTML"
+    )
+    reextract_parser.add_argument("ids", type=int, nargs="+", help="Crawled data ids")
+    reextract_parser.add_argument("--threshold", type=float, required=True, help="Pruning filter threshold")
+
+    args = parser.parse_args()
+    configure_logger()
+    if args.command == "stats":
+        store = get_artifact_store()
+        logger.info("Crawl artifact store", **(store.stats() if store else {"enabled": False}))
+    else:
+        asyncio.run(reextract(args.ids, args.threshold))
@@ -0,0 +1,97 @@
+from sqlalchemy import LargeBinary, Table, bindparam, select, update
+
+from app.config.app_settings import settings
+from app.config.db import AsyncSession, get_async_session
+from app.config.logger import configure_logger, logger
+from app.config.models import AiTranslationOutput, CrawledData
+from app.utils.compression import compress_text, save_dictionary, train_dictionary
+
+
+S = AsyncSession
+
+CONTENT_TABLES: list[Table] = [CrawledData.__table__, AiTranslationOutput.__table__]
+
+
+async def train_content_dictionary(session: S, sample_limit: int = 1000, dict_size: int = 112_640) -> int:
+    """Trains a zstd dictionary over the most recent content rows and saves it to the dictionary folder.
+    Returns the dictionary id, set it as `COMPRESSION_DICTIONARY_ID` to use it for new writes."""
+
+    samples = []
+    for table in CONTENT_TABLES:
+        query = select(table.c.content).order_by(table.c.id.desc()).limit(sample_limit)
+        result = await session.execute(query)
+        samples.extend(result.scalars().all())
+
+    if not samples:
+        raise ValueError("No content rows available to train a dictionary on")
+
+    dictionary = train_dictionary(samples, dict_size)
+    path = save_dictionary(dictionary)
+    logger.info("Trained zstd dictionary", dict_id=dictionary.dict_id(), samples=len(samples), path=str(path))
+    return dictionary.dict_id()
+
+
+async def rewrite_content(table: Table, session: S, compress: bool = True, batch_size: int = 100) -> int:
+    """Re-encodes every content row of the table using the current compression settings, or as plain UTF-8 text
+    when `compress` is false. Rows are processed in id order and committed per batch."""
+
+    rewritten = 0
+    last_id = 0
+    while True:
+        # decoding goes through the column type so both compressed and plain rows are handled
+        query = select(table.c.id, table.c.content).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        rows = (await session.execute(query)).all()
+        if not rows:
+            break
+
+        for row_id, content in rows:
+            value = compress_text(content, force=True) if compress else content.encode()
+            # bind as plain bytes to bypass the column type, the value has already been encoded
+            encoded = bindparam("encoded_content", value, type_=LargeBinary)
+            await session.execute(update(table).where(table.c.id == row_id).values({table.c.content: encoded}))
+
+        await session.commit()
+        rewritten += len(rows)
+        last_id = rows[-1][0]
+        logger.debug("Rewrote content batch", table=table.name, last_id=last_id, rewritten=rewritten)
+
+    return rewritten
+
+
+async def rewrite_all_content(compress: bool = True, batch_size: int = 100) -> None:
+    async with get_async_session() as session:
+        for table in CONTENT_TABLES:
+            rewritten = await rewrite_content(table, session, compress, batch_size)
+            logger.info("Rewrote content rows", table=table.name, rows=rewritten, compressed=compress)
+
+
+async def train(sample_limit: int, dict_size: int) -> None:
+    async with get_async_session() as session:
+        await train_content_dictionary(session, sample_limit, dict_size)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Manage zstd compression of stored content")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="Train a zstd dictionary over existing content")
+    train_parser.add_argument("--samples", type=int, default=1000, help="Rows to sample per table")
+    train_parser.add_argument("--dict-size", type=int, default=112_640, help="Dictionary size in bytes")
+
+    compress_parser = subparsers.add_parser("compress", help="Compress existing content rows")
+    compress_parser.add_argument("--batch-size", type=int, default=100)
+
+    decompress_parser = subparsers.add_parser("decompress", help="Store existing content rows as plain text")
+    decompress_parser.add_argument("--batch-size", type=int, default=100)
+
+    args = parser.parse_args()
+    configure_logger()
+    if args.command == "train":
+        asyncio.run(train(args.samples, args.dict_size))
+    else:
+        if args.command == "compress" and settings.compression.dictionary_id is None:
+            logger.warning("No zstd dictionary configured, compressing without one")
+        asyncio.run(rewrite_all_content(args.command == "compress", args.batch_size))
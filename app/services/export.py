@@ -0,0 +1,127 @@
+import asyncio
+import importlib.util
+from typing import AsyncIterator
+
+import orjson
+
+from app.config.db import get_async_session
+from app.repositories.app import CrawledDataRepository
+from app.schemas.app import ExportFilters, ExportFormat
+
+
+# rows fetched per round trip of the server-side cursor, and rows per Parquet row group
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+# JSONB columns, written as JSON text in Parquet files since their keys vary between rows
+EXPORT_JSON_COLUMNS = ("crawled_metadata", "translation_metadata")
+
+
+def parquet_available() -> bool:
+    """Parquet exports need the optional `pyarrow` dependency (`export` extra)."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+async def _iter_export_batches(filters: ExportFilters, batch_size: int) -> AsyncIterator[list]:
+    # the session is opened by the generator itself, a request scoped one would be closed before a streaming
+    # response is sent
+    repository = CrawledDataRepository()
+    async with get_async_session(auto_commit=False, read_only=True) as session:
+        async for batch in repository.stream_export(filters, session, batch_size):
+            yield batch
+
+
+async def export_ndjson(filters: ExportFilters, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """One JSON object per line for each crawled page and translation pair, a chunk per batch of rows."""
+
+    async for batch in _iter_export_batches(filters, batch_size):
+        yield b"".join(orjson.dumps(dict(row), option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+class _ChunkSink:
+    """Write-only file object collecting what the Parquet writer writes, drained after each row group so the file
+    is sent while it's written instead of being buffered whole."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("crawled_data_id", pa.int32()),
+            ("url", pa.string()),
+            ("canonical_url", pa.string()),
+            ("crawled_content", pa.string()),
+            ("crawled_metadata", pa.string()),
+            ("crawled_date", pa.timestamp("us", tz="UTC")),
+            ("translation_output_id", pa.int32()),
+            ("language", pa.string()),
+            ("translation_content", pa.string()),
+            ("translation_metadata", pa.string()),
+            ("translated_date", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+def _parquet_row(row) -> dict:
+    row = dict(row)
+    for column in EXPORT_JSON_COLUMNS:
+        if row[column] is not None:
+            row[column] = orjson.dumps(row[column]).decode()
+    return row
+
+
+async def export_parquet(filters: ExportFilters, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """A zstd compressed Parquet file with a row group per batch of rows, sent as each row group is written."""
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        async for batch in _iter_export_batches(filters, batch_size):
+            table = pa.Table.from_pylist([_parquet_row(row) for row in batch], schema=schema)
+            # encoding and compressing a row group is CPU bound
+            await asyncio.to_thread(writer.write_table, table)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        # writes the footer, also when the export is cancelled so the writer is released
+        writer.close()
+    yield sink.drain()
+
+
+def export_data(filters: ExportFilters, export_format: ExportFormat = "ndjson") -> AsyncIterator[bytes]:
+    if export_format == "parquet":
+        return export_parquet(filters)
+    return export_ndjson(filters)
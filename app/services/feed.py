@@ -1,22 +1,40 @@
-from datetime import datetime
-from app.repositories.app import CrawledDataRepository
+import hashlib
+import html
+from datetime import UTC, datetime
+from urllib.parse import quote
+
+from app.config.app_settings import settings
+from app.config.logger import logger
+from app.config.models import AiTranslationOutput, CrawledData
+from app.repositories.app import AiTranslationOutputRepository, CrawledDataRepository
 from app.config.db import AsyncSession
-from app.schemas.feed import AtomItem, AtomFeed
+from app.schemas.feed import AtomItem, AtomFeed, FeedVersion
 
 
 async def prepare_feed(async_session: AsyncSession):
     repository = CrawledDataRepository()
     feed_entries = []
 
-    crawled_data = await repository.list(async_session)
+    crawled_data = await repository.list_with_translation(async_session)
     now = datetime.utcnow()
 
     for entry in crawled_data:
-        title = entry.url.split("/")[-1]
+        slug = entry.url.split("/")[-1]
         summary = entry.content[:200]
 
-        url = f"https://feed.dhruvahuja.me/files/markdown/{title}.md"
-        entry_data = AtomItem(title=title, summary=summary, link=url, id=url, updated=now, content=entry.content)
+        # the HTML rendered by the post-processing stage, untranslated entries show their Markdown as preformatted text
+        translation_output = entry.translation_output
+        if translation_output is not None and translation_output.html_content:
+            content = translation_output.html_content
+        else:
+            content = f"<pre>{html.escape(entry.content)}</pre>"
+
+        # the saved Markdown file when there's one, served by `/files/markdown/{name}`
+        if translation_output is not None and translation_output.file_name:
+            url = f"https://feed.dhruvahuja.me/files/markdown/{quote(translation_output.file_name)}"
+        else:
+            url = f"https://feed.dhruvahuja.me/files/markdown/{slug}.md"
+        entry_data = AtomItem(title=entry.title, summary=summary, link=url, id=url, updated=now, content=content)
         feed_entries.append(entry_data)
 
     feed = AtomFeed(
@@ -28,3 +46,80 @@ async def prepare_feed(async_session: AsyncSession):
         entries=feed_entries,
     )
     return feed
+
+
+def get_feed_entry_url(crawled_data_id: int, language: str) -> str:
+    base_url = settings.feed.base_url.rstrip("/")
+    return f"{base_url}/app/translate?id={crawled_data_id}&language={quote(language)}&format=markdown"
+
+
+def render_feed_fragment(
+    crawled_data: CrawledData, language: str, content: str, html_content: str | None, updated: datetime
+) -> str:
+    """Atom entry of a translation, stored with it. The entry id is the same for every translation of the page into
+    the language, so readers see a re-translation as an update."""
+
+    url = get_feed_entry_url(crawled_data.id, language)
+    entry = AtomItem(
+        title=crawled_data.title,
+        summary=content[: settings.feed.summary_length],
+        link=url,
+        id=url,
+        updated=updated,
+        content=html_content or f"<pre>{html.escape(content)}</pre>",
+    )
+    return entry.to_fragment()
+
+
+async def get_language_feed_version(language: str, async_session: AsyncSession) -> FeedVersion:
+    """Entries of a language feed and the validators for conditional requests, without loading any content.
+    Translations are never updated in place, so their ids identify the feed's contents."""
+
+    repository = AiTranslationOutputRepository()
+    entries = await repository.list_feed_entries(language, async_session, limit=settings.feed.max_entries)
+    entry_ids = [id for id, _ in entries]
+
+    digest = hashlib.sha256(f"{language}:{','.join(map(str, entry_ids))}".encode()).hexdigest()[:32]
+    last_modified = max((created_date for _, created_date in entries), default=None)
+    return FeedVersion(entry_ids=entry_ids, etag=f'W/"{digest}"', last_modified=last_modified)
+
+
+async def fill_feed_fragments(ids: list[int], async_session: AsyncSession) -> dict[int, str]:
+    """Renders and stores the entries of translations saved before entries were stored with them."""
+
+    repository = AiTranslationOutputRepository()
+    fragments = {}
+    translation_outputs: list[AiTranslationOutput] = await repository.list_with_crawled_data(ids, async_session)
+    for translation_output in translation_outputs:
+        translation_output.feed_fragment = render_feed_fragment(
+            translation_output.crawled_data,
+            translation_output.language,
+            translation_output.content,
+            translation_output.html_content,
+            translation_output.created_date,
+        )
+        fragments[translation_output.id] = translation_output.feed_fragment
+
+    logger.info("Rendered missing feed entries", count=len(fragments))
+    return fragments
+
+
+async def render_language_feed(language: str, version: FeedVersion, async_session: AsyncSession) -> bytes:
+    """The Atom feed of a language, concatenating the stored entries of its newest translations."""
+
+    repository = AiTranslationOutputRepository()
+    fragments = await repository.get_feed_fragments(version["entry_ids"], async_session)
+    missing = [id for id, fragment in fragments.items() if fragment is None]
+    if missing:
+        fragments.update(await fill_feed_fragments(missing, async_session))
+
+    base_url = settings.feed.base_url.rstrip("/")
+    feed = AtomFeed(
+        title=f"Dhuv's Translated Feed ({language})",
+        subtitle=f"Atom feed of content translated into {language}",
+        link=f"/feed/{quote(language)}",
+        id=f"{base_url}/feed/{quote(language)}",
+        updated=version["last_modified"] or datetime.now(UTC),
+        entries=[],
+    )
+    return feed.to_xml_with_fragments([fragments[id] for id in version["entry_ids"] if fragments.get(id)])
@@ -0,0 +1,66 @@
+import asyncio
+import functools
+from pathlib import Path
+
+import httpx
+
+from app.config.app_settings import settings
+from app.config.crawler import get_crawler_pool
+from app.config.db import get_async_engine, test_db_connection
+from app.utils.health import CachedCheck, CheckResult
+
+
+async def check_database() -> tuple[bool, dict]:
+    """Runs a query through the pool, it fails the check when the pool is exhausted for longer than the timeout."""
+
+    await test_db_connection()
+    pool = get_async_engine().pool
+    return True, {"pool_size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+
+
+async def check_crawler() -> tuple[bool, dict]:
+    crawler_pool = get_crawler_pool()
+    if crawler_pool is None:
+        return True, {"shared_browser": False}
+
+    return crawler_pool.ready, crawler_pool.stats()
+
+
+async def check_llm_provider() -> tuple[bool, dict | str]:
+    open_router_settings = settings.open_router
+    provider = open_router_settings.provider
+    if provider == "fake":
+        return True, {"provider": provider}
+    if provider == "replay":
+        folder = Path(open_router_settings.recordings_folder)
+        return folder.is_dir(), {"provider": provider, "recordings_folder": str(folder)}
+
+    # the models list is public and cheap, it shows the API is reachable without spending tokens
+    async with httpx.AsyncClient(timeout=settings.health.timeout_seconds) as client:
+        response = await client.get(f"{open_router_settings.base_url.rstrip('/')}/models")
+    return response.is_success, {"provider": provider, "status_code": response.status_code}
+
+
+@functools.cache
+def get_readiness_checks() -> dict[str, CachedCheck]:
+    health_settings = settings.health
+    ttl, timeout = health_settings.ttl_seconds, health_settings.timeout_seconds
+    return {
+        "database": CachedCheck("database", check_database, ttl, timeout),
+        "crawler": CachedCheck("crawler", check_crawler, ttl, timeout),
+        "llm_provider": CachedCheck("llm_provider", check_llm_provider, health_settings.llm_ttl_seconds, timeout),
+    }
+
+
+async def check_readiness(crawls: bool) -> tuple[bool, dict[str, CheckResult]]:
+    """Runs the readiness checks of this process, cached for a few seconds. The crawler only counts in processes
+    that crawl, the LLM provider only when `HEALTH_REQUIRE_LLM` is set."""
+
+    checks = {name: check for name, check in get_readiness_checks().items() if name != "crawler" or crawls}
+    results = dict(zip(checks, await asyncio.gather(*(check.run() for check in checks.values()))))
+
+    required = {"database", "crawler"}
+    if settings.health.require_llm:
+        required.add("llm_provider")
+    ready = all(result["ok"] for name, result in results.items() if name in required)
+    return ready, results
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Literal
+
+from app.config.app_settings import settings
+from app.config.db import AsyncSession, get_async_session
+from app.config.logger import logger
+from app.config.models import TranslationJob
+from app.repositories.app import TranslationJobRepository
+from app.schemas.app import TranslateRequestInput, TranslationJobCreate, TranslationJobUpdate
+from app.services.app import get_crawled_data, get_or_crawl_url, get_or_translate_content, save_translated_content
+from app.services.webhooks import WebhookEvent, enqueue_webhook
+
+
+S = AsyncSession
+Stage = Literal["crawl", "translate"]
+
+
+class JobStatus:
+    PENDING_CRAWL = "pending_crawl"
+    CRAWLING = "crawling"
+    PENDING_TRANSLATION = "pending_translation"
+    TRANSLATING = "translating"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+# (status a job waits in for the stage, status while a worker processes it)
+STAGE_STATUSES: dict[Stage, tuple[str, str]] = {
+    "crawl": (JobStatus.PENDING_CRAWL, JobStatus.CRAWLING),
+    "translate": (JobStatus.PENDING_TRANSLATION, JobStatus.TRANSLATING),
+}
+
+
+async def enqueue_translation_job(req_input: TranslateRequestInput, session: S) -> TranslationJob:
+    """Queues a translate request for the stage workers."""
+
+    repository = TranslationJobRepository()
+    options = req_input.model_dump(include={"save_to_disk", "title", "cache", "callback_url"})
+    job_data = TranslationJobCreate(
+        url=req_input.url, language=req_input.language, status=JobStatus.PENDING_CRAWL, options=options
+    )
+    job = await repository.add(job_data, session)
+
+    logger.info("Queued translation job", id=job.id, url=job.url)
+    return job
+
+
+async def get_translation_job(id: int, session: S) -> TranslationJob | None:
+    repository = TranslationJobRepository()
+    return await repository.get(id, session)
+
+
+async def claim_job(stage: Stage) -> TranslationJob | None:
+    pending_status, running_status = STAGE_STATUSES[stage]
+    repository = TranslationJobRepository()
+    async with get_async_session() as session:
+        return await repository.claim(pending_status, running_status, settings.workers.lease_seconds, session)
+
+
+async def update_job(id: int, data: TranslationJobUpdate, reset_attempts: bool = False) -> None:
+    repository = TranslationJobRepository()
+    async with get_async_session() as session:
+        job = await repository.update(id, data, session)
+        if job is not None and reset_attempts:
+            job.attempts = 0
+
+
+async def crawl_job(job: TranslationJob) -> None:
+    async with get_async_session() as session:
+        crawled_data, _ = await get_or_crawl_url(job.url, session, job.options.get("cache", True))
+
+    # each stage gets its own retry budget
+    data = TranslationJobUpdate(status=JobStatus.PENDING_TRANSLATION, crawled_data_id=crawled_data.id, error=None)
+    await update_job(job.id, data, reset_attempts=True)
+
+
+async def translate_job(job: TranslationJob) -> None:
+    async with get_async_session() as session:
+        crawled_data = await get_crawled_data(job.crawled_data_id, session)
+        if crawled_data is None:
+            raise ValueError(f"Crawled data {job.crawled_data_id} not found")
+
+        translation = await get_or_translate_content(crawled_data, session, job.language)
+
+    title = job.options.get("title") or crawled_data.title
+    translation_output, _ = await save_translated_content(
+        crawled_data.id,
+        title,
+        translation["content"],
+        job.language,
+        save_to_disk=job.options.get("save_to_disk", True),
+        source_content=crawled_data.content,
+        metadata=translation["metadata"],
+        callback_url=job.options.get("callback_url"),
+        callback_data={"job_id": job.id, "url": job.url},
+    )
+
+    data = TranslationJobUpdate(status=JobStatus.COMPLETED, translation_output_id=translation_output.id, error=None)
+    await update_job(job.id, data)
+    logger.info("Translation job completed", id=job.id, url=job.url)
+
+
+STAGE_HANDLERS = {"crawl": crawl_job, "translate": translate_job}
+
+
+async def keep_job_lease(job: TranslationJob, running_status: str) -> None:
+    """Renews the lease of a claimed job while it's processed, a long translation would otherwise be claimed again by
+    another worker and translated twice. Stops once the lease turns out to be lost."""
+
+    repository = TranslationJobRepository()
+    while True:
+        await asyncio.sleep(settings.workers.lease_seconds / 3)
+        try:
+            async with get_async_session() as session:
+                renewed = await repository.renew_lease(job.id, running_status, job.attempts, session)
+        except Exception as ex:
+            logger.warning("Failed to renew job lease", id=job.id, error=str(ex))
+            continue
+
+        if not renewed:
+            logger.warning("Lost the lease of a running job", id=job.id)
+            return
+
+
+async def process_job(stage: Stage, job: TranslationJob) -> None:
+    """Runs the stage's handler for the claimed job, putting it back in the queue on failure until it runs out of
+    attempts."""
+
+    _, running_status = STAGE_STATUSES[stage]
+    lease_task = asyncio.create_task(keep_job_lease(job, running_status))
+    try:
+        await _run_job(stage, job)
+    finally:
+        lease_task.cancel()
+        await asyncio.gather(lease_task, return_exceptions=True)
+
+
+async def _run_job(stage: Stage, job: TranslationJob) -> None:
+    try:
+        await STAGE_HANDLERS[stage](job)
+    except Exception as ex:
+        logger.error("Translation job failed", id=job.id, stage=stage, attempts=job.attempts, error=str(ex))
+
+        pending_status, _ = STAGE_STATUSES[stage]
+        status = JobStatus.FAILED if job.attempts >= settings.workers.max_attempts else pending_status
+        repository = TranslationJobRepository()
+        async with get_async_session() as session:
+            await repository.update(job.id, TranslationJobUpdate(status=status, error=str(ex)), session)
+
+            callback_url = job.options.get("callback_url")
+            if status == JobStatus.FAILED and callback_url:
+                webhook_data = {"job_id": job.id, "url": job.url, "language": job.language, "error": str(ex)}
+                await enqueue_webhook(WebhookEvent.TRANSLATION_FAILED, callback_url, webhook_data, session)
@@ -0,0 +1,211 @@
+import asyncio
+import datetime as dt
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable
+
+import httpx
+from sqlalchemy import text
+
+from app.config.app_settings import settings
+from app.config.db import get_async_engine, get_async_session
+from app.config.logger import logger
+from app.config.models import CrawledData
+from app.schemas.app import TranslationResult
+from app.repositories.app import AiTranslationOutputRepository, CrawledDataRepository
+from app.services.app import (
+    get_crawled_data_by_url,
+    get_or_crawl_url,
+    get_translation_output,
+    refresh_crawled_data,
+    save_translated_content,
+    translate_content,
+    translate_near_duplicate,
+)
+from app.utils.watchlist import extract_feed_links, extract_sitemap_urls
+
+
+# id of the Postgres advisory lock making sure a single instance runs the scheduler at a time
+SCHEDULER_LOCK_KEY = 4_170_923_518
+WATCHLIST_TIMEOUT_SECONDS = 30
+
+
+@asynccontextmanager
+async def scheduler_lock() -> AsyncIterator[bool]:
+    """Tries to take the scheduler's advisory lock for the duration of the block, yields whether it was taken."""
+
+    async with get_async_engine().connect() as connection:
+        acquired = await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+
+
+async def fetch_watchlist(client: httpx.AsyncClient) -> list[str]:
+    """Newest page URLs of the watched feeds and domain sitemaps."""
+
+    scheduler_settings = settings.scheduler
+    sources = [(feed, extract_feed_links) for feed in scheduler_settings.watch_feeds]
+    for domain in scheduler_settings.watch_domains:
+        base_url = domain if "://" in domain else f"https://{domain}"
+        sources.append((f"{base_url.rstrip('/')}/sitemap.xml", extract_sitemap_urls))
+
+    urls: list[str] = []
+    for source, extract in sources:
+        try:
+            response = await client.get(source)
+            response.raise_for_status()
+        except httpx.HTTPError as ex:
+            logger.warning("Failed to fetch watched source", source=source, error=str(ex))
+            continue
+
+        links = [link for link in extract(response.content) if link.startswith(("http://", "https://"))]
+        urls.extend(links[: scheduler_settings.max_items_per_source])
+
+    return list(dict.fromkeys(urls))
+
+
+async def translate_and_save(
+    crawled_data: CrawledData, language: str, translation: TranslationResult | None = None
+) -> None:
+    if translation is None:
+        translation = await translate_content(crawled_data, language)
+    await save_translated_content(
+        crawled_data.id,
+        crawled_data.title,
+        translation["content"],
+        language,
+        source_content=crawled_data.content,
+        metadata=translation["metadata"],
+    )
+    logger.info("Pre-translated page", id=crawled_data.id, language=language)
+
+
+async def ensure_translation(crawled_data: CrawledData, language: str) -> None:
+    async with get_async_session() as session:
+        translation_output = await get_translation_output(crawled_data.id, session, language)
+        if translation_output is not None:
+            return
+
+        translation = await translate_near_duplicate(crawled_data, language, session)
+    await translate_and_save(crawled_data, language, translation)
+
+
+async def prewarm_url(url: str) -> None:
+    """Crawls and translates a watched page nobody requested yet. A page crawled longer than
+    `SCHEDULER_REFRESH_AFTER_HOURS` ago is fetched again and re-translated into all of its languages if it changed."""
+
+    scheduler_settings = settings.scheduler
+    async with get_async_session() as session:
+        crawled_data = await get_crawled_data_by_url(url, session)
+        if crawled_data is None:
+            crawled_data, _ = await get_or_crawl_url(url, session)
+            changed = False
+        else:
+            refresh_after = dt.timedelta(hours=scheduler_settings.refresh_after_hours)
+            if crawled_data.updated_date > dt.datetime.now(dt.UTC) - refresh_after:
+                return
+            changed = await refresh_crawled_data(crawled_data, session)
+
+        repository = AiTranslationOutputRepository()
+        languages = (await repository.list_languages([crawled_data.id], session))[crawled_data.id]
+
+    if not changed:
+        await ensure_translation(crawled_data, scheduler_settings.language)
+        return
+
+    logger.info("Watched page changed, translating it again", id=crawled_data.id, languages=sorted(languages))
+    for language in sorted(languages or {scheduler_settings.language}):
+        await translate_and_save(crawled_data, language)
+
+
+async def find_missing_translations() -> list[tuple[CrawledData, str]]:
+    """Extra languages missing for the most read pages of the access window, most read first."""
+
+    scheduler_settings = settings.scheduler
+    if not scheduler_settings.extra_languages or not scheduler_settings.top_accessed:
+        return []
+
+    since = dt.datetime.now(dt.UTC) - dt.timedelta(days=scheduler_settings.access_window_days)
+    async with get_async_session() as session:
+        top_accessed = await CrawledDataRepository().list_most_accessed(
+            since, session, limit=scheduler_settings.top_accessed
+        )
+        languages = await AiTranslationOutputRepository().list_languages(
+            [crawled_data.id for crawled_data in top_accessed], session
+        )
+
+    return [
+        (crawled_data, language)
+        for crawled_data in top_accessed
+        for language in scheduler_settings.extra_languages
+        if language not in languages[crawled_data.id]
+    ]
+
+
+async def run_scheduler_cycle() -> None:
+    """Pre-warms the watched pages, then translates the most read pages into the extra languages, at most
+    `SCHEDULER_CONCURRENCY` at a time. Skipped when another instance is running a cycle."""
+
+    async with scheduler_lock() as acquired:
+        if not acquired:
+            logger.debug("Scheduler cycle is running in another instance")
+            return
+
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(settings.scheduler.concurrency)
+        failures = 0
+
+        async def limited(task: Awaitable[None], **context) -> None:
+            nonlocal failures
+            async with semaphore:
+                try:
+                    await task
+                except Exception as ex:
+                    failures += 1
+                    logger.error("Scheduled task failed", error=str(ex), **context)
+
+        async with httpx.AsyncClient(timeout=WATCHLIST_TIMEOUT_SECONDS, follow_redirects=True) as client:
+            urls = await fetch_watchlist(client)
+        await asyncio.gather(*(limited(prewarm_url(url), url=url) for url in urls))
+
+        missing = await find_missing_translations()
+        await asyncio.gather(
+            *(
+                limited(ensure_translation(crawled_data, language), id=crawled_data.id, language=language)
+                for crawled_data, language in missing
+            )
+        )
+
+        logger.info(
+            "Scheduler cycle completed",
+            watched_urls=len(urls),
+            extra_translations=len(missing),
+            failures=failures,
+            seconds=round(time.perf_counter() - start, 1),
+        )
+
+
+async def run_scheduler_loop(stop_event: asyncio.Event) -> None:
+    """Runs scheduler cycles every `SCHEDULER_INTERVAL_SECONDS` with jitter until the event is set. The first cycle
+    is delayed at random too, so instances started together don't run in lockstep."""
+
+    scheduler_settings = settings.scheduler
+    interval, jitter = scheduler_settings.interval_seconds, scheduler_settings.jitter
+    delay = random.uniform(0, interval * jitter)
+    while True:
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=delay)
+            return
+        except TimeoutError:
+            pass
+
+        try:
+            await run_scheduler_cycle()
+        except Exception as ex:
+            logger.error("Scheduler cycle failed", error=str(ex))
+
+        delay = interval * random.uniform(1 - jitter, 1 + jitter)
@@ -0,0 +1,38 @@
+import datetime as dt
+from urllib.parse import urlsplit
+
+from app.config.db import AsyncSession
+from app.config.models import CrawledData
+from app.config.usage import get_usage_recorder
+from app.repositories.app import LlmUsageRepository
+from app.utils.usage import UsageRecord
+
+
+S = AsyncSession
+
+
+def record_usage(usage: dict, language: str, crawled_data: CrawledData | None = None) -> None:
+    """Queues the usage of an LLM call for the ledger, attributed to the crawled page it translated."""
+
+    usage_recorder = get_usage_recorder()
+    if usage_recorder is None:
+        return
+
+    record = UsageRecord(
+        crawled_data_id=crawled_data.id if crawled_data is not None else None,
+        language=language,
+        domain=(urlsplit(crawled_data.url).hostname or "") if crawled_data is not None else "",
+        model=usage["model"] or "",
+        requests=usage["requests"],
+        request_tokens=usage["request_tokens"],
+        response_tokens=usage["response_tokens"],
+        cached_tokens=usage["cached_tokens"],
+        latency_ms=usage["latency_ms"],
+        created_date=dt.datetime.now(dt.UTC),
+    )
+    usage_recorder.record(record)
+
+
+async def get_usage_report(since: dt.date, until: dt.date, group_by: list[str], session: S) -> list[dict]:
+    repository = LlmUsageRepository()
+    return await repository.summarize(since, until, group_by, session)
@@ -0,0 +1,147 @@
+import datetime as dt
+
+import httpx
+import orjson
+from sqlalchemy import func
+
+from app.config.app_settings import settings
+from app.config.db import AsyncSession, get_async_session
+from app.config.logger import logger
+from app.config.models import WebhookDelivery
+from app.repositories.app import AiTranslationOutputRepository, WebhookDeliveryRepository
+from app.schemas.app import WebhookDeliveryCreate, WebhookDeliveryUpdate
+from app.utils.webhooks import PERMANENT_FAILURE_STATUSES, retry_delay, webhook_headers
+
+
+S = AsyncSession
+
+# longest error kept on a delivery, receivers may answer with whole HTML error pages
+MAX_ERROR_LENGTH = 500
+
+
+class WebhookStatus:
+    PENDING = "pending"
+    DELIVERING = "delivering"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+class WebhookEvent:
+    TRANSLATION_COMPLETED = "translation.completed"
+    TRANSLATION_FAILED = "translation.failed"
+
+
+def webhooks_configured() -> bool:
+    return settings.webhooks.secret is not None
+
+
+def get_translation_url(crawled_data_id: int) -> str:
+    return f"{settings.webhooks.public_base_url.rstrip('/')}/app/translate?id={crawled_data_id}"
+
+
+async def enqueue_webhook(event: str, url: str, data: dict, session: S) -> WebhookDelivery:
+    """Adds a webhook to the outbox within the caller's transaction, it's only delivered once that commits."""
+
+    if not webhooks_configured():
+        raise ValueError("Webhooks are not configured, set WEBHOOK_SECRET to use callback URLs")
+
+    repository = WebhookDeliveryRepository()
+    delivery_data = WebhookDeliveryCreate(event=event, url=url, payload=data, status=WebhookStatus.PENDING)
+    delivery = await repository.add(delivery_data, session)
+
+    logger.debug("Queued webhook", id=delivery.id, event=event, url=url)
+    return delivery
+
+
+async def claim_delivery() -> WebhookDelivery | None:
+    repository = WebhookDeliveryRepository()
+    async with get_async_session() as session:
+        return await repository.claim(
+            WebhookStatus.PENDING, WebhookStatus.DELIVERING, settings.webhooks.lease_seconds, session
+        )
+
+
+async def build_webhook_body(delivery: WebhookDelivery) -> bytes:
+    """JSON body of a delivery. The translated content is read at delivery time instead of being copied into the
+    outbox, so large documents are only stored once."""
+
+    data = dict(delivery.payload)
+    if delivery.event == WebhookEvent.TRANSLATION_COMPLETED and settings.webhooks.include_content:
+        repository = AiTranslationOutputRepository()
+        async with get_async_session() as session:
+            translation_output = await repository.get(data["translation_output_id"], session)
+        data["content"] = translation_output.content if translation_output else None
+
+    return orjson.dumps(
+        {"id": delivery.id, "event": delivery.event, "created_at": delivery.created_date.isoformat(), "data": data}
+    )
+
+
+async def finish_attempt(
+    delivery: WebhookDelivery,
+    status: str,
+    error: str | None = None,
+    response_status: int | None = None,
+    retry_in: float | None = None,
+) -> None:
+    """Records the outcome of a delivery attempt, a pending delivery is attempted again in `retry_in` seconds."""
+
+    data = WebhookDeliveryUpdate(status=status, error=error, response_status=response_status)
+    repository = WebhookDeliveryRepository()
+    async with get_async_session() as session:
+        record = await repository.update(delivery.id, data, session)
+        if record is None:
+            return
+
+        if status == WebhookStatus.DELIVERED:
+            record.delivered_at = func.now()
+        elif retry_in is not None:
+            record.next_attempt_at = func.now() + dt.timedelta(seconds=retry_in)
+
+
+async def deliver_webhook(delivery: WebhookDelivery, client: httpx.AsyncClient) -> None:
+    """Sends a claimed delivery, retrying later on network errors, timeouts and server errors until it runs out of
+    attempts. Client errors other than throttling fail it right away."""
+
+    retry_after = None
+    response_status = None
+    try:
+        body = await build_webhook_body(delivery)
+        secret = settings.webhooks.secret.get_secret_value()
+        headers = webhook_headers(secret, delivery.id, delivery.event, body)
+        response = await client.post(delivery.url, content=body, headers=headers)
+    except Exception as ex:
+        error = f"{type(ex).__name__}: {ex}"
+    else:
+        response_status = response.status_code
+        if response.is_success:
+            await finish_attempt(delivery, WebhookStatus.DELIVERED, response_status=response_status)
+            logger.info("Webhook delivered", id=delivery.id, event=delivery.event, attempts=delivery.attempts)
+            return
+
+        error = f"HTTP {response_status}: {response.text[:MAX_ERROR_LENGTH]}"
+        retry_after = response.headers.get("retry-after")
+        if response_status in PERMANENT_FAILURE_STATUSES or response.is_redirect:
+            await finish_attempt(delivery, WebhookStatus.FAILED, error, response_status)
+            logger.error("Webhook rejected", id=delivery.id, url=delivery.url, status=response_status)
+            return
+
+    error = error[:MAX_ERROR_LENGTH]
+    if delivery.attempts >= settings.webhooks.max_attempts:
+        await finish_attempt(delivery, WebhookStatus.FAILED, error, response_status)
+        logger.error(
+            "Webhook delivery failed", id=delivery.id, url=delivery.url, attempts=delivery.attempts, error=error
+        )
+        return
+
+    delay = retry_delay(
+        delivery.attempts, settings.webhooks.backoff_base_seconds, settings.webhooks.backoff_max_seconds, retry_after
+    )
+    await finish_attempt(delivery, WebhookStatus.PENDING, error, response_status, retry_in=delay)
+    logger.warning(
+        "Webhook delivery attempt failed",
+        id=delivery.id,
+        attempts=delivery.attempts,
+        retry_in=round(delay, 1),
+        error=error,
+    )
@@ -0,0 +1,181 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+
+from app.config.app_settings import settings
+from app.config.lifecycle import shutdown, startup
+from app.config.logger import logger
+from app.services.jobs import Stage, claim_job, process_job
+from app.services.scheduler import run_scheduler_loop
+from app.services.webhooks import claim_delivery, deliver_webhook
+
+
+T = TypeVar("T")
+
+
+async def _poll_loop(
+    name: str,
+    claim: Callable[[], Awaitable[T | None]],
+    process: Callable[[T], Awaitable[None]],
+    poll_interval: float,
+    stop_event: asyncio.Event,
+) -> None:
+    while not stop_event.is_set():
+        try:
+            item = await claim()
+        except Exception as ex:
+            logger.error("Failed to claim work", worker=name, error=str(ex))
+            item = None
+
+        if item is None:
+            # nothing to do, wait for the next poll unless we're asked to stop in the meantime
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+            except TimeoutError:
+                pass
+            continue
+
+        await process(item)
+
+
+def _stop_event_on_signals() -> asyncio.Event:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    return stop_event
+
+
+async def run_stage(stage: Stage, concurrency: int) -> None:
+    """Processes jobs of a single pipeline stage with the given number of concurrent tasks until terminated.
+    In-flight jobs are finished before exiting."""
+
+    await startup(warm_crawler=stage == "crawl")
+    stop_event = _stop_event_on_signals()
+
+    async def process(job) -> None:
+        await process_job(stage, job)
+
+    logger.info("Starting stage worker", stage=stage, concurrency=concurrency, pid=os.getpid())
+    try:
+        loops = (
+            _poll_loop(stage, lambda: claim_job(stage), process, settings.workers.poll_interval_seconds, stop_event)
+            for _ in range(concurrency)
+        )
+        await asyncio.gather(*loops)
+    finally:
+        await shutdown()
+
+
+def run_stage_process(stage: Stage, concurrency: int) -> None:
+    asyncio.run(run_stage(stage, concurrency))
+
+
+async def deliver_webhooks(concurrency: int, stop_event: asyncio.Event) -> None:
+    """Delivers webhooks from the outbox with the given number of concurrent deliveries until `stop_event` is set,
+    sharing one HTTP connection pool. In-flight deliveries are finished before returning."""
+
+    timeout = httpx.Timeout(settings.webhooks.timeout_seconds)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, follow_redirects=False) as client:
+
+        async def process(delivery) -> None:
+            await deliver_webhook(delivery, client)
+
+        poll_interval = settings.webhooks.poll_interval_seconds
+        loops = (_poll_loop("webhooks", claim_delivery, process, poll_interval, stop_event) for _ in range(concurrency))
+        await asyncio.gather(*loops)
+
+
+async def run_webhook_worker(concurrency: int) -> None:
+    """Delivers webhooks from the outbox until terminated."""
+
+    await startup()
+    stop_event = _stop_event_on_signals()
+
+    logger.info("Starting webhook worker", concurrency=concurrency, pid=os.getpid())
+    try:
+        await deliver_webhooks(concurrency, stop_event)
+    finally:
+        await shutdown()
+
+
+def run_webhook_process(concurrency: int) -> None:
+    asyncio.run(run_webhook_worker(concurrency))
+
+
+async def run_scheduler_worker() -> None:
+    """Runs the pre-warming scheduler on its own until terminated, finishing the running cycle before exiting."""
+
+    await startup(warm_crawler=True)
+    stop_event = _stop_event_on_signals()
+
+    logger.info("Starting scheduler", interval=settings.scheduler.interval_seconds, pid=os.getpid())
+    try:
+        await run_scheduler_loop(stop_event)
+    finally:
+        await shutdown()
+
+
+def run_scheduler_process() -> None:
+    asyncio.run(run_scheduler_worker())
+
+
+def run_topology(
+    api_workers: int,
+    crawl_workers: int,
+    translate_workers: int,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    webhook_workers: int = 0,
+    scheduler: bool = False,
+) -> None:
+    """Runs the pipeline as separate stage processes on one box: one process per crawl worker, so each browser gets
+    its own CPU, a single process running `translate_workers` concurrent LLM calls, a single process running
+    `webhook_workers` concurrent webhook deliveries, optionally the pre-warming scheduler and `api_workers` API
+    processes which queue requests instead of handling them inline."""
+
+    # spawned processes (including uvicorn's workers) inherit the environment. The settings of this process are
+    # already loaded, they're updated too since a single API worker runs in this process
+    os.environ["WORKER_MODE"] = "queue"
+    settings.workers.mode = "queue"
+    if webhook_workers:
+        # the webhook worker delivers the callbacks, API processes don't need to
+        os.environ["WEBHOOK_API_CONCURRENCY"] = "0"
+        settings.webhooks.api_concurrency = 0
+    context = multiprocessing.get_context("spawn")
+
+    processes: list[multiprocessing.Process] = []
+    for index in range(crawl_workers):
+        processes.append(context.Process(target=run_stage_process, args=("crawl", 1), name=f"crawl-worker-{index}"))
+    if translate_workers:
+        processes.append(
+            context.Process(target=run_stage_process, args=("translate", translate_workers), name="translate-worker")
+        )
+    if webhook_workers:
+        processes.append(context.Process(target=run_webhook_process, args=(webhook_workers,), name="webhook-worker"))
+    if scheduler:
+        processes.append(context.Process(target=run_scheduler_process, name="scheduler"))
+
+    for process in processes:
+        process.start()
+        logger.info("Started stage process", name=process.name, pid=process.pid)
+
+    try:
+        if api_workers:
+            import uvicorn
+
+            uvicorn.run("app.main:app", host=host, port=port, workers=api_workers, proxy_headers=True)
+        else:
+            for process in processes:
+                process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
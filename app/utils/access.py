@@ -0,0 +1,45 @@
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable
+
+from app.config.logger import logger
+
+
+class AccessCounter:
+    """Counts reads per id in memory and hands them to `flush` every `interval_seconds`, so a hot page costs one
+    batched write per interval instead of an UPDATE per read. Counts of a failed flush are dropped, they only rank
+    pages and aren't worth growing the buffer while the database is down."""
+
+    def __init__(self, flush: Callable[[dict[int, int]], Awaitable[None]], interval_seconds: float):
+        self._flush = flush
+        self.interval_seconds = interval_seconds
+        self._counts: Counter[int] = Counter()
+        self._task: asyncio.Task | None = None
+
+    def record(self, id: int) -> None:
+        self._counts[id] += 1
+
+    async def flush(self) -> None:
+        counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+
+        try:
+            await self._flush(dict(counts))
+        except Exception as ex:
+            logger.warning("Failed to flush access counts", ids=len(counts), error=str(ex))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
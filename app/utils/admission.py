@@ -0,0 +1,127 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is turned away instead of waiting, carrying the HTTP status and `Retry-After` to
+    answer with."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds the concurrent work of a pipeline stage within a process, e.g. open browsers or in-flight LLM calls.
+
+    Up to `limit` callers run at once and up to `max_queue` more wait in FIFO order for at most `max_wait_seconds`.
+    Callers beyond that, or waiting longer, are rejected right away with a 503 so the load balancer can retry
+    elsewhere instead of piling up requests until memory or the DB pool runs out. `Retry-After` is estimated from the
+    average time a slot is held and the current queue.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        # exponentially weighted average of how long a slot is held
+        self._average_hold_seconds = 1.0
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.limit and self.waiting >= self.max_queue
+
+    def retry_after(self) -> int:
+        queued_rounds = (self.waiting + 1) / self.limit
+        return max(1, min(60, math.ceil(self._average_hold_seconds * queued_rounds)))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(f"{self.name} capacity exhausted: {reason}", 503, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject("queue is full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_seconds)
+        except TimeoutError:
+            raise self._reject("queued too long")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._average_hold_seconds += 0.1 * (time.perf_counter() - start - self._average_hold_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "max_queue": self.max_queue,
+            "queued": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "saturated": self.saturated,
+        }
+
+
+class KeyQuota:
+    """Caps the concurrent requests of each API key so a single client can't take all of a stage's capacity.
+    Requests over the quota get a 429 right away, they're never queued."""
+
+    def __init__(self, default_limit: int, limits: dict[str, int] | None = None, retry_after: int = 1):
+        self.default_limit = default_limit
+        self.limits = limits or {}
+        self.retry_after_seconds = retry_after
+
+        self.in_flight: dict[str, int] = {}
+        self.rejected = 0
+
+    def limit(self, key: str) -> int:
+        return self.limits.get(key, self.default_limit)
+
+    @contextmanager
+    def slot(self, key: str) -> Iterator[None]:
+        limit = self.limit(key)
+        in_flight = self.in_flight.get(key, 0)
+        if limit and in_flight >= limit:
+            self.rejected += 1
+            reason = f"Too many concurrent requests, the limit is {limit}"
+            raise AdmissionRejected(reason, 429, self.retry_after_seconds)
+
+        self.in_flight[key] = in_flight + 1
+        try:
+            yield
+        finally:
+            self.in_flight[key] -= 1
+            if not self.in_flight[key]:
+                del self.in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "default_limit": self.default_limit,
+            "active_keys": len(self.in_flight),
+            "in_flight": sum(self.in_flight.values()),
+            "rejected": self.rejected,
+        }
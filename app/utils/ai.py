@@ -1,73 +1,102 @@
+import functools
+
 from pydantic_ai import Agent
+from pydantic_ai.models import Model
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
 
 from app.config.app_settings import settings
+from app.config.telemetry import instrument_openai
+from app.utils.ai_providers import FakeTranslationModel, RecordReplayModel
 
 
-def get_language_prompt(language: str = "Spanish"):
-    PROMPT = f"""
-Please take the following Markdown content and create a bilingual document. Translate each paragraph into {language}, then place the original English paragraph below it. Repeat this process for all paragraphs. Ensure that headings are translated as well.
-Output Requirements:
-Translate each paragraph into {language}.
-Place the original English paragraph below its {language} translation.
-Repeat steps 1 and 2 for all paragraphs.
-Translate headings into {language} and maintain the original English headings below them.
+def get_system_prompt(language: str = "Spanish") -> str:
+    """Translation instructions sent as the system prompt. They only depend on the language and never on the
+    document, so every request into a language starts with the same bytes and providers caching prompt prefixes can
+    reuse them."""
+
+    return f"""Convert the Markdown content given by the user into a bilingual document. Translate each paragraph into {language}, then place the original English paragraph below it. Repeat this process for all paragraphs. Translate headings into {language} and keep the original English headings below them.
 
+Output Requirements:
 - Ensure each pair of paragraphs is separated by a blank line for readability.
 - Maintain consistency in formatting across both languages, especially for lists, code blocks, and quotes.
 - Remove any website navigation content like headers, footers, sidebar, etc.
 - Ensure that you retain code blocks.
-    - Ensure that you keep links relevant to the content such as image links, links to another articles and so on.
-    - Ensure that you extract source links to images and keep them in the content as they were originally.
-    - IMPORTANT: Do not remove or alter any image links or references. Ensure all images are properly displayed in both translations.
-    - For image links, ensure you preserve them.
-    - For image links inside markdown content, retain the original markdown syntax, e.g., ![Alt text](<link>).
-    - For external links, ensure they are preserved exactly as in the original content.
-    
-    Example Output Format:
-    <{language} translation of the first paragraph.>
+- Ensure that you keep links relevant to the content such as image links, links to another articles and so on.
+- IMPORTANT: Preserve all image links and external links exactly as they appear in the original content, including image sources inside link tags. Do not remove or alter any markdown syntax for images, links, or code blocks.
+- For image links inside markdown content, retain the original markdown syntax, e.g., ![Alt text](<link>).
 
-    <Original English first paragraph.>
+Example Output Format:
+<{language} translation of the first paragraph.>
 
-    <{language} translation of the second paragraph.>
+<Original English first paragraph.>
 
-    <Original English second paragraph.>
+<{language} translation of the second paragraph.>
 
-    ...
+<Original English second paragraph.>
 
-    ---------------------------------------------
+...
 
-    Please proceed with the conversions as the data is given to you.
-    """
-    return PROMPT
+Answer with the bilingual document only."""
 
 
-def get_agent_prompt(content: str, language: str = "Spanish") -> str:
-    PROMPT = f"""
-    Convert the following Markdown content into a bilingual document. Translate each paragraph into {language} and place the original English paragraph below it. Also, translate headings into {language} and keep the original English headings below them.
+def get_user_prompt(content: str) -> str:
+    """The document to translate, sent once as the user prompt after the cacheable system prompt."""
 
-    IMPORTANT: 
-    - Preserve all image links and external links exactly as they appear in the original content, including image sources inside link tags.
-    - Do not remove or alter any markdown syntax for images, links, or code blocks.
-    - Ensure images are displayed correctly in both translations by retaining their source links.
+    return content
 
-    {content}
-    """
-    return PROMPT
 
+@functools.cache
+def get_fake_model() -> FakeTranslationModel:
+    # shared by all agents, so a seeded run draws one sequence of latencies and errors instead of repeating the first
+    open_router_settings = settings.open_router
+    return FakeTranslationModel(
+        latency=open_router_settings.fake_latency_seconds,
+        sigma=open_router_settings.fake_latency_sigma,
+        tokens_per_second=open_router_settings.fake_tokens_per_second,
+        error_rate=open_router_settings.fake_error_rate,
+        seed=open_router_settings.fake_seed,
+        prefill_tokens_per_second=open_router_settings.fake_prefill_tokens_per_second,
+        prompt_cache=open_router_settings.fake_prompt_cache,
+        prompt_cache_min_tokens=open_router_settings.fake_prompt_cache_min_tokens,
+    )
+
+
+def create_model(model_name: str) -> Model:
+    """Model of the configured provider, OpenRouter unless a fake or recorded one is selected."""
+
+    open_router_settings = settings.open_router
+    if open_router_settings.provider == "fake":
+        return get_fake_model()
 
-def create_agent(
-    model_name: str = "google/gemini-2.0-flash-lite-001",
-    instrument: bool = True,
-    system_prompt: str = get_language_prompt(),
-) -> Agent:
     model = OpenAIModel(
         model_name=model_name,
         provider=OpenAIProvider(
-            base_url=settings.open_router.base_url, api_key=settings.open_router.api_key.get_secret_value()
+            base_url=open_router_settings.base_url,
+            api_key=open_router_settings.api_key.get_secret_value() if open_router_settings.api_key else None,
         ),
     )
+    if open_router_settings.provider in ("record", "replay"):
+        replay = open_router_settings.provider == "replay"
+        return RecordReplayModel(model, open_router_settings.recordings_folder, replay=replay)
+
+    return model
+
+
+def create_agent(
+    model_name: str = "google/gemini-2.0-flash-lite-001",
+    instrument: bool = True,
+    system_prompt: str = get_system_prompt(),
+) -> Agent:
+    instrument_openai()
+    model = create_model(model_name)
     agent = Agent(model, instrument=instrument, system_prompt=system_prompt)
 
     return agent
+
+
+@functools.lru_cache(maxsize=32)
+def get_translation_agent(language: str) -> Agent:
+    """Agent translating into the language, reused across requests along with its model's HTTP client."""
+
+    return create_agent(system_prompt=get_system_prompt(language))
@@ -0,0 +1,190 @@
+import asyncio
+import dataclasses
+import hashlib
+import random
+from pathlib import Path
+
+import orjson
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelRequest, ModelResponse, TextPart
+from pydantic_ai.models import Model, ModelRequestParameters
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.usage import Usage
+
+from app.config.logger import logger
+
+
+# rough average for English and most European languages, good enough to simulate token counts and generation time
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _request_text(messages: list[ModelMessage], part_kind: str | None = None) -> str:
+    """Text of the system and user prompt parts sent to the model, or only those of the given kind."""
+
+    return "\n\n".join(
+        part.content
+        for message in messages
+        if isinstance(message, ModelRequest)
+        for part in message.parts
+        if isinstance(getattr(part, "content", None), str) and part_kind in (None, part.part_kind)
+    )
+
+
+class FakeTranslationModel(Model):
+    """Deterministic local stand-in for the translation model, for load tests, CI and profiling without a network.
+
+    The response pairs every paragraph of the user prompt with a marked copy of it, so its size grows with the
+    document like a real bilingual translation. Latency is drawn from a log-normal distribution around `latency`
+    (`sigma` 0 makes it constant), plus the time to read the uncached prompt tokens at `prefill_tokens_per_second` and
+    to generate the response at `tokens_per_second`. `error_rate` of the requests fail with a 503 like an overloaded
+    provider.
+
+    With `prompt_cache`, a system prompt already seen is reported as `cached_tokens` and costs no prefill time, like
+    providers caching prompt prefixes. As with them, only prompts of at least `prompt_cache_min_tokens` are cached.
+    """
+
+    # system prompts remembered for the simulated prompt cache
+    MAX_CACHED_PREFIXES = 1024
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        sigma: float = 0.5,
+        tokens_per_second: float = 200,
+        error_rate: float = 0,
+        seed: int | None = None,
+        prefill_tokens_per_second: float = 4000,
+        prompt_cache: bool = True,
+        prompt_cache_min_tokens: int = 1024,
+    ):
+        self.latency = latency
+        self.sigma = sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.prompt_cache = prompt_cache
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self._random = random.Random(seed)
+        self._cached_prefixes: dict[str, None] = {}
+
+    @property
+    def model_name(self) -> str:
+        return "fake-translator"
+
+    @property
+    def system(self) -> str | None:
+        return "fake"
+
+    @staticmethod
+    def translate_paragraph(paragraph: str) -> str:
+        """Pairs a marked copy of the paragraph with the original, keeping headings headings and code untouched."""
+
+        if paragraph.startswith("```"):
+            return paragraph
+
+        heading_level = len(paragraph) - len(paragraph.lstrip("#"))
+        if heading_level and paragraph[heading_level : heading_level + 1] == " ":
+            return f"{paragraph[:heading_level]} [translated]{paragraph[heading_level:]}\n\n{paragraph}"
+
+        return f"[translated] {paragraph}\n\n{paragraph}"
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> tuple[ModelResponse, Usage]:
+        system_prompt = _request_text(messages, "system-prompt")
+        user_prompt = _request_text(messages, "user-prompt")
+        paragraphs = [paragraph.strip() for paragraph in user_prompt.split("\n\n") if paragraph.strip()]
+        content = "\n\n".join(self.translate_paragraph(paragraph) for paragraph in paragraphs)
+
+        request_tokens = estimate_tokens(_request_text(messages))
+        response_tokens = estimate_tokens(content)
+        cached_tokens = self._cached_tokens(system_prompt)
+        delay = self.latency * self._random.lognormvariate(0, self.sigma) if self.sigma else self.latency
+        prefill = (request_tokens - cached_tokens) / self.prefill_tokens_per_second
+        await asyncio.sleep(delay + prefill + response_tokens / self.tokens_per_second)
+
+        if self._random.random() < self.error_rate:
+            raise ModelHTTPError(status_code=503, model_name=self.model_name, body="fake provider error")
+
+        # the agent counts the request itself
+        usage = Usage(
+            request_tokens=request_tokens,
+            response_tokens=response_tokens,
+            total_tokens=request_tokens + response_tokens,
+            details={"cached_tokens": cached_tokens},
+        )
+        return ModelResponse(parts=[TextPart(content)], model_name=self.model_name), usage
+
+    def _cached_tokens(self, system_prompt: str) -> int:
+        if not self.prompt_cache or not system_prompt:
+            return 0
+        # providers don't cache short prefixes, e.g. OpenAI and DeepSeek start at 1024 tokens
+        tokens = estimate_tokens(system_prompt)
+        if tokens < self.prompt_cache_min_tokens:
+            return 0
+
+        key = hashlib.sha256(system_prompt.encode()).hexdigest()
+        if key in self._cached_prefixes:
+            return tokens
+
+        if len(self._cached_prefixes) >= self.MAX_CACHED_PREFIXES:
+            self._cached_prefixes.pop(next(iter(self._cached_prefixes)))
+        self._cached_prefixes[key] = None
+        return 0
+
+
+class RecordReplayModel(WrapperModel):
+    """Records the wrapped model's responses to disk and replays them by a hash of the prompt.
+
+    In `record` mode every request goes to the wrapped model and its response overwrites the recording. In `replay`
+    mode responses only come from recordings, a prompt without one raises an error instead of reaching the network.
+    """
+
+    def __init__(self, wrapped: Model, folder: str | Path, replay: bool):
+        super().__init__(wrapped)
+        self.folder = Path(folder)
+        self.replay = replay
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def recording_path(self, messages: list[ModelMessage]) -> Path:
+        # message timestamps change on every run, only the model and prompt parts identify a request
+        key_data = [self.wrapped.model_name]
+        for message in messages:
+            key_data.extend((part.part_kind, str(getattr(part, "content", ""))) for part in message.parts)
+
+        key = hashlib.sha256(orjson.dumps(key_data)).hexdigest()
+        return self.folder / f"{key}.json"
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> tuple[ModelResponse, Usage]:
+        path = self.recording_path(messages)
+        if self.replay:
+            try:
+                recording = orjson.loads(await asyncio.to_thread(path.read_bytes))
+            except FileNotFoundError:
+                raise ValueError(f"No recorded response for this prompt in {self.folder} ({path.name})")
+
+            [response] = ModelMessagesTypeAdapter.validate_python(recording["response"])
+            return response, Usage(**recording["usage"])
+
+        response, usage = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        recording = {
+            "model_name": self.wrapped.model_name,
+            "response": ModelMessagesTypeAdapter.dump_python([response], mode="json"),
+            "usage": dataclasses.asdict(usage),
+        }
+        await asyncio.to_thread(path.write_bytes, orjson.dumps(recording))
+        logger.debug("Recorded model response", path=str(path))
+        return response, usage
@@ -0,0 +1,225 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import orjson
+
+from app.config.logger import logger
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blob (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_blob_accessed_at ON blob (accessed_at);
+CREATE TABLE IF NOT EXISTS page (
+    url_key TEXT PRIMARY KEY,
+    html_hash TEXT NOT NULL,
+    cleaned_html_hash TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extraction (
+    content_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    markdown_hash TEXT NOT NULL,
+    PRIMARY KEY (content_hash, params)
+);
+"""
+
+
+@dataclass(frozen=True)
+class StoredPage:
+    url_key: str
+    html_hash: str
+    cleaned_html_hash: str
+    metadata: dict
+    fetched_at: float
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed store of crawl artifacts on disk, bounded by total size with LRU eviction.
+
+    Blobs (raw HTML, cleaned HTML, extracted Markdown) are saved once per SHA-256 of their content, so pages served
+    under several URLs or re-extracted with the same result share storage. A SQLite index maps normalized URLs to the
+    blobs of their latest fetch and `(cleaned HTML hash, extraction params)` to the extracted Markdown, so Markdown
+    can be regenerated with other extraction settings without fetching the page again.
+
+    Methods are blocking, run them in a thread from async code.
+    """
+
+    def __init__(self, folder: str | Path, max_bytes: int):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.blob_folder = self.folder / "blobs"
+        self.blob_folder.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.folder / "index.sqlite3", check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        # evictions by this process
+        self.evictions = 0
+
+    def get_page(self, url_key: str) -> StoredPage | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url_key, html_hash, cleaned_html_hash, metadata, fetched_at FROM page WHERE url_key = ?",
+                (url_key,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        return StoredPage(row[0], row[1], row[2], orjson.loads(row[3]), row[4])
+
+    def put_page(self, url_key: str, html: str, cleaned_html: str, metadata: dict | None) -> StoredPage:
+        """Saves the artifacts of a fetch as the latest version of the page."""
+
+        html_hash = self._put_blob(html.encode())
+        cleaned_html_hash = self._put_blob(cleaned_html.encode())
+        page = StoredPage(url_key, html_hash, cleaned_html_hash, metadata or {}, time.time())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO page VALUES (?, ?, ?, ?, ?)",
+                (url_key, html_hash, cleaned_html_hash, orjson.dumps(page.metadata).decode(), page.fetched_at),
+            )
+
+        self._evict()
+        return page
+
+    def get_markdown(self, content_hash: str, params: str) -> str | None:
+        """Markdown previously extracted from the content with the given extraction params."""
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT markdown_hash FROM extraction WHERE content_hash = ? AND params = ?", (content_hash, params)
+            ).fetchone()
+        if row is None:
+            return None
+
+        markdown = self.read(row[0])
+        return markdown.decode() if markdown is not None else None
+
+    def put_markdown(self, content_hash: str, params: str, markdown: str) -> None:
+        markdown_hash = self._put_blob(markdown.encode())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extraction VALUES (?, ?, ?)", (content_hash, params, markdown_hash)
+            )
+
+        self._evict()
+
+    def read(self, hash: str) -> bytes | None:
+        """Reads a blob, marking it as recently used. Returns `None` if it was evicted or is missing on disk."""
+
+        try:
+            data = self._blob_path(hash).read_bytes()
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            self._db.execute("UPDATE blob SET accessed_at = ? WHERE hash = ?", (time.time(), hash))
+        return data
+
+    def size_bytes(self) -> int:
+        """Total size of the stored blobs, read from the index shared by every process using the folder."""
+
+        with self._lock:
+            return self._size_bytes()
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs, pages, extractions = self._db.execute(
+                "SELECT (SELECT COUNT(*) FROM blob), (SELECT COUNT(*) FROM page), (SELECT COUNT(*) FROM extraction)"
+            ).fetchone()
+            size_bytes = self._size_bytes()
+
+        return {
+            "blobs": blobs,
+            "pages": pages,
+            "extractions": extractions,
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _size_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blob").fetchone()[0]
+
+    def _blob_path(self, hash: str) -> Path:
+        return self.blob_folder / hash[:2] / hash
+
+    def _put_blob(self, data: bytes) -> str:
+        hash = content_hash(data)
+        now = time.time()
+        with self._lock:
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO blob (hash, size, accessed_at) VALUES (?, ?, ?)", (hash, len(data), now)
+            ).rowcount
+            if not inserted:
+                # identical content is already stored, only refresh its recency
+                self._db.execute("UPDATE blob SET accessed_at = ? WHERE hash = ?", (now, hash))
+                return hash
+
+            path = self._blob_path(hash)
+            path.parent.mkdir(exist_ok=True)
+            # write to a temporary file first so readers never see a partial blob
+            temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+
+        return hash
+
+    def _evict(self) -> None:
+        """Removes the least recently used blobs until the store fits its size budget, along with the index entries
+        pointing to them.
+
+        Every crawling process shares the folder, so the total size is summed from the index within a write
+        transaction instead of being tracked per process, and concurrent evictions don't both count the same blobs."""
+
+        evicted_hashes = []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                size_bytes = self._size_bytes()
+                while size_bytes > self.max_bytes:
+                    rows = self._db.execute("SELECT hash, size FROM blob ORDER BY accessed_at LIMIT 64").fetchall()
+                    if not rows:
+                        break
+
+                    for hash, size in rows:
+                        self._db.execute("DELETE FROM blob WHERE hash = ?", (hash,))
+                        self._db.execute("DELETE FROM page WHERE html_hash = ? OR cleaned_html_hash = ?", (hash, hash))
+                        self._db.execute(
+                            "DELETE FROM extraction WHERE content_hash = ? OR markdown_hash = ?", (hash, hash)
+                        )
+                        evicted_hashes.append(hash)
+                        size_bytes -= size
+                        if size_bytes <= self.max_bytes:
+                            break
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+            # files are only deleted once the index no longer points to them
+            for hash in evicted_hashes:
+                self._blob_path(hash).unlink(missing_ok=True)
+            self.evictions += len(evicted_hashes)
+
+        if evicted_hashes:
+            logger.debug("Evicted crawl artifacts", size_bytes=size_bytes, evictions=self.evictions)
@@ -0,0 +1,269 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Protocol
+
+from app.config.logger import logger
+
+
+# rough per-entry bookkeeping overhead (ordered dict node, tuple, key object) added to the payload size
+ENTRY_OVERHEAD_BYTES = 128
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    shared_hits: int = 0
+    shared_misses: int = 0
+    shared_errors: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+    max_bytes: int = 0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        lookups = self.hits + self.misses
+        stats["hit_ratio"] = round(self.hits / lookups, 4) if lookups else None
+        return stats
+
+
+class LRUCache:
+    """In-process LRU cache of byte values bounded by total size in bytes, with a per-entry TTL."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats(max_bytes=max_bytes)
+        # key -> (value, size, expires_at), ordered from least to most recently used
+        self._entries: OrderedDict[str, tuple[bytes, int, float]] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        size = len(value) + len(key) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            # caching this would evict everything else, skip it
+            self.delete(key)
+            return
+
+        self.delete(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl)
+        self.stats.size_bytes += size
+        self.stats.entries += 1
+
+        while self.stats.size_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        if key not in self._entries:
+            return False
+
+        self._remove(key)
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.stats.size_bytes = 0
+        self.stats.entries = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.stats.size_bytes -= size
+        self.stats.entries -= 1
+
+
+class SharedCache(Protocol):
+    """Cache tier shared between worker processes, with a pub/sub channel to broadcast invalidations."""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def publish(self, channel: str, message: str) -> None: ...
+
+    async def listen(self, channel: str, on_message) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class RedisSharedCache:
+    """Shared tier backed by any server speaking the Redis protocol (Redis, Valkey, KeyDB, Dragonfly...)."""
+
+    def __init__(self, url: str):
+        # only needed when a shared tier is configured
+        from redis.asyncio import Redis
+
+        self._client = Redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._client.set(key, value, ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._client.publish(channel, message)
+
+    async def listen(self, channel: str, on_message) -> None:
+        async with self._client.pubsub() as pubsub:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    on_message(message["data"].decode())
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class InMemorySharedCache:
+    """Local stand-in for the shared tier, for development and tests without a Redis-compatible server.
+    Only shared between caches within the same process."""
+
+    def __init__(self):
+        self._values: dict[str, tuple[bytes, float]] = {}
+        self._subscribers: dict[str, list[asyncio.Queue]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._values.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._values[key] = (value, time.monotonic() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    async def listen(self, channel: str, on_message) -> None:
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                on_message(await queue.get())
+        finally:
+            self._subscribers[channel].remove(queue)
+
+    async def close(self) -> None:
+        self._values.clear()
+
+
+class TieredCache:
+    """Two-tier read cache: a size-bounded in-process LRU in front of an optional shared tier.
+
+    Invalidations delete the key from both tiers and are broadcast to every other process so their local tier
+    doesn't serve stale values, the local TTL bounds staleness if a broadcast is missed.
+    """
+
+    def __init__(self, local: LRUCache, shared: SharedCache | None = None, shared_ttl: int = 3600, channel: str = ""):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.channel = channel
+        self._listener: asyncio.Task | None = None
+
+    async def get(self, key: str) -> bytes | None:
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        try:
+            value = await self.shared.get(key)
+        except Exception as ex:
+            self.local.stats.shared_errors += 1
+            logger.warning("Shared cache lookup failed", key=key, error=str(ex))
+            return None
+
+        if value is None:
+            self.local.stats.shared_misses += 1
+            return None
+
+        self.local.stats.shared_hits += 1
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        self.local.set(key, value)
+        if self.shared is None:
+            return
+
+        try:
+            await self.shared.set(key, value, self.shared_ttl)
+        except Exception as ex:
+            self.local.stats.shared_errors += 1
+            logger.warning("Shared cache write failed", key=key, error=str(ex))
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        self.local.stats.invalidations += 1
+        if self.shared is None:
+            return
+
+        try:
+            await self.shared.delete(key)
+            await self.shared.publish(self.channel, key)
+        except Exception as ex:
+            self.local.stats.shared_errors += 1
+            logger.warning("Shared cache invalidation failed", key=key, error=str(ex))
+
+    def stats(self) -> dict:
+        stats = self.local.stats.as_dict()
+        stats["shared_tier"] = type(self.shared).__name__ if self.shared else None
+        return stats
+
+    async def start(self) -> None:
+        """Starts listening for invalidations broadcast by other processes."""
+
+        if self.shared is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self.shared is not None:
+            await self.shared.close()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                await self.shared.listen(self.channel, self.local.delete)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                # entries may be stale until we're subscribed again, drop them all
+                logger.warning("Cache invalidation listener failed, retrying", error=str(ex))
+                self.local.clear()
+                await asyncio.sleep(1)
@@ -0,0 +1,163 @@
+import functools
+import gzip
+import zlib
+from pathlib import Path
+
+import brotli
+import zstandard
+
+from app.config.app_settings import settings
+
+
+# every zstd frame starts with these bytes, valid UTF-8 text can never start with them (0xB5 can't follow 0x28)
+# which lets us store compressed and plain rows in the same column
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+DICTIONARY_SUFFIX = ".zdict"
+
+
+def is_compressed(data: bytes) -> bool:
+    return data[:4] == ZSTD_MAGIC
+
+
+def get_dictionary_path(dict_id: int) -> Path:
+    return Path(settings.compression.dictionary_folder).joinpath(f"{dict_id}{DICTIONARY_SUFFIX}")
+
+
+@functools.cache
+def load_dictionary(dict_id: int) -> zstandard.ZstdCompressionDict:
+    path = get_dictionary_path(dict_id)
+    if not path.exists():
+        raise ValueError(f"zstd dictionary {dict_id} not found at {path}")
+
+    return zstandard.ZstdCompressionDict(path.read_bytes())
+
+
+def save_dictionary(dictionary: zstandard.ZstdCompressionDict) -> Path:
+    path = get_dictionary_path(dictionary.dict_id())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(dictionary.as_bytes())
+    return path
+
+
+def train_dictionary(samples: list[str], dict_size: int = 112_640) -> zstandard.ZstdCompressionDict:
+    """Trains a zstd dictionary over the given content samples, the default size is the zstd CLI default."""
+
+    return zstandard.train_dictionary(dict_size, [sample.encode() for sample in samples])
+
+
+@functools.cache
+def _get_compressor(level: int, dict_id: int | None) -> zstandard.ZstdCompressor:
+    dictionary = load_dictionary(dict_id) if dict_id is not None else None
+    return zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+
+
+@functools.cache
+def _get_decompressor(dict_id: int) -> zstandard.ZstdDecompressor:
+    dictionary = load_dictionary(dict_id) if dict_id else None
+    return zstandard.ZstdDecompressor(dict_data=dictionary)
+
+
+def compress_text(value: str, force: bool = False) -> bytes:
+    """Encodes text for storage, compressing it with zstd when compression is enabled and the text is large enough."""
+
+    data = value.encode()
+    compression_settings = settings.compression
+    if not force and (not compression_settings.enable or len(data) < compression_settings.min_size):
+        return data
+
+    compressor = _get_compressor(compression_settings.level, compression_settings.dictionary_id)
+    return compressor.compress(data)
+
+
+def decompress_text(data: bytes) -> str:
+    """Decodes stored text, transparently handling both zstd frames and plain UTF-8 rows."""
+
+    if not is_compressed(data):
+        return data.decode()
+
+    # the frame header records which dictionary (if any) it was compressed with
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    return _get_decompressor(dict_id).decompress(data).decode()
+
+
+# HTTP content encodings, in server preference order when the client accepts several equally
+HTTP_ENCODINGS = ("zstd", "br", "gzip")
+# fast levels for on-the-fly response compression, best levels for variants that are compressed once and stored
+_FAST_LEVELS = {"zstd": 3, "br": 5, "gzip": 6}
+_BEST_LEVELS = {"zstd": 19, "br": 11, "gzip": 9}
+
+
+def negotiate_encoding(accept_encoding: str | None, supported: tuple[str, ...] = HTTP_ENCODINGS) -> str | None:
+    """Picks the best of the supported content encodings from an `Accept-Encoding` header, respecting q-values."""
+
+    if not accept_encoding:
+        return None
+
+    preferences: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        preferences[coding] = quality
+
+    wildcard = preferences.get("*", 0.0)
+    best_encoding, best_quality = None, 0.0
+    for encoding in supported:
+        quality = preferences.get(encoding, wildcard)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+
+    return best_encoding
+
+
+def encode_content(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compresses a complete body with the given HTTP content encoding."""
+
+    level = (_BEST_LEVELS if best else _FAST_LEVELS)[encoding]
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level)
+
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class StreamEncoder:
+    """Incrementally compresses a streamed body, flushing after every chunk so clients receive data as it's sent."""
+
+    def __init__(self, encoding: str):
+        level = _FAST_LEVELS[encoding]
+        self.encoding = encoding
+
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        elif encoding == "gzip":
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
@@ -7,7 +7,10 @@ from crawl4ai import (
     CacheMode,
     BrowserConfig,
 )
+from lxml import html as lxml_html
+
 from app.config.logger import logger
+from app.schemas.app import CrawlPolicy
 
 
 browser_config = BrowserConfig(
@@ -16,27 +19,64 @@ browser_config = BrowserConfig(
     use_managed_browser=True,  # Enables persistent browser strategy
     browser_type="chromium",
 )
-config = CrawlerRunConfig(
-    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.5195.52 Safari/537.36",
-    word_count_threshold=10,  # Minimum words per content block
-    exclude_external_links=False,
-    remove_overlay_elements=True,  # Remove popups/modals
-    excluded_tags=["form", "header"],
-    # Cache control
-    cache_mode=CacheMode.ENABLED,
-    markdown_generator=DefaultMarkdownGenerator(
-        content_filter=PruningContentFilter(threshold=0.6), options={"ignore_links": False}
-    ),
-)
 
 
-async def crawl_url(url: str, cache: bool = True) -> CrawlResult | None:
-    async with AsyncWebCrawler() as crawler:
-        if not cache:
-            config.cache_mode = CacheMode.DISABLED
+def create_markdown_generator(pruning_threshold: float) -> DefaultMarkdownGenerator:
+    return DefaultMarkdownGenerator(
+        content_filter=PruningContentFilter(threshold=pruning_threshold), options={"ignore_links": False}
+    )
+
+
+def create_run_config(policy: CrawlPolicy) -> CrawlerRunConfig:
+    """Builds a fresh run config for a single crawl, so one request's cache choices never leak into another's."""
+
+    use_crawler_cache = policy.cache and policy.crawler_cache
+    return CrawlerRunConfig(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.5195.52 Safari/537.36",
+        word_count_threshold=10,  # Minimum words per content block
+        exclude_external_links=False,
+        remove_overlay_elements=True,  # Remove popups/modals
+        excluded_tags=["form", "header"],
+        # Cache control
+        cache_mode=CacheMode.ENABLED if use_crawler_cache else CacheMode.DISABLED,
+        markdown_generator=create_markdown_generator(policy.pruning_threshold),
+    )
+
+
+def extract_markdown(cleaned_html: str, url: str, pruning_threshold: float) -> str:
+    """Generates Markdown from already cleaned HTML of a page, without fetching it again. Prefers the pruned "fit"
+    Markdown, like a crawl does."""
+
+    markdown = create_markdown_generator(pruning_threshold).generate_markdown(cleaned_html=cleaned_html, base_url=url)
+    return markdown.fit_markdown or markdown.raw_markdown
+
+
+def extract_canonical_link(html: str) -> str | None:
+    """The `<link rel=canonical>` href of a page, crawl4ai doesn't include it in the page metadata."""
+
+    try:
+        document = lxml_html.document_fromstring(html)
+    except Exception:
+        return None
+
+    hrefs = document.xpath('//head/link[translate(@rel, "CANONICAL", "canonical")="canonical"]/@href')
+    return hrefs[0].strip() if hrefs else None
+
+
+async def crawl_url(
+    url: str, policy: CrawlPolicy = CrawlPolicy(), crawler: AsyncWebCrawler | None = None
+) -> CrawlResult | None:
+    """Crawls a URL in a page of the given running crawler, or else in a browser launched for this crawl only."""
+
+    config = create_run_config(policy)
+    if crawler is not None:
         result: CrawlResult = await crawler.arun(url=url, config=config, browser_config=browser_config)
-        if not result.success:
-            logger.error("error crawling URL", url=url, error=result.error_message)
-            return None
+    else:
+        async with AsyncWebCrawler() as crawler:
+            result = await crawler.arun(url=url, config=config, browser_config=browser_config)
+
+    if not result.success:
+        logger.error("error crawling URL", url=url, error=result.error_message)
+        return None
 
-        return result
+    return result
@@ -0,0 +1,133 @@
+import hashlib
+import math
+import time
+import weakref
+from collections import OrderedDict
+
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.config.logger import logger
+from app.utils.cache import SharedCache
+
+
+def is_plain_read(clause) -> bool:
+    return (
+        clause is not None and getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+    )
+
+
+class RoutingSession(Session):
+    """Sends the reads of a session to the replica engine set in `info["replica"]` until the session runs anything
+    else: a flush, DML, a locking read or raw SQL. From then on it's pinned to the primary, so it reads its own
+    uncommitted writes and a read-modify-write never starts from stale replica data. `info["primary"]` tells whether
+    the session used the primary for anything but reads."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or not is_plain_read(clause):
+            self.info["primary"] = True
+        else:
+            replica: AsyncEngine | None = self.info.get("replica")
+            if replica is not None and not self.info.get("primary"):
+                return replica.sync_engine
+
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class ReplicaSet:
+    """The replica engines, picked round robin for each read session. A replica is skipped for `retry_seconds` after
+    failing to connect, and clients that committed writes in the last `sticky_seconds` read from the primary, so
+    they read their writes despite replication lag.
+
+    Stickiness is recorded in the `shared` cache tier, so it covers a client's requests whichever worker process or
+    instance handles them. Without one, or while it's unreachable, it's only known to the process that saw the write.
+    """
+
+    def __init__(
+        self,
+        retry_seconds: float,
+        sticky_seconds: float,
+        shared: SharedCache | None = None,
+        max_sticky_clients: int = 10_000,
+        key_prefix: str = "py_ai_translator:db:writer:",
+    ):
+        self.retry_seconds = retry_seconds
+        self.sticky_seconds = sticky_seconds
+        self.shared = shared
+        self.max_sticky_clients = max_sticky_clients
+        self.key_prefix = key_prefix
+        self.engines: list[AsyncEngine] = []
+        # connections to the primary made in place of an unreachable replica, replaced once it's back
+        self.fallback_connections: weakref.WeakSet = weakref.WeakSet()
+        self._down_until: list[float] = []
+        self._next = 0
+        # writers seen by this process, checked before the shared tier to save it a round trip
+        self._writers: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, engine: AsyncEngine) -> None:
+        self.engines.append(engine)
+        self._down_until.append(0.0)
+
+    def is_down(self, index: int) -> bool:
+        return self._down_until[index] > time.monotonic()
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def choose(self) -> AsyncEngine | None:
+        """The next available replica, or `None` when all of them are down."""
+
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if not self.is_down(index):
+                return self.engines[index]
+        return None
+
+    async def mark_writer(self, client_key: str) -> None:
+        if self.sticky_seconds <= 0:
+            return
+
+        self._writers[client_key] = time.monotonic() + self.sticky_seconds
+        self._writers.move_to_end(client_key)
+        while len(self._writers) > self.max_sticky_clients:
+            self._writers.popitem(last=False)
+
+        if self.shared is not None:
+            try:
+                await self.shared.set(self._shared_key(client_key), b"1", math.ceil(self.sticky_seconds))
+            except Exception as ex:
+                logger.warning("Failed to record a writer in the shared cache", error=str(ex))
+
+    async def is_sticky(self, client_key: str) -> bool:
+        if self._is_local_writer(client_key):
+            return True
+        if self.shared is None:
+            return False
+
+        try:
+            return await self.shared.get(self._shared_key(client_key)) is not None
+        except Exception as ex:
+            logger.warning("Failed to look up a writer in the shared cache", error=str(ex))
+            return False
+
+    def _is_local_writer(self, client_key: str) -> bool:
+        expires_at = self._writers.get(client_key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._writers[client_key]
+            return False
+        return True
+
+    def _shared_key(self, client_key: str) -> str:
+        # client keys may be API keys, keep them out of the shared tier
+        return self.key_prefix + hashlib.sha256(client_key.encode()).hexdigest()
+
+    def check_out(self, index: int, dbapi_connection, connection_record, connection_proxy) -> None:
+        """Pool `checkout` listener of a replica engine, makes the pool replace a fallback connection to the primary
+        with a new replica connection once the replica is no longer marked down."""
+
+        if dbapi_connection.driver_connection in self.fallback_connections and not self.is_down(index):
+            raise DisconnectionError("Replica is reachable again")
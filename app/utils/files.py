@@ -0,0 +1,45 @@
+import os
+import tempfile
+from pathlib import Path
+
+from app.utils.compression import encode_content
+
+
+# precompressed siblings written next to each saved file, by HTTP content encoding
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    # readers see either the previous file or the complete new one, never a partial write
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def write_with_precompressed(path: Path, data: bytes) -> None:
+    """Writes the file along with a brotli and a gzip compressed copy at the best levels, so the file route can send
+    compressed responses without compressing on every request. Blocking, meant to run in a thread."""
+
+    write_atomic(path, data)
+    for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+        write_atomic(path.with_name(path.name + suffix), encode_content(data, encoding, best=True))
+
+
+def resolve_within(folder: Path, path: str | Path) -> Path | None:
+    """The real path of a file inside the folder, or `None` if it doesn't exist or resolves outside the folder, e.g.
+    through `..` parts or symlinks."""
+
+    folder = folder.resolve()
+    try:
+        resolved = (folder / path).resolve(strict=True)
+    except (OSError, RuntimeError):
+        return None
+
+    if not resolved.is_relative_to(folder) or not resolved.is_file():
+        return None
+    return resolved
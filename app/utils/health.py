@@ -0,0 +1,52 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, TypedDict
+
+
+class CheckResult(TypedDict):
+    ok: bool
+    detail: dict | str | None
+    checked_at: float
+    duration_ms: float
+
+
+class CachedCheck:
+    """Runs a dependency check at most once per `ttl` seconds and shares the result between concurrent callers, so
+    probes from every orchestrator and load balancer cost a single check. A check that raises, returns a falsy
+    `ok` or exceeds `timeout` is reported as failed."""
+
+    def __init__(
+        self, name: str, check: Callable[[], Awaitable[tuple[bool, dict | str | None]]], ttl: float, timeout: float
+    ):
+        self.name = name
+        self.check = check
+        self.ttl = ttl
+        self.timeout = timeout
+
+        self._result: CheckResult | None = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.time() - self._result["checked_at"] < self.ttl
+
+    async def run(self) -> CheckResult:
+        if self._fresh():
+            return self._result
+
+        async with self._lock:
+            # another caller may have refreshed the result while we waited for the lock
+            if self._fresh():
+                return self._result
+
+            start = time.time()
+            try:
+                ok, detail = await asyncio.wait_for(self.check(), timeout=self.timeout)
+            except TimeoutError:
+                ok, detail = False, f"timed out after {self.timeout}s"
+            except Exception as ex:
+                ok, detail = False, f"{type(ex).__name__}: {ex}"
+
+            self._result = CheckResult(
+                ok=ok, detail=detail, checked_at=start, duration_ms=round((time.time() - start) * 1000, 2)
+            )
+            return self._result
@@ -0,0 +1,291 @@
+import re
+from typing import TypedDict
+
+from markdown_it import MarkdownIt
+from markdown_it.token import Token
+
+
+# models often wrap the whole document in a ```markdown fence, real code blocks inside it are kept
+WRAPPING_FENCE_PATTERN = re.compile(r"^\s*```(?:markdown|md)?[ \t]*\n(?P<content>.*?)\n```\s*$", re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# raw HTML in model output isn't trusted, it's rendered as text
+_renderer = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+
+class TranslationReport(TypedDict):
+    missing_links: list[str]
+    missing_images: list[str]
+    # share of the source paragraphs kept verbatim in the bilingual translation
+    paired_paragraphs_ratio: float
+
+
+class SectionScore(TypedDict):
+    index: int
+    heading: str | None
+    # blocks (paragraphs, headings, lists, code...) of the translation per block of the source, ~2 when bilingual
+    block_ratio: float
+    missing_links: list[str]
+    missing_images: list[str]
+    missing_code_blocks: int
+    passed: bool
+
+
+class QualityReport(TypedDict):
+    passed: bool
+    sections: list[SectionScore]
+    failed_sections: list[int]
+    retried_sections: list[int]
+    # sections whose text couldn't be told apart from the previous section's, see `align_sections`
+    merged_sections: list[int]
+
+
+class PostprocessResult(TypedDict):
+    content: str
+    html: str
+    report: TranslationReport
+
+
+def strip_wrapping_fence(content: str) -> str:
+    match = WRAPPING_FENCE_PATTERN.match(content)
+    return match.group("content") if match else content
+
+
+def _walk(tokens: list[Token]):
+    for token in tokens:
+        yield token
+        if token.children:
+            yield from _walk(token.children)
+
+
+def extract_links(content: str) -> tuple[set[str], set[str]]:
+    """Targets of the links and the sources of the images in Markdown content."""
+
+    links: set[str] = set()
+    images: set[str] = set()
+    for token in _walk(_renderer.parse(content)):
+        if token.type == "link_open" and token.attrGet("href"):
+            links.add(str(token.attrGet("href")))
+        elif token.type == "image" and token.attrGet("src"):
+            images.add(str(token.attrGet("src")))
+
+    return links, images
+
+
+def _paragraphs(content: str) -> list[str]:
+    return [WHITESPACE_PATTERN.sub(" ", block).strip() for block in content.split("\n\n") if block.strip()]
+
+
+def validate_translation(source: str, translation: str) -> TranslationReport:
+    """Checks that every link and image of the source survives into the translation, and how many of the source
+    paragraphs are kept next to their translation."""
+
+    source_links, source_images = extract_links(source)
+    translated_links, translated_images = extract_links(translation)
+
+    source_paragraphs = _paragraphs(source)
+    translated_text = WHITESPACE_PATTERN.sub(" ", translation)
+    paired = sum(1 for paragraph in source_paragraphs if paragraph in translated_text)
+
+    return TranslationReport(
+        missing_links=sorted(source_links - translated_links),
+        missing_images=sorted(source_images - translated_images),
+        paired_paragraphs_ratio=round(paired / len(source_paragraphs), 4) if source_paragraphs else 1.0,
+    )
+
+
+def _top_level_blocks(content: str) -> list[tuple[str, int, str | None]]:
+    """Top level blocks of Markdown content as `(token type, first line, heading text)`."""
+
+    tokens = _renderer.parse(content)
+    blocks = []
+    for index, token in enumerate(tokens):
+        if token.level != 0 or token.nesting < 0 or token.map is None:
+            continue
+
+        heading = tokens[index + 1].content.strip() if token.type == "heading_open" else None
+        blocks.append((token.type, token.map[0], heading))
+
+    return blocks
+
+
+def _code_blocks(content: str) -> set[str]:
+    tokens = _walk(_renderer.parse(content))
+    return {token.content.strip() for token in tokens if token.type in ("fence", "code_block")}
+
+
+def split_sections(content: str) -> list[str]:
+    """Splits Markdown content at its top level headings, the text before the first heading is a section of its own.
+    Headings inside code blocks are ignored."""
+
+    lines = content.splitlines()
+    starts = [line for block_type, line, _ in _top_level_blocks(content) if block_type == "heading_open"]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+
+    boundaries = [*starts, len(lines)]
+    sections = ["\n".join(lines[start:end]).strip() for start, end in zip(boundaries, boundaries[1:])]
+    return [section for section in sections if section]
+
+
+def _spare_headings(blocks: list[tuple[str, int, str | None]], start: int, end: int) -> list[int]:
+    # a source section has a single top level heading at its start, so a heading following other blocks of a part
+    # starts another section. A translated heading right before its original belongs to the same one
+    lines = []
+    previous_type = None
+    seen_content = False
+    for block_type, line, _ in blocks:
+        if not start <= line < end:
+            continue
+        if block_type == "heading_open":
+            if seen_content and previous_type != "heading_open":
+                lines.append(line)
+        else:
+            seen_content = True
+        previous_type = block_type
+    return lines
+
+
+def align_sections(source_sections: list[str], translation: str) -> tuple[list[str], list[int]]:
+    """Cuts a bilingual translation into the parts translating each source section, by finding the original headings
+    it keeps in order. A translated heading placed right before its original belongs to the same section.
+
+    When the model changed a heading, its section starts at the next heading inside the previous part, as long as
+    the number of such headings matches. Returns the parts along with the sections still not found although a later
+    one was: their text, if any, is inside the previous part, so they get an empty part and mustn't be translated
+    and added again. Other sections not found get an empty part too, e.g. when the translation was cut short."""
+
+    lines = translation.splitlines()
+    blocks = _top_level_blocks(translation)
+    starts: list[int | None] = [0]
+    block_index = 0
+    for section in source_sections[1:]:
+        section_blocks = _top_level_blocks(section)
+        heading = section_blocks[0][2] if section_blocks else None
+
+        start = None
+        for index in range(block_index, len(blocks)):
+            block_type, line, block_heading = blocks[index]
+            if block_type == "heading_open" and block_heading == heading:
+                start = line
+                previous_type, previous_line, _ = blocks[index - 1] if index > block_index else (None, None, None)
+                if previous_type == "heading_open" and previous_line > (starts[-1] or 0):
+                    start = previous_line
+                block_index = index + 1
+                break
+        starts.append(start)
+
+    # runs of sections not found, each one after a found section
+    index = 1
+    while index < len(starts):
+        if starts[index] is not None:
+            index += 1
+            continue
+
+        run_end = next((later for later in range(index, len(starts)) if starts[later] is not None), len(starts))
+        end_line = starts[run_end] if run_end < len(starts) else len(lines)
+        spare = _spare_headings(blocks, starts[index - 1], end_line)
+        if len(spare) == run_end - index:
+            starts[index:run_end] = spare
+        index = run_end
+
+    last_found = max(index for index, start in enumerate(starts) if start is not None)
+    merged_sections = [index for index, start in enumerate(starts) if start is None and index < last_found]
+
+    parts = []
+    for index, start in enumerate(starts):
+        if start is None:
+            parts.append("")
+            continue
+
+        end = next((line for line in starts[index + 1 :] if line is not None), len(lines))
+        parts.append("\n".join(lines[start:end]).strip())
+
+    return parts, merged_sections
+
+
+def score_section(index: int, source: str, translation: str, min_block_ratio: float) -> SectionScore:
+    source_links, source_images = extract_links(source)
+    translated_links, translated_images = extract_links(translation)
+    source_blocks = _top_level_blocks(source)
+    block_ratio = len(_top_level_blocks(translation)) / len(source_blocks) if source_blocks else 1.0
+    missing_code_blocks = len(_code_blocks(source) - _code_blocks(translation))
+
+    heading = source_blocks[0][2] if source_blocks else None
+    missing_links = sorted(source_links - translated_links)
+    missing_images = sorted(source_images - translated_images)
+    return SectionScore(
+        index=index,
+        heading=heading,
+        block_ratio=round(block_ratio, 4),
+        missing_links=missing_links,
+        missing_images=missing_images,
+        missing_code_blocks=missing_code_blocks,
+        passed=block_ratio >= min_block_ratio and not missing_links and not missing_images and not missing_code_blocks,
+    )
+
+
+def verify_translation(
+    source: str, translation: str, min_block_ratio: float
+) -> tuple[QualityReport, list[str], list[str]]:
+    """Scores a translation section by section against its source: block count ratio, every link, image and code
+    block kept. Returns the report along with the source sections and the aligned translated sections, so failing
+    sections can be translated again on their own. CPU bound, meant to run in a process pool."""
+
+    source_sections = split_sections(source)
+    translated_sections, merged_sections = align_sections(source_sections, strip_wrapping_fence(translation))
+    scores = []
+    for index, source_section in enumerate(source_sections):
+        translated_section = translated_sections[index]
+        if index in merged_sections:
+            # scored against the previous found part, which holds its text
+            translated_section = next((part for part in reversed(translated_sections[:index]) if part), "")
+        scores.append(score_section(index, source_section, translated_section, min_block_ratio))
+    failed_sections = [score["index"] for score in scores if not score["passed"]]
+
+    report = QualityReport(
+        passed=not failed_sections,
+        sections=scores,
+        failed_sections=failed_sections,
+        retried_sections=[],
+        merged_sections=merged_sections,
+    )
+    return report, source_sections, translated_sections
+
+
+def reuse_sections(source: str, similar_source: str, similar_translation: str) -> tuple[list[str], list[str | None]]:
+    """Splits the source into sections and reuses the translated part of every section also found, ignoring
+    whitespace, in a similar document's source. Returns the source sections along with their reused translations,
+    `None` for the sections that have to be translated. CPU bound, meant to run in a process pool."""
+
+    similar_sections = split_sections(similar_source)
+    similar_parts, merged_sections = align_sections(similar_sections, strip_wrapping_fence(similar_translation))
+    # a part holding the text of merged sections too would add it twice
+    merged_hosts = {
+        max((index for index in range(section) if similar_parts[index]), default=0) for section in merged_sections
+    }
+    translated_by_section = {
+        WHITESPACE_PATTERN.sub(" ", section): part
+        for index, (section, part) in enumerate(zip(similar_sections, similar_parts))
+        if part and index not in merged_hosts
+    }
+
+    source_sections = split_sections(source)
+    reused = [translated_by_section.get(WHITESPACE_PATTERN.sub(" ", section)) for section in source_sections]
+    return source_sections, reused
+
+
+def render_html(content: str) -> str:
+    return _renderer.render(content)
+
+
+def postprocess_translation(source: str, translation: str) -> PostprocessResult:
+    """Cleans up a model's translation, validates it against the source Markdown and renders it to HTML.
+    CPU bound, meant to run in a process pool."""
+
+    content = strip_wrapping_fence(translation)
+    return PostprocessResult(
+        content=content,
+        html=render_html(content),
+        report=validate_translation(source, content),
+    )
@@ -0,0 +1,75 @@
+import hashlib
+import re
+
+import numpy as np
+
+
+WORD_PATTERN = re.compile(r"\w+")
+# Mersenne prime 2^31 - 1, small enough that `a * hash + b` of 32-bit hashes never overflows 64 bits
+PRIME = (1 << 31) - 1
+# fixed so signatures computed by different processes and releases stay comparable
+SEED = 1
+
+
+def _permutations(num_perm: int) -> tuple[np.ndarray, np.ndarray]:
+    generator = np.random.default_rng(SEED)
+    a = generator.integers(1, PRIME, size=num_perm, dtype=np.uint64)
+    b = generator.integers(0, PRIME, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(content: str, shingle_size: int) -> np.ndarray:
+    """32-bit hashes of the distinct word n-grams of the content, case and punctuation are ignored so pages differing
+    only in formatting get the same shingles."""
+
+    words = WORD_PATTERN.findall(content.lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[index : index + shingle_size]) for index in range(len(words) - shingle_size + 1)}
+
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest()) for shingle in shingles]
+    return np.array(hashes, dtype=np.uint64)
+
+
+def compute_signature(content: str, num_perm: int, shingle_size: int) -> bytes:
+    """MinHash signature of the content: the minimum of `num_perm` random hash permutations over its shingles, as
+    packed 32-bit integers. The share of equal values of two signatures estimates the Jaccard similarity of the
+    contents. CPU bound, meant to run in a process pool."""
+
+    hashes = shingle_hashes(content, shingle_size)
+    if not hashes.size:
+        return np.full(num_perm, PRIME, dtype=np.uint32).tobytes()
+
+    a, b = _permutations(num_perm)
+    permuted = (np.outer(a, hashes) + b[:, np.newaxis]) % PRIME
+    return permuted.min(axis=1).astype(np.uint32).tobytes()
+
+
+def signature_similarity(signature: bytes, other: bytes) -> float:
+    values = np.frombuffer(signature, dtype=np.uint32)
+    other_values = np.frombuffer(other, dtype=np.uint32)
+    if values.size != other_values.size:
+        return 0.0
+
+    return float(np.mean(values == other_values))
+
+
+def band_buckets(signature: bytes, bands: int) -> list[int]:
+    """LSH bucket of each band of a signature as a signed 64-bit integer. Contents sharing a bucket in any band are
+    candidate near-duplicates: with `r` rows per band, a pair of similarity `s` shares one with probability
+    `1 - (1 - s^r)^bands`, so the index finds similar contents without comparing against every row."""
+
+    band_size = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        digest = hashlib.blake2b(signature[band * band_size : (band + 1) * band_size], digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, signed=True))
+    return buckets
+
+
+def index_content(content: str, num_perm: int, shingle_size: int, bands: int) -> tuple[bytes, list[int]]:
+    """Signature and LSH buckets of the content in a single process pool round trip."""
+
+    signature = compute_signature(content, num_perm, shingle_size)
+    return signature, band_buckets(signature, bands)
@@ -0,0 +1,163 @@
+import asyncio
+import datetime as dt
+import importlib.util
+import time
+import uuid
+from pathlib import Path
+
+import orjson
+
+from app.config.logger import logger
+from app.utils.files import write_atomic
+
+
+SPEEDSCOPE_SUFFIX = ".speedscope.json"
+SUMMARY_SUFFIX = ".summary.json"
+
+
+def profiling_available() -> bool:
+    """Profiling needs the optional `pyinstrument` dependency (`profiling` extra)."""
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task sleeping `interval` seconds. The lag is the time the loop
+    spent running other callbacks, e.g. blocking code or a CPU bound step called without a thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(time.perf_counter() - started - self.interval, 0.0))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def summary(self) -> dict:
+        if not self.lags:
+            return {"samples": 0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        lags = sorted(self.lags)
+        return {
+            "samples": len(lags),
+            "mean_ms": round(sum(lags) / len(lags) * 1000, 3),
+            "p99_ms": round(lags[min(int(len(lags) * 0.99), len(lags) - 1)] * 1000, 3),
+            "max_ms": round(lags[-1] * 1000, 3),
+        }
+
+
+def prune_profiles(folder: Path, max_files: int, max_bytes: int) -> int:
+    """Deletes the oldest profiles until at most `max_files` are kept, taking up at most `max_bytes`. Blocking, meant
+    to run in a thread."""
+
+    profiles = []
+    for path in folder.glob(f"*{SPEEDSCOPE_SUFFIX}"):
+        summary_path = path.with_name(path.name.removesuffix(SPEEDSCOPE_SUFFIX) + SUMMARY_SUFFIX)
+        try:
+            stat_result = path.stat()
+            size = stat_result.st_size + (summary_path.stat().st_size if summary_path.exists() else 0)
+        except FileNotFoundError:
+            continue
+        profiles.append((stat_result.st_mtime, size, path, summary_path))
+
+    # newest first, everything past the limits is deleted
+    profiles.sort(key=lambda profile: profile[0], reverse=True)
+    deleted = 0
+    total_bytes = 0
+    for index, (_, size, path, summary_path) in enumerate(profiles):
+        total_bytes += size
+        if index < max_files and total_bytes <= max_bytes:
+            continue
+        path.unlink(missing_ok=True)
+        summary_path.unlink(missing_ok=True)
+        deleted += 1
+    return deleted
+
+
+class RequestProfile:
+    """Runs the code of an `async with` block under pyinstrument, sampling only the task that entered it, along with
+    event loop lag probes. On exit, the profile is saved to `folder` as a speedscope file and a summary, named by
+    `id`. A single profile runs per process at a time, overlapping ones would sample each other's loop stalls.
+
+    pyinstrument is imported when a profile starts, requests that aren't profiled never load it."""
+
+    _running = False
+
+    def __init__(
+        self,
+        folder: Path,
+        interval: float,
+        lag_interval: float,
+        max_files: int,
+        max_bytes: int,
+        details: dict | None = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.folder = folder
+        self.interval = interval
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.details = details or {}
+        self.lag_monitor = LoopLagMonitor(lag_interval)
+        self._profiler = None
+        self._started_at: dt.datetime | None = None
+        self._started: float = 0.0
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._running
+
+    async def __aenter__(self) -> "RequestProfile":
+        from pyinstrument import Profiler
+
+        # the lag probe is created first so it doesn't run in the profiled context and isn't sampled with the request
+        self.lag_monitor.start()
+        self._profiler = Profiler(interval=self.interval, async_mode="enabled")
+        self._started_at = dt.datetime.now(dt.UTC)
+        self._started = time.perf_counter()
+        self._profiler.start()
+        RequestProfile._running = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        try:
+            session = self._profiler.stop()
+            duration = time.perf_counter() - self._started
+            await self.lag_monitor.stop()
+
+            summary = {
+                "id": self.id,
+                "started_at": self._started_at,
+                "duration_ms": round(duration * 1000, 3),
+                "cpu_ms": round(session.cpu_time * 1000, 3),
+                "error": repr(exc) if exc is not None else None,
+                "loop_lag": self.lag_monitor.summary(),
+                **self.details,
+            }
+            await asyncio.to_thread(self._save, summary)
+            logger.info("Saved request profile", profile_id=self.id, duration_ms=summary["duration_ms"])
+        except Exception as ex:
+            # a failed save must not fail the profiled request
+            logger.warning("Failed to save request profile", profile_id=self.id, error=str(ex))
+        finally:
+            RequestProfile._running = False
+
+    def _save(self, summary: dict) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        speedscope = self._profiler.output(SpeedscopeRenderer())
+        write_atomic(self.folder / f"{self.id}{SPEEDSCOPE_SUFFIX}", speedscope.encode())
+        write_atomic(self.folder / f"{self.id}{SUMMARY_SUFFIX}", orjson.dumps(summary))
+        prune_profiles(self.folder, self.max_files, self.max_bytes)
@@ -0,0 +1,77 @@
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from pydantic import AnyHttpUrl, ValidationError
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# query parameters that only track where a visitor came from, they never change the page content
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref_src"}
+
+# length of the `crawled_data.canonical_url` column
+MAX_CANONICAL_URL_LENGTH = 255
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a URL so different spellings of the same page map to the same key.
+
+    Lowercases the scheme and host, drops default ports, fragments and tracking parameters, sorts the query and removes
+    the trailing slash of non-root paths.
+    """
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if path != "/":
+        path = path.rstrip("/")
+
+    query_params = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    query = urlencode(sorted(query_params))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _site_key(url: str) -> str:
+    """Collapses the scheme and `www.` prefix of a normalized URL, sites serve the same page under all of them."""
+
+    parts = urlsplit(url)
+    host = parts.netloc.removeprefix("www.")
+    return urlunsplit(("https", host, parts.path, parts.query, ""))
+
+
+def canonicalize_url(url: str, metadata: dict | None = None) -> str:
+    """Canonical form of a URL used to find already crawled pages, so spellings of it differing only by scheme,
+    `www.`, trailing slash, fragment, parameter order or tracking parameters share a single crawl and translation.
+
+    The page's own `<link rel=canonical>` or `og:url` from the crawled metadata is preferred when it points to the
+    same site, other hosts are ignored so a page can't claim another site's entry. Accepts raw URLs as well as values
+    already passed through the `UrlString` validator, both canonicalize the same.
+    """
+
+    try:
+        # same parsing as `UrlString`, e.g. IDN hosts to punycode and percent-encoding
+        url = str(AnyHttpUrl(url.strip()))
+    except ValidationError:
+        pass
+
+    canonical = _site_key(normalize_url(url))
+    metadata = metadata or {}
+    for key in ("canonical", "og:url"):
+        declared_url = metadata.get(key)
+        if not isinstance(declared_url, str) or not declared_url.strip():
+            continue
+
+        declared = _site_key(normalize_url(urljoin(url, declared_url.strip())))
+        if urlsplit(declared).netloc == urlsplit(canonical).netloc and len(declared) <= MAX_CANONICAL_URL_LENGTH:
+            return declared
+
+    return canonical
@@ -0,0 +1,105 @@
+import asyncio
+import datetime as dt
+from typing import Awaitable, Callable, TypedDict
+
+from app.config.logger import logger
+
+
+class UsageRecord(TypedDict):
+    crawled_data_id: int | None
+    language: str
+    domain: str
+    model: str
+    requests: int
+    request_tokens: int
+    response_tokens: int
+    cached_tokens: int
+    latency_ms: int
+    created_date: dt.datetime
+
+
+# summed by the daily rollup, `calls` counts the records
+USAGE_METRICS = ("requests", "request_tokens", "response_tokens", "cached_tokens", "latency_ms")
+USAGE_DIMENSIONS = ("day", "model", "language", "domain")
+
+
+def rollup_usage(records: list[UsageRecord]) -> list[dict]:
+    """Sums records per UTC day, model, language and domain, the increments of the daily rollup for a batch."""
+
+    rollup: dict[tuple, dict] = {}
+    for record in records:
+        day = record["created_date"].astimezone(dt.UTC).date()
+        key = (day, record["model"], record["language"], record["domain"])
+        row = rollup.get(key)
+        if row is None:
+            row = rollup[key] = {**dict(zip(USAGE_DIMENSIONS, key)), "calls": 0, **dict.fromkeys(USAGE_METRICS, 0)}
+
+        row["calls"] += 1
+        for metric in USAGE_METRICS:
+            row[metric] += record[metric]
+
+    return list(rollup.values())
+
+
+class UsageRecorder:
+    """Buffers usage records in memory and hands them to `flush` every `interval_seconds`, or as soon as `batch_size`
+    are waiting, so an LLM call never waits on a database write. Unlike read counts, usage is accounting data: records
+    of a failed flush are kept for the next one, only dropping the oldest beyond `max_buffered`."""
+
+    def __init__(
+        self,
+        flush: Callable[[list[UsageRecord]], Awaitable[None]],
+        interval_seconds: float,
+        batch_size: int,
+        max_buffered: int,
+    ):
+        self._flush = flush
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self._records: list[UsageRecord] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.dropped = 0
+
+    def record(self, record: UsageRecord) -> None:
+        self._records.append(record)
+        if len(self._records) >= self.batch_size and self._task is not None:
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        async with self._lock:
+            records, self._records = self._records, []
+            if not records:
+                return
+
+            try:
+                await self._flush(records)
+            except Exception as ex:
+                logger.warning("Failed to flush usage records", records=len(records), error=str(ex))
+                records.extend(self._records)
+                overflow = len(records) - self.max_buffered
+                if overflow > 0:
+                    self.dropped += overflow
+                    records = records[overflow:]
+                self._records = records
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,49 @@
+from lxml import etree
+
+
+# feeds and sitemaps come from other sites, never resolve entities or fetch anything they reference
+_parser = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+
+
+def _parse(xml: bytes):
+    try:
+        return etree.fromstring(xml, parser=_parser)
+    except etree.XMLSyntaxError:
+        return None
+
+
+def extract_feed_links(xml: bytes) -> list[str]:
+    """Links of the entries of an RSS or Atom feed, in feed order (usually newest first)."""
+
+    root = _parse(xml)
+    if root is None:
+        return []
+
+    # namespace agnostic, RSS 1.0/2.0 and Atom feeds use different ones
+    links = root.xpath("//*[local-name()='item']/*[local-name()='link']/text()")
+    for entry in root.xpath("//*[local-name()='entry']"):
+        hrefs = entry.xpath("*[local-name()='link'][not(@rel) or @rel='alternate']/@href")
+        if hrefs:
+            links.append(hrefs[0])
+
+    return [link.strip() for link in links if link.strip()]
+
+
+def extract_sitemap_urls(xml: bytes) -> list[str]:
+    """Page URLs of a sitemap, most recently modified first. Nested sitemaps of a sitemap index aren't followed."""
+
+    root = _parse(xml)
+    if root is None:
+        return []
+
+    urls = []
+    for url in root.xpath("//*[local-name()='url']"):
+        locations = url.xpath("*[local-name()='loc']/text()")
+        if not locations:
+            continue
+        modified = url.xpath("*[local-name()='lastmod']/text()")
+        urls.append((modified[0].strip() if modified else "", locations[0].strip()))
+
+    # W3C datetimes of the same site sort chronologically as strings
+    urls.sort(key=lambda url: url[0], reverse=True)
+    return [location for _, location in urls]
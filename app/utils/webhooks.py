@@ -0,0 +1,61 @@
+import hashlib
+import hmac
+import random
+import time
+
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+# same for every attempt of a delivery, receivers dedupe retries of an already processed webhook with it
+ID_HEADER = "X-Webhook-Id"
+EVENT_HEADER = "X-Webhook-Event"
+
+# client errors meaning the receiver will never accept the webhook, everything else is retried
+PERMANENT_FAILURE_STATUSES = {400, 401, 403, 404, 405, 410, 413, 422}
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """HMAC-SHA256 of `<timestamp>.<body>`, the timestamp is signed too so a captured webhook can't be replayed
+    later."""
+
+    message = str(timestamp).encode() + b"." + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def webhook_headers(secret: str, delivery_id: int, event: str, body: bytes, timestamp: int | None = None) -> dict:
+    """Headers of a signed webhook. Receivers verify `X-Webhook-Signature: t=<timestamp>,v1=<signature>` with
+    `verify_signature`."""
+
+    timestamp = timestamp if timestamp is not None else int(time.time())
+    return {
+        "Content-Type": "application/json",
+        ID_HEADER: str(delivery_id),
+        EVENT_HEADER: event,
+        SIGNATURE_HEADER: f"t={timestamp},v1={sign_payload(secret, timestamp, body)}",
+    }
+
+
+def verify_signature(secret: str, header: str, body: bytes, tolerance_seconds: int = 300) -> bool:
+    """Checks a `X-Webhook-Signature` header against the received body, rejecting signatures older than the
+    tolerance. Reference implementation for receivers."""
+
+    try:
+        parts = dict(part.split("=", 1) for part in header.split(","))
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+
+    if abs(time.time() - timestamp) > tolerance_seconds:
+        return False
+
+    return hmac.compare_digest(parts.get("v1", ""), sign_payload(secret, timestamp, body))
+
+
+def retry_delay(attempts: int, base_seconds: float, max_seconds: float, retry_after: str | None = None) -> float:
+    """Seconds to wait before the next attempt: exponential backoff with jitter so receivers coming back up aren't hit
+    by every pending delivery at once, or the receiver's `Retry-After` when it sent one in seconds."""
+
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), max_seconds)
+
+    delay = min(base_seconds * 2 ** max(attempts - 1, 0), max_seconds)
+    return delay * random.uniform(0.5, 1)
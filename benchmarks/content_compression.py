@@ -0,0 +1,91 @@
+"""Compares storage size and read latency of plain TOAST compressed text against zstd compressed `bytea`.
+
+Samples existing content rows into temporary tables, one per storage format, and reports the relation size and the
+time taken to read (and decode) all rows back. Run with `uv run --env-file .env benchmarks/content_compression.py`.
+"""
+
+import argparse
+import asyncio
+import time
+
+import zstandard
+from sqlalchemy import text
+
+from app.config.db import get_async_session
+from app.utils.compression import decompress_text, train_dictionary
+
+
+async def fetch_samples(session, limit: int) -> list[str]:
+    result = await session.execute(
+        text(
+            "(SELECT content FROM crawled_data ORDER BY id DESC LIMIT :limit) "
+            "UNION ALL (SELECT content FROM ai_translation_output_data ORDER BY id DESC LIMIT :limit)"
+        ),
+        {"limit": limit},
+    )
+    return [decompress_text(row) for row in result.scalars().all()]
+
+
+async def measure(session, table: str, column_type: str, values: list, decode) -> dict:
+    await session.execute(text(f"CREATE TEMP TABLE {table} (id serial PRIMARY KEY, content {column_type})"))
+    for value in values:
+        await session.execute(text(f"INSERT INTO {table} (content) VALUES (:content)"), {"content": value})
+    await session.execute(text(f"ANALYZE {table}"))
+
+    size = (await session.execute(text(f"SELECT pg_total_relation_size('{table}')"))).scalar()
+
+    start = time.perf_counter()
+    rows = (await session.execute(text(f"SELECT content FROM {table}"))).scalars().all()
+    decoded = [decode(row) for row in rows]
+    elapsed = time.perf_counter() - start
+
+    return {"size": size, "read_ms": elapsed * 1000, "rows": len(decoded)}
+
+
+async def main(limit: int, level: int) -> None:
+    async with get_async_session(auto_commit=False) as session:
+        samples = await fetch_samples(session, limit)
+        if not samples:
+            print("no content rows to benchmark")
+            return
+
+        raw_size = sum(len(sample.encode()) for sample in samples)
+        dictionary = train_dictionary(samples) if len(samples) >= 10 else None
+
+        plain_compressor = zstandard.ZstdCompressor(level=level)
+        plain_decompressor = zstandard.ZstdDecompressor()
+        results = {
+            "toast (text)": await measure(session, "bench_toast", "text", samples, lambda row: row),
+            f"zstd-{level} (bytea)": await measure(
+                session,
+                "bench_zstd",
+                "bytea",
+                [plain_compressor.compress(sample.encode()) for sample in samples],
+                lambda row: plain_decompressor.decompress(row).decode(),
+            ),
+        }
+        if dictionary is not None:
+            dict_compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+            dict_decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            results[f"zstd-{level}+dict (bytea)"] = await measure(
+                session,
+                "bench_zstd_dict",
+                "bytea",
+                [dict_compressor.compress(sample.encode()) for sample in samples],
+                lambda row: dict_decompressor.decompress(row).decode(),
+            )
+
+        await session.rollback()
+
+    print(f"{len(samples)} rows, {raw_size / 1024:.1f} KiB of raw content")
+    for name, result in results.items():
+        print(f"{name:<24} size: {result['size'] / 1024:>10.1f} KiB   read: {result['read_ms']:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=500, help="Rows to sample per content table")
+    parser.add_argument("--level", type=int, default=9, help="zstd compression level")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.limit, args.level))
@@ -0,0 +1,75 @@
+"""Profiles the import time of the app's entrypoint and catches startup regressions.
+
+Runs `python -X importtime` in a fresh interpreter a few times, prints the slowest imports of the best run and exits
+with an error if a heavy subsystem is imported eagerly or the total exceeds the budget.
+Run with `uv run --env-file .env benchmarks/import_time.py`.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+# subsystems that must only be imported once a crawl or translation actually happens
+LAZY_MODULES = ("crawl4ai", "playwright", "pydantic_ai", "openai", "logfire", "numpy")
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def profile_import(module: str) -> list[tuple[int, int, str]]:
+    """Returns `(self_us, cumulative_us, name)` for every module imported by `import <module>`."""
+
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR)}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT_DIR,
+        check=True,
+    )
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        imports.append((int(self_us), int(cumulative_us), name.rstrip()))
+
+    return imports
+
+
+def main(module: str, runs: int, top: int, max_ms: float) -> int:
+    best_run = min((profile_import(module) for _ in range(runs)), key=lambda imports: imports[-1][1])
+    total_ms = best_run[-1][1] / 1000
+
+    print(f"import {module}: {total_ms:.1f} ms (best of {runs})\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for self_us, cumulative_us, name in sorted(best_run, key=lambda entry: entry[1], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+
+    imported_names = {name.strip().split(".")[0] for _, _, name in best_run}
+    eager_modules = [name for name in LAZY_MODULES if name in imported_names]
+
+    failed = False
+    if eager_modules:
+        print(f"\nFAIL: heavy modules imported eagerly: {', '.join(eager_modules)}")
+        failed = True
+    if total_ms > max_ms:
+        print(f"\nFAIL: import time {total_ms:.1f} ms exceeds the {max_ms:.0f} ms budget")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.main", help="Module to profile")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20, help="Number of slowest imports to print")
+    parser.add_argument("--max-ms", type=float, default=1500, help="Import time budget in milliseconds")
+    args = parser.parse_args()
+
+    sys.exit(main(args.module, args.runs, args.top, args.max_ms))
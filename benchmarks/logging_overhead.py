@@ -0,0 +1,86 @@
+"""Measures the logging overhead per request of the hot paths (crawl, model creation, feed) at a given level.
+
+Compares the previous setup (eagerly stringified payloads, untruncated fields, an enqueued stderr handler) with the
+current pipeline (lazy payloads, truncated fields, batched sink). Output goes to /dev/null so only the logging cost
+itself is measured. Run with `uv run --env-file .env benchmarks/logging_overhead.py --level DEBUG`.
+"""
+
+import argparse
+import os
+import time
+
+from loguru import logger
+
+from app.config.app_settings import settings
+from app.config.logger import configure_logger, flush_logger, lazy, request_log_context
+
+
+# a mid-sized article, the crawler's Markdown output for a long blog post is in this range
+CONTENT = (
+    "## Heading\n\nSome paragraph with a [link](https://example.com) and an ![image](https://example.com/a.png).\n"
+    * 2000
+)
+METADATA = {"title": "Example", "og:title": "Example article", "description": "x" * 300}
+
+
+def log_request_previous() -> None:
+    logger.debug("Extracted markdown content from URL\n", url="https://example.com", content=str(CONTENT))
+    logger.debug("Crawled URL metadata", url="https://example.com", metadata=METADATA)
+    logger.debug("created model object", model=CONTENT, class_name="CrawledDataRepository")
+    logger.info("Translation completed", url="https://example.com")
+
+
+def log_request_current() -> None:
+    with request_log_context("/app/translate"):
+        logger.debug(
+            "Extracted markdown content from URL",
+            url="https://example.com",
+            content_length=len(CONTENT),
+            content=lazy(lambda: str(CONTENT)),
+        )
+        logger.debug("Crawled URL metadata", url="https://example.com", metadata=METADATA)
+        logger.debug("created model object", model=lazy(lambda: repr(CONTENT)), class_name="CrawledDataRepository")
+        logger.info("Translation completed", url="https://example.com")
+
+
+def measure(log_request, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        log_request()
+    # wait for queued records to be written so their cost is accounted for
+    logger.complete()
+    flush_logger()
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+def main(level: str, requests: int) -> None:
+    settings.logger.level = level
+    with open(os.devnull, "w") as devnull:
+        logger.remove()
+        logger.configure(patcher=None)
+        logger.add(devnull, level=level, format=settings.logger.format, enqueue=True)
+        previous_us = measure(log_request_previous, requests)
+
+        # the sink is stopped after each measurement, reconfigure to get a fresh one
+        configure_logger(stream=devnull)
+        current_us = measure(log_request_current, requests)
+
+        settings.logger.serialize = True
+        configure_logger(stream=devnull)
+        json_us = measure(log_request_current, requests)
+
+        logger.remove()
+
+    print(f"logging overhead per request at {level}, {requests} requests")
+    print(f"{'previous':<20} {previous_us:>10.1f} us")
+    print(f"{'current':<20} {current_us:>10.1f} us")
+    print(f"{'current (json)':<20} {json_us:>10.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--level", default="INFO")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    main(args.level, args.requests)
@@ -0,0 +1,94 @@
+"""Compares the prompt tokens and latency of the previous prompt layout against the current one.
+
+The previous layout put the document in the system prompt and sent that same prompt as the user prompt, so every
+call sent the document twice and no two calls shared a cacheable prefix. The current one keeps the instructions in a
+stable system prompt and sends the document once. Runs against the fake provider, which simulates prompt prefill time
+and prefix caching, so it needs no network. Like real providers, it only caches system prompts of at least
+`OPENROUTER_FAKE_PROMPT_CACHE_MIN_TOKENS` (1024), which the current instructions are shorter than, so cached tokens
+stay at 0 and the difference comes from sending the document once. Run with
+`OPENROUTER_PROVIDER=fake uv run --env-file .env benchmarks/prompt_layout.py --content-kb 20`.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config.app_settings import settings
+from app.utils.ai import create_agent, get_translation_agent, get_user_prompt
+
+
+PARAGRAPH = "Some paragraph with a [link](https://example.com) and an ![image](https://example.com/a.png).\n\n"
+
+
+def get_legacy_prompt(content: str, language: str) -> str:
+    # the prompt used before the instructions were split from the document
+    return f"""
+    Convert the following Markdown content into a bilingual document. Translate each paragraph into {language} and place the original English paragraph below it. Also, translate headings into {language} and keep the original English headings below them.
+
+    IMPORTANT:
+    - Preserve all image links and external links exactly as they appear in the original content, including image sources inside link tags.
+    - Do not remove or alter any markdown syntax for images, links, or code blocks.
+    - Ensure images are displayed correctly in both translations by retaining their source links.
+
+    {content}
+    """
+
+
+async def run_legacy(content: str, language: str):
+    prompt = get_legacy_prompt(content, language)
+    return await create_agent(system_prompt=prompt).run(prompt)
+
+
+async def run_current(content: str, language: str):
+    return await get_translation_agent(language).run(get_user_prompt(content))
+
+
+async def measure(run, documents: list[str], language: str) -> dict:
+    request_tokens = []
+    cached_tokens = []
+    latencies = []
+    for content in documents:
+        start = time.perf_counter()
+        result = await run(content, language)
+        latencies.append(time.perf_counter() - start)
+
+        usage = result.usage()
+        request_tokens.append(usage.request_tokens or 0)
+        cached_tokens.append((usage.details or {}).get("cached_tokens", 0))
+
+    return {
+        "input_tokens": statistics.mean(request_tokens),
+        "cached_tokens": statistics.mean(cached_tokens),
+        "latency_ms": statistics.mean(latencies) * 1000,
+    }
+
+
+async def main(calls: int, content_kb: int, language: str) -> None:
+    # distinct documents, like the sections of different pages, so only the instructions can be cached
+    documents = [
+        f"## Heading {index}\n\n" + PARAGRAPH * (content_kb * 1024 // len(PARAGRAPH)) for index in range(calls)
+    ]
+    results = {
+        "legacy": await measure(run_legacy, documents, language),
+        "current": await measure(run_current, documents, language),
+    }
+
+    print(f"{'layout':<10} {'input tokens/call':>18} {'cached tokens/call':>19} {'latency/call ms':>16}")
+    for name, result in results.items():
+        print(
+            f"{name:<10} {result['input_tokens']:>18.0f} {result['cached_tokens']:>19.0f} {result['latency_ms']:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--content-kb", type=int, default=5, help="Size of each translated document")
+    parser.add_argument("--language", default="Spanish")
+    args = parser.parse_args()
+
+    if settings.open_router.provider != "fake":
+        parser.error("set OPENROUTER_PROVIDER=fake, the benchmark relies on its simulated prompt cache")
+
+    asyncio.run(main(args.calls, args.content_kb, args.language))
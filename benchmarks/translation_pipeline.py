@@ -0,0 +1,83 @@
+"""Runs `translate_content` at a given concurrency against the fake or a replayed LLM provider, without a network.
+
+Reports throughput, latency percentiles and failed requests, and optionally profiles the whole run to show where
+time goes besides waiting on the model. Run with
+`OPENROUTER_PROVIDER=fake uv run --env-file .env benchmarks/translation_pipeline.py --concurrency 32 --profile`.
+"""
+
+import argparse
+import asyncio
+import cProfile
+import pstats
+import statistics
+import time
+
+from app.config.app_settings import settings
+from app.config.logger import configure_logger
+from app.config.models import CrawledData
+from app.services.app import translate_content
+
+
+# a mid-sized article, the crawler's Markdown output for a long blog post is in this range
+PARAGRAPH = "Some paragraph with a [link](https://example.com) and an ![image](https://example.com/a.png).\n\n"
+
+
+async def run(requests: int, concurrency: int, content_kb: int) -> tuple[list[float], int]:
+    content = "## Heading\n\n" + PARAGRAPH * (content_kb * 1024 // len(PARAGRAPH))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def translate_one(index: int) -> None:
+        nonlocal errors
+        crawled_data = CrawledData(id=index, url=f"https://example.com/{index}", content=content)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await translate_content(crawled_data)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(translate_one(index) for index in range(requests)))
+    return latencies, errors
+
+
+def main(requests: int, concurrency: int, content_kb: int, profile: bool) -> None:
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+
+    start = time.perf_counter()
+    latencies, errors = asyncio.run(run(requests, concurrency, content_kb))
+    elapsed = time.perf_counter() - start
+
+    if profiler:
+        profiler.disable()
+
+    print(f"{settings.open_router.provider} provider, {requests} requests, concurrency {concurrency}")
+    print(f"{'throughput':<16} {requests / elapsed:>10.1f} req/s")
+    if len(latencies) >= 2:
+        percentiles = statistics.quantiles(latencies, n=100)
+        for name, value in (("p50", percentiles[49]), ("p95", percentiles[94]), ("p99", percentiles[98])):
+            print(f"{name + ' latency':<16} {value * 1000:>10.1f} ms")
+    print(f"{'errors':<16} {errors:>10}")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--provider", choices=["fake", "replay"], default="fake")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--content-kb", type=int, default=20, help="Size of the translated document")
+    parser.add_argument("--profile", action="store_true", help="Print the cProfile stats of the run")
+    args = parser.parse_args()
+
+    # never reach OpenRouter from the benchmark
+    settings.open_router.provider = args.provider
+    configure_logger()
+    main(args.requests, args.concurrency, args.content_kb, args.profile)
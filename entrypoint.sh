@@ -13,6 +13,11 @@ if [ "$FLAG" = "web" ]; then
     echo "Starting web application..."
     uv run fastapi run --host 0.0.0.0 --port 8000 --proxy-headers --workers 4
 
+elif [ "$FLAG" = "topology" ]; then
+    echo "Starting stage workers..."
+    shift # remove the first 'topology' argument, pass e.g. '--run all --api-workers 1 --crawl-workers 2 --translate-workers 8'
+    uv run app/main.py "$@"
+
 elif [ "$FLAG" = "cli" ]; then
     echo "Starting CLI application..."
     shift # remove the first 'cli' argument
@@ -0,0 +1,97 @@
+import asyncio
+import unittest
+
+from app.utils.admission import AdmissionController, AdmissionRejected, KeyQuota
+
+
+class AdmissionControllerTest(unittest.IsolatedAsyncioTestCase):
+    async def hold(self, controller: AdmissionController, release: asyncio.Event) -> None:
+        async with controller.slot():
+            await release.wait()
+
+    async def test_rejects_once_the_queue_is_full(self):
+        controller = AdmissionController("translate", limit=1, max_queue=1, max_wait_seconds=5)
+        release = asyncio.Event()
+        holders = [asyncio.create_task(self.hold(controller, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        self.assertEqual((controller.in_flight, controller.waiting), (1, 1))
+        self.assertTrue(controller.saturated)
+        with self.assertRaises(AdmissionRejected) as rejected:
+            async with controller.slot():
+                pass
+
+        self.assertEqual(rejected.exception.status_code, 503)
+        self.assertIn("queue is full", rejected.exception.reason)
+        self.assertEqual(controller.rejected, 1)
+
+        release.set()
+        await asyncio.gather(*holders)
+        self.assertFalse(controller.saturated)
+        self.assertEqual((controller.in_flight, controller.waiting, controller.admitted), (0, 0, 2))
+
+    async def test_rejects_after_waiting_too_long(self):
+        controller = AdmissionController("crawl", limit=1, max_queue=4, max_wait_seconds=0.01)
+        release = asyncio.Event()
+        holder = asyncio.create_task(self.hold(controller, release))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(AdmissionRejected) as rejected:
+            async with controller.slot():
+                pass
+
+        self.assertIn("queued too long", rejected.exception.reason)
+        # the timed out caller left the queue
+        self.assertEqual(controller.waiting, 0)
+
+        release.set()
+        await holder
+
+    async def test_retry_after_grows_with_the_queue(self):
+        controller = AdmissionController("translate", limit=2, max_queue=10, max_wait_seconds=5)
+        controller._average_hold_seconds = 4.0
+
+        self.assertEqual(controller.retry_after(), 2)
+        controller.waiting = 5
+        self.assertEqual(controller.retry_after(), 12)
+        controller.waiting = 100
+        self.assertEqual(controller.retry_after(), 60)
+
+    async def test_not_saturated_while_slots_are_free(self):
+        controller = AdmissionController("translate", limit=2, max_queue=0, max_wait_seconds=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(self.hold(controller, release))
+        await asyncio.sleep(0)
+
+        self.assertFalse(controller.saturated)
+        self.assertFalse(controller.stats()["saturated"])
+
+        release.set()
+        await holder
+
+
+class KeyQuotaTest(unittest.TestCase):
+    def test_rejects_a_key_over_its_limit_with_429(self):
+        quota = KeyQuota(default_limit=1, limits={"batch": 2})
+
+        with quota.slot("client"):
+            with self.assertRaises(AdmissionRejected) as rejected:
+                with quota.slot("client"):
+                    pass
+            # other keys have their own quota
+            with quota.slot("batch"), quota.slot("batch"):
+                pass
+
+        self.assertEqual(rejected.exception.status_code, 429)
+        self.assertEqual(quota.stats()["rejected"], 1)
+        self.assertEqual(quota.stats()["in_flight"], 0)
+
+    def test_zero_limit_disables_the_quota(self):
+        quota = KeyQuota(default_limit=0)
+
+        with quota.slot("client"), quota.slot("client"):
+            self.assertEqual(quota.in_flight["client"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
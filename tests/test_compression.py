@@ -0,0 +1,43 @@
+import os
+import unittest
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("LOGFIRE_ENABLE", "false")
+
+from app.utils.compression import negotiate_encoding  # noqa: E402
+
+
+class NegotiateEncodingTest(unittest.TestCase):
+    def test_no_header_or_no_supported_encoding(self):
+        self.assertIsNone(negotiate_encoding(None))
+        self.assertIsNone(negotiate_encoding(""))
+        self.assertIsNone(negotiate_encoding("deflate, identity"))
+
+    def test_server_preference_among_equally_accepted_encodings(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate, br, zstd"), "zstd")
+        self.assertEqual(negotiate_encoding("gzip, br"), "br")
+        self.assertEqual(negotiate_encoding("GZIP"), "gzip")
+
+    def test_respects_q_values(self):
+        self.assertEqual(negotiate_encoding("zstd;q=0.5, gzip;q=0.9"), "gzip")
+        self.assertEqual(negotiate_encoding("br; q=1.0, zstd; q=0.1"), "br")
+        self.assertIsNone(negotiate_encoding("gzip;q=0"))
+        # a malformed q-value is treated as not acceptable
+        self.assertEqual(negotiate_encoding("zstd;q=high, gzip"), "gzip")
+
+    def test_wildcard_covers_encodings_not_listed(self):
+        self.assertEqual(negotiate_encoding("*"), "zstd")
+        self.assertEqual(negotiate_encoding("zstd;q=0, *"), "br")
+        self.assertIsNone(negotiate_encoding("*;q=0"))
+
+    def test_only_picks_from_the_supported_encodings(self):
+        self.assertEqual(negotiate_encoding("zstd, br, gzip", supported=("gzip",)), "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from app.utils.minhash import band_buckets, compute_signature, index_content, signature_similarity
+
+
+WORDS = " ".join(f"word{index}" for index in range(400))
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+BANDS = 16
+
+
+class ComputeSignatureTest(unittest.TestCase):
+    def test_is_deterministic_and_ignores_formatting(self):
+        signature = compute_signature(WORDS, NUM_PERM, SHINGLE_SIZE)
+
+        self.assertEqual(len(signature), NUM_PERM * 4)
+        self.assertEqual(signature, compute_signature(WORDS, NUM_PERM, SHINGLE_SIZE))
+        self.assertEqual(signature, compute_signature("# " + WORDS.upper().replace(" ", ",\n"), NUM_PERM, SHINGLE_SIZE))
+
+    def test_similarity_estimates_shared_content(self):
+        signature = compute_signature(WORDS, NUM_PERM, SHINGLE_SIZE)
+        edited = compute_signature(WORDS + " some extra closing words", NUM_PERM, SHINGLE_SIZE)
+        unrelated = compute_signature(" ".join(f"other{index}" for index in range(400)), NUM_PERM, SHINGLE_SIZE)
+
+        self.assertEqual(signature_similarity(signature, signature), 1.0)
+        self.assertGreater(signature_similarity(signature, edited), 0.9)
+        self.assertLess(signature_similarity(signature, unrelated), 0.1)
+
+    def test_signatures_of_different_sizes_are_not_similar(self):
+        signature = compute_signature(WORDS, NUM_PERM, SHINGLE_SIZE)
+
+        self.assertEqual(signature_similarity(signature, compute_signature(WORDS, 64, SHINGLE_SIZE)), 0.0)
+
+    def test_short_and_empty_content(self):
+        self.assertEqual(len(compute_signature("two words", NUM_PERM, SHINGLE_SIZE)), NUM_PERM * 4)
+        self.assertEqual(len(compute_signature("", NUM_PERM, SHINGLE_SIZE)), NUM_PERM * 4)
+
+
+class BandBucketsTest(unittest.TestCase):
+    def test_a_bucket_per_band_as_signed_64_bit_integers(self):
+        signature, buckets = index_content(WORDS, NUM_PERM, SHINGLE_SIZE, BANDS)
+
+        self.assertEqual(buckets, band_buckets(signature, BANDS))
+        self.assertEqual(len(buckets), BANDS)
+        self.assertTrue(all(-(2**63) <= bucket < 2**63 for bucket in buckets))
+
+    def test_near_duplicates_share_buckets_and_unrelated_content_doesnt(self):
+        buckets = set(index_content(WORDS, NUM_PERM, SHINGLE_SIZE, BANDS)[1])
+        edited = set(index_content(WORDS + " some extra closing words", NUM_PERM, SHINGLE_SIZE, BANDS)[1])
+        unrelated = set(
+            index_content(" ".join(f"other{index}" for index in range(400)), NUM_PERM, SHINGLE_SIZE, BANDS)[1]
+        )
+
+        self.assertTrue(buckets & edited)
+        self.assertFalse(buckets & unrelated)
+
+
+if __name__ == "__main__":
+    unittest.main()
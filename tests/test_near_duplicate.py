@@ -0,0 +1,78 @@
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("LOGFIRE_ENABLE", "false")
+
+from app.config.app_settings import settings  # noqa: E402
+from app.services import app as app_service  # noqa: E402
+from app.utils.admission import AdmissionRejected  # noqa: E402
+
+
+SECTIONS = [f"## Section {index}\n\nText {index}" for index in range(6)]
+USAGE = {"requests": 1, "request_tokens": 10, "response_tokens": 10, "model": "test"}
+
+
+@mock.patch.object(settings.quality, "enable", False)
+@mock.patch.object(app_service, "get_process_pool", return_value=None)
+@mock.patch.object(app_service, "reuse_sections", side_effect=lambda *_: (SECTIONS, [SECTIONS[0], *[None] * 5]))
+@mock.patch.object(app_service, "get_translation_output", return_value=SimpleNamespace(id=2, content=""))
+@mock.patch.object(app_service, "find_near_duplicate")
+class TranslateNearDuplicateTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.crawled_data = SimpleNamespace(id=1, content="\n\n".join(SECTIONS))
+        self.session = mock.AsyncMock()
+
+    async def test_changed_sections_are_translated_a_few_at_a_time(self, find_near_duplicate, *_):
+        find_near_duplicate.return_value = (SimpleNamespace(id=3, content=""), 0.9)
+        running = 0
+        max_running = 0
+
+        async def run_translation(content, language, crawled_data):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return content, USAGE
+
+        with (
+            mock.patch.object(settings.dedup, "section_concurrency", 2),
+            mock.patch.object(app_service, "run_translation", side_effect=run_translation) as run,
+        ):
+            result = await app_service.translate_near_duplicate(self.crawled_data, "Spanish", self.session)
+
+        self.assertEqual(run.call_count, 5)
+        self.assertEqual(max_running, 2)
+        self.assertEqual(result["metadata"]["near_duplicate"]["translated_sections"], [1, 2, 3, 4, 5])
+        self.assertEqual(result["metadata"]["usage"]["requests"], 5)
+
+    async def test_failed_section_falls_back_to_a_full_translation(self, find_near_duplicate, *_):
+        find_near_duplicate.return_value = (SimpleNamespace(id=3, content=""), 0.9)
+
+        async def run_translation(content, language, crawled_data):
+            if content == SECTIONS[3]:
+                raise AdmissionRejected("Translate queue is full", 503, 1)
+            return "translated", USAGE
+
+        with mock.patch.object(app_service, "run_translation", side_effect=run_translation) as run:
+            result = await app_service.translate_near_duplicate(self.crawled_data, "Spanish", self.session)
+
+        # 5 sections, then the whole page
+        self.assertEqual(run.call_count, 6)
+        self.assertEqual(run.call_args.args[0], self.crawled_data.content)
+        self.assertEqual(result["content"], "translated")
+        self.assertNotIn("near_duplicate", result["metadata"])
+        self.assertEqual(result["metadata"]["usage"]["requests"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("LOGFIRE_ENABLE", "false")
+
+from app.services import app as app_service  # noqa: E402
+from app.utils.markdown import align_sections, split_sections  # noqa: E402
+
+
+SOURCE = (
+    "Intro [a](https://a.com)\n\n"
+    "## One\n\nFirst [b](https://b.com)\n\n"
+    "## Two\n\nSecond [c](https://c.com)\n\n"
+    "## Three\n\nThird [d](https://d.com)"
+)
+INTRO = "Intro [a](https://a.com)\n\nIntroducción [a](https://a.com)"
+ONE = "## Uno\n\n## One\n\nFirst [b](https://b.com)\n\nPrimero [b](https://b.com)"
+TWO_TEXT = "Second [c](https://c.com)\n\nSegundo [c](https://c.com)"
+THREE = "## Tres\n\n## Three\n\nThird [d](https://d.com)\n\nTercero [d](https://d.com)"
+USAGE = {"requests": 1, "request_tokens": 10, "response_tokens": 10, "model": "test"}
+
+
+class AlignSectionsTest(unittest.TestCase):
+    def test_changed_heading_starts_at_the_next_heading_of_the_previous_part(self):
+        translation = "\n\n".join([INTRO, ONE, "## Dos\n\n## Two!\n\n" + TWO_TEXT, THREE])
+        parts, merged_sections = align_sections(split_sections(SOURCE), translation)
+
+        self.assertEqual(merged_sections, [])
+        self.assertTrue(parts[2].startswith("## Dos"))
+        self.assertNotIn("Second", parts[1])
+
+    def test_section_without_heading_is_merged_into_the_previous_part(self):
+        translation = "\n\n".join([INTRO, ONE, TWO_TEXT, THREE])
+        parts, merged_sections = align_sections(split_sections(SOURCE), translation)
+
+        self.assertEqual(merged_sections, [2])
+        self.assertEqual(parts[2], "")
+        self.assertIn("Second", parts[1])
+
+
+@mock.patch.object(app_service, "get_process_pool", return_value=None)
+class EnforceTranslationQualityTest(unittest.IsolatedAsyncioTestCase):
+    async def test_merged_section_is_not_translated_and_added_again(self, _):
+        translation = "\n\n".join([INTRO, ONE, TWO_TEXT, THREE])
+        with mock.patch.object(app_service, "run_translation", return_value=("## Dos\n\n" + TWO_TEXT, USAGE)) as run:
+            content, report, _ = await app_service.enforce_translation_quality(SOURCE, translation, "Spanish")
+
+        run.assert_not_called()
+        self.assertEqual(content.count("Second [c]"), 1)
+        self.assertEqual(report["merged_sections"], [2])
+
+    async def test_missing_last_section_is_translated_again(self, _):
+        translation = "\n\n".join([INTRO, ONE, "## Dos\n\n## Two\n\n" + TWO_TEXT])
+        with mock.patch.object(app_service, "run_translation", return_value=(THREE, USAGE)) as run:
+            content, report, _ = await app_service.enforce_translation_quality(SOURCE, translation, "Spanish")
+
+        run.assert_called_once()
+        self.assertEqual(content.count("Third [d]"), 1)
+        self.assertTrue(report["passed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from app.utils.urls import MAX_CANONICAL_URL_LENGTH, canonicalize_url
+
+
+class CanonicalizeUrlTest(unittest.TestCase):
+    def test_spellings_of_the_same_page_share_a_canonical_url(self):
+        spellings = [
+            "https://example.com/blog/post?b=2&a=1",
+            "http://www.Example.com:80/blog/post/?a=1&b=2#comments",
+            "https://example.com:443/blog/post?a=1&b=2&utm_source=feed&fbclid=x",
+            "  HTTPS://WWW.EXAMPLE.COM/blog/post?a=1&b=2  ",
+        ]
+
+        canonical_urls = {canonicalize_url(url) for url in spellings}
+        self.assertEqual(canonical_urls, {"https://example.com/blog/post?a=1&b=2"})
+
+    def test_keeps_what_changes_the_page(self):
+        self.assertNotEqual(canonicalize_url("https://example.com/a"), canonicalize_url("https://example.com/b"))
+        self.assertNotEqual(canonicalize_url("https://example.com/a?page=2"), canonicalize_url("https://example.com/a"))
+        self.assertEqual(canonicalize_url("https://example.com:8443/a"), "https://example.com:8443/a")
+        self.assertEqual(canonicalize_url("https://example.com"), "https://example.com/")
+
+    def test_prefers_the_declared_canonical_url_of_the_same_site(self):
+        metadata = {"canonical": "/blog/post", "og:url": "https://example.com/other"}
+
+        self.assertEqual(
+            canonicalize_url("https://www.example.com/blog/post?ref=home", metadata), "https://example.com/blog/post"
+        )
+
+    def test_falls_back_to_og_url(self):
+        metadata = {"canonical": "  ", "og:url": "https://example.com/post"}
+
+        self.assertEqual(canonicalize_url("https://example.com/post-amp", metadata), "https://example.com/post")
+
+    def test_ignores_canonical_urls_of_other_sites_and_too_long_ones(self):
+        url = "https://example.com/post"
+
+        self.assertEqual(canonicalize_url(url, {"canonical": "https://attacker.example/post"}), url)
+        long_path = "/" + "a" * MAX_CANONICAL_URL_LENGTH
+        self.assertEqual(canonicalize_url(url, {"canonical": long_path}), url)
+
+
+if __name__ == "__main__":
+    unittest.main()